@@ -153,6 +153,7 @@ export const TRANSLATIONS = {
     calculator: "Affordability Calculator",
     mapView: "Map View",
     listView: "List View",
+    loadMore: "Load more",
     writeReview: "Write a Review",
     reviews: "Reviews",
     submitReview: "Submit Review",
@@ -244,6 +245,7 @@ export const TRANSLATIONS = {
     calculator: "Kikokotoo cha Bajeti",
     mapView: "Ona Ramani",
     listView: "Ona Orodha",
+    loadMore: "Pakia zaidi",
     writeReview: "Andika Maoni",
     reviews: "Maoni",
     submitReview: "Tuma Maoni",
@@ -22,9 +22,9 @@ const HomePage: React.FC<HomePageProps> = ({ language, onSearch, onViewProperty
   useEffect(() => {
     const fetchFeatured = async () => {
       try {
-        const props = await api.properties.getAll();
+        const page = await api.properties.getPage();
         // Just take first 3 for featured
-        setFeaturedProperties(props.slice(0, 3));
+        setFeaturedProperties(page.results.slice(0, 3));
       } catch (err) {
         console.error(err);
       } finally {
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Filter, X, Map as MapIcon, List, Loader } from 'lucide-react';
 import PropertyCard from '../components/PropertyCard';
 import MapView from '../components/MapView';
@@ -16,40 +16,76 @@ interface SearchPageProps {
 const SearchPage: React.FC<SearchPageProps> = ({ language, onViewProperty, initialFilters }) => {
   const t = TRANSLATIONS[language];
   const [properties, setProperties] = useState<Property[]>([]);
+  // Cursor of the next page of results; null once all are loaded.
+  const [next, setNext] = useState<string | null>(null);
   const [isLoading, setIsLoading] = useState(true);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  // Bumped on every new search so late pages of an old one are dropped.
+  const searchId = useRef(0);
   const [showFilters, setShowFilters] = useState(false);
   
   // Filter States
   const [selectedCity, setSelectedCity] = useState('');
   const [priceMax, setPriceMax] = useState<number>(2000000);
+  const [selectedAmenities, setSelectedAmenities] = useState<string[]>([]);
   const [viewMode, setViewMode] = useState<'list' | 'map'>('list');
 
+  const filters = {
+    term: initialFilters?.term ?? '',
+    city: selectedCity,
+    maxPrice: priceMax,
+    // Listings with every amenity ticked, e.g. "water,power".
+    amenities: selectedAmenities.join(',')
+  };
+
   useEffect(() => {
+    const id = ++searchId.current;
     const fetchProperties = async () => {
       setIsLoading(true);
       try {
-        const filters = {
-          term: initialFilters?.term,
-          city: selectedCity,
-          maxPrice: priceMax
-        };
-        const results = await api.properties.getAll(filters);
-        setProperties(results);
+        // First page only; further pages load on demand (loadMore).
+        const page = await api.properties.getPage(filters);
+        if (id !== searchId.current) return;
+        setProperties(page.results);
+        setNext(page.next);
       } catch (err) {
         console.error(err);
       } finally {
-        setIsLoading(false);
+        if (id === searchId.current) setIsLoading(false);
       }
     };
 
     fetchProperties();
-  }, [initialFilters, selectedCity, priceMax]);
+  }, [initialFilters, selectedCity, priceMax, selectedAmenities]);
+
+  const loadMore = async () => {
+    const id = searchId.current;
+    setIsLoadingMore(true);
+    try {
+      const page = await api.properties.getPage(filters, next);
+      if (id !== searchId.current) return;
+      setProperties(current => [...current, ...page.results]);
+      setNext(page.next);
+    } catch (err) {
+      console.error(err);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
+  const resultCount = `${properties.length}${next ? '+' : ''}`;
+
+  const toggleAmenity = (id: string) => {
+    setSelectedAmenities(current =>
+      current.includes(id) ? current.filter(item => item !== id) : [...current, id]
+    );
+  };
 
   return (
     <div className="min-h-screen bg-gray-50 flex flex-col md:flex-row">
       {/* Mobile Filter Toggle */}
       <div className="md:hidden bg-white p-4 border-b border-gray-200 sticky top-16 z-30 flex justify-between items-center">
-        <span className="font-semibold text-gray-700">{properties.length} Results</span>
+        <span className="font-semibold text-gray-700">{resultCount} Results</span>
         <div className="flex gap-2">
             <Button variant="outline" size="sm" onClick={() => setViewMode(viewMode === 'list' ? 'map' : 'list')}>
                 {viewMode === 'list' ? <MapIcon className="w-4 h-4 mr-2" /> : <List className="w-4 h-4 mr-2" />}
@@ -108,7 +144,12 @@ const SearchPage: React.FC<SearchPageProps> = ({ language, onViewProperty, initi
                     <div className="space-y-2">
                         {AMENITIES.map(amenity => (
                             <label key={amenity.id} className="flex items-center">
-                                <input type="checkbox" className="rounded border-gray-300 text-emerald-600 focus:ring-emerald-500" />
+                                <input
+                                    type="checkbox"
+                                    className="rounded border-gray-300 text-emerald-600 focus:ring-emerald-500"
+                                    checked={selectedAmenities.includes(amenity.id)}
+                                    onChange={() => toggleAmenity(amenity.id)}
+                                />
                                 <span className="ml-2 text-sm text-gray-600">
                                     {language === Language.SW ? amenity.name_sw : amenity.name_en}
                                 </span>
@@ -130,7 +171,7 @@ const SearchPage: React.FC<SearchPageProps> = ({ language, onViewProperty, initi
             <div className="hidden md:flex justify-between items-center mb-6">
                  <div>
                     <h1 className="text-2xl font-bold text-gray-900">Properties For Rent</h1>
-                    <span className="text-gray-500">{properties.length} results found</span>
+                    <span className="text-gray-500">{resultCount} results found</span>
                  </div>
                  <div className="flex bg-gray-100 p-1 rounded-lg">
                     <button 
@@ -158,16 +199,25 @@ const SearchPage: React.FC<SearchPageProps> = ({ language, onViewProperty, initi
                 ) : (
                     <>
                         {properties.length > 0 ? (
-                            <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-                                {properties.map(prop => (
-                                    <PropertyCard 
-                                        key={prop.id} 
-                                        property={prop} 
-                                        language={language}
-                                        onClick={() => onViewProperty(prop.id)} 
-                                    />
-                                ))}
-                            </div>
+                            <>
+                                <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
+                                    {properties.map(prop => (
+                                        <PropertyCard 
+                                            key={prop.id} 
+                                            property={prop} 
+                                            language={language}
+                                            onClick={() => onViewProperty(prop.id)} 
+                                        />
+                                    ))}
+                                </div>
+                                {next && (
+                                    <div className="flex justify-center py-6">
+                                        <Button variant="outline" onClick={loadMore} isLoading={isLoadingMore}>
+                                            {t.loadMore}
+                                        </Button>
+                                    </div>
+                                )}
+                            </>
                         ) : (
                             <div className="text-center py-20">
                                 <div className="text-gray-400 text-6xl mb-4">🏠</div>
@@ -1,9 +1,13 @@
-import { User, Property, Inquiry, Tenant, UserRole, Transaction, ForumPost } from '../types';
+import { User, Property, PropertyPage, Inquiry, Tenant, UserRole, Transaction, ForumPost } from '../types';
 import { MOCK_PROPERTIES, MOCK_INQUIRIES, MOCK_TENANTS } from '../constants';
 
 // Configuration to switch between Mock and Real Backend
 const USE_MOCK_DATA = true; // Set to false when backend is running at localhost:8000
 const API_BASE_URL = 'http://localhost:8000/api';
+// Listings per request: the API's max_page_size.
+const PAGE_SIZE = 100;
+// getAll() stops after this many pages; search pages with getPage().
+const MAX_PAGES = 5;
 
 const STORAGE_KEYS = {
   USERS: 'nk_users',
@@ -77,11 +81,26 @@ const realApi = {
         }
     },
     properties: {
-        getAll: async (filters?: any): Promise<Property[]> => {
-            const query = new URLSearchParams(filters).toString();
-            const res = await fetch(`${API_BASE_URL}/properties/?${query}`);
+        // One page of listings; pass the previous page's `next` for the
+        // one after it.
+        getPage: async (filters?: any, next?: string | null): Promise<PropertyPage> => {
+            const query = new URLSearchParams({ ...filters, page_size: String(PAGE_SIZE) }).toString();
+            const res = await fetch(next ?? `${API_BASE_URL}/properties/?${query}`);
             if (!res.ok) throw new Error('Failed to fetch properties');
-            return await res.json();
+            const page = await res.json();
+            return { results: page.results, next: page.next };
+        },
+        // Up to MAX_PAGES pages of listings, for views that show a handful.
+        getAll: async (filters?: any): Promise<Property[]> => {
+            const properties: Property[] = [];
+            let next: string | null = null;
+            for (let pages = 0; pages < MAX_PAGES; pages++) {
+                const page: PropertyPage = await realApi.properties.getPage(filters, next);
+                properties.push(...page.results);
+                next = page.next;
+                if (!next) break;
+            }
+            return properties;
         },
         getById: async (id: string): Promise<Property | undefined> => {
             const res = await fetch(`${API_BASE_URL}/properties/${id}/`);
@@ -218,10 +237,21 @@ const mockApi = {
         if (filters.minPrice) properties = properties.filter(p => p.price >= filters.minPrice);
         if (filters.maxPrice) properties = properties.filter(p => p.price <= filters.maxPrice);
         if (filters.city) properties = properties.filter(p => p.city === filters.city);
+        if (filters.amenities) {
+          const required: string[] = filters.amenities.split(',');
+          properties = properties.filter(p => required.every(id => p.amenities.includes(id)));
+        }
       }
       return properties;
     },
 
+    getPage: async (filters?: any, next?: string | null): Promise<PropertyPage> => {
+      const properties: Property[] = await mockApi.properties.getAll(filters);
+      const start = next ? Number(next) : 0;
+      const end = start + PAGE_SIZE;
+      return { results: properties.slice(start, end), next: end < properties.length ? String(end) : null };
+    },
+
     getById: async (id: string): Promise<Property | undefined> => {
       await delay(400);
       const stored = localStorage.getItem(STORAGE_KEYS.PROPERTIES);
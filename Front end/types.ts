@@ -59,6 +59,11 @@ export interface Property {
   status?: 'ACTIVE' | 'DRAFT' | 'RENTED';
 }
 
+export interface PropertyPage {
+  results: Property[];
+  next: string | null; // Cursor for the following page; null on the last
+}
+
 export interface LandlordStats {
   totalViews: number;
   inquiries: number;
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'NIKONEKTI_backend.settings')
+# Serve the users API with its async views; see USERS_ASYNC_VIEWS in settings.
+os.environ.setdefault('USERS_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
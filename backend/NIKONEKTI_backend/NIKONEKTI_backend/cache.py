@@ -0,0 +1,437 @@
+"""
+Caching primitives shared by the project apps.
+
+LRUCache is a bounded in-process mapping. TieredCache puts one in front of
+a shared Django cache (CACHES['shared']) and adds single-flight fills,
+probabilistic early refresh and per-namespace invalidation; use it
+through get_tiered_cache() or the @cached decorator.
+"""
+
+import functools
+import hashlib
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+logger = logging.getLogger(__name__)
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe, bounded least-recently-used mapping with per-entry expiry.
+
+    Entries older than ``ttl`` seconds are treated as absent and dropped on
+    access; once ``max_entries`` is reached the least recently used entry is
+    evicted to make room.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60, clock=time.monotonic):
+        if max_entries < 1:
+            raise ValueError('max_entries must be at least 1')
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+# ======================================================
+# TWO-TIER CACHE
+# ======================================================
+
+DEFAULT_TIERED_CACHE = {
+    'L1_MAX_ENTRIES': 10000,
+    # Upper bound on how long a process serves a value without looking at
+    # L2, and so on how stale it can be after an invalidation elsewhere.
+    'L1_TTL': 30,
+    # CACHES alias shared by all workers. None keeps everything in-process.
+    'L2_ALIAS': 'shared',
+    'DEFAULT_TTL': 300,
+    # XFetch beta: above 1 refreshes earlier, 0 disables early refresh.
+    'EARLY_REFRESH_BETA': 1.0,
+    # Longest a fill may hold its lease before others compute anyway.
+    'LOCK_TIMEOUT': 10,
+    # How often namespace versions are re-read from L2.
+    'VERSION_TTL': 1,
+    'KEY_PREFIX': 'tc',
+}
+
+
+class _SingleFlight:
+    """Per-key locks that exist only while someone holds or waits on them."""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}
+
+    def acquire(self, key, blocking=True):
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        if entry[0].acquire(blocking):
+            return True
+        self._forget(key)
+        return False
+
+    def release(self, key):
+        self._locks[key][0].release()
+        self._forget(key)
+
+    def _forget(self, key):
+        with self._guard:
+            entry = self._locks[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+
+class TieredCache:
+    """
+    In-process LRU (L1) in front of a shared Django cache (L2).
+
+    Values are stored as (value, compute seconds, expiry) so that:
+
+    - get_or_set() computes a missing value once per key: other threads
+      wait on a local lock, other processes on a lease in L2, and then
+      read the filled value;
+    - a value is refreshed before it expires with a probability that
+      rises as expiry nears and with how long it took to compute
+      (XFetch), by one caller while the rest keep getting it;
+    - keys live in a namespace whose version is part of the key, so
+      invalidate(namespace) drops all of them with a single increment.
+
+    L2 errors are logged and treated as misses.
+    """
+
+    def __init__(self, l1_max_entries=10000, l1_ttl=30, l2_alias='shared',
+                 default_ttl=300, early_refresh_beta=1.0, lock_timeout=10,
+                 version_ttl=1, key_prefix='tc', clock=time.time, rand=random.random):
+        self.local = LRUCache(max_entries=l1_max_entries, ttl=l1_ttl)
+        self.l1_ttl = l1_ttl
+        self.l2_alias = l2_alias
+        self.default_ttl = default_ttl
+        self.beta = early_refresh_beta
+        self.lock_timeout = lock_timeout
+        self.version_ttl = version_ttl
+        self.key_prefix = key_prefix
+        self._clock = clock
+        self._rand = rand
+        self._flights = _SingleFlight()
+        # Namespace -> (version, read at). Bounded: callers may use one
+        # namespace per map tile or user. A forgotten namespace starts
+        # again from a version none of its old keys used.
+        self._versions = LRUCache(max_entries=l1_max_entries, ttl=math.inf)
+        self._new_versions = itertools.count(time.time_ns())
+        self._stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = {
+            **DEFAULT_TIERED_CACHE,
+            **getattr(settings, 'TIERED_CACHE', {}),
+        }
+        return cls(**{name.lower(): value for name, value in options.items()})
+
+    @property
+    def shared(self):
+        if self.l2_alias is None:
+            return None
+        return caches[self.l2_alias]
+
+    # ------------------------------------------------------------------
+    # Counters
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _family(namespace):
+        # Counters are kept per namespace family, the part before the
+        # first ':', so one namespace per map tile or user still adds
+        # only a handful of counters.
+        return namespace.partition(':')[0]
+
+    def _count(self, namespace, name, amount=1):
+        with self._stats_lock:
+            self._stats[self._family(namespace), name] += amount
+
+    def stats(self, namespace=None):
+        """
+        Counters summed over all namespaces, or for one namespace family
+        ('listing-tiles' covers 'listing-tiles:12/2480/2100'): l1_hits,
+        l2_hits, misses, early_refreshes, stale_served, lease_waits,
+        l2_errors, fills, fill_seconds and get_seconds.
+        """
+        family = None if namespace is None else self._family(namespace)
+        totals = Counter()
+        with self._stats_lock:
+            for (ns, name), value in self._stats.items():
+                if family is None or ns == family:
+                    totals[name] += value
+        return dict(totals)
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats.clear()
+
+    # ------------------------------------------------------------------
+    # L2 access
+    # ------------------------------------------------------------------
+
+    def _l2(self, namespace, method, *args, default=None):
+        if self.l2_alias is None:
+            return default
+        try:
+            return getattr(self.shared, method)(*args)
+        except Exception:
+            logger.warning('L2 cache %s failed', method, exc_info=True)
+            self._count(namespace, 'l2_errors')
+            return default
+
+    # ------------------------------------------------------------------
+    # Keys and namespace versions
+    # ------------------------------------------------------------------
+
+    def _version_key(self, namespace):
+        return f'{self.key_prefix}:ns:{namespace}'
+
+    def version(self, namespace):
+        now = time.monotonic()
+        cached = self._versions.get(namespace)
+        if cached is not None and now - cached[1] < self.version_ttl:
+            return cached[0]
+        version = self._l2(namespace, 'get', self._version_key(namespace))
+        if version is None:
+            # New, or evicted from L2 or from _versions: a version number
+            # past any this process gave out, so keys stored under an
+            # older one of this namespace are never read again.
+            version = cached[0] if cached is not None else next(self._new_versions)
+            if self._l2(namespace, 'add', self._version_key(namespace), version, None) is False:
+                # Another process got there first.
+                version = self._l2(namespace, 'get', self._version_key(namespace)) or version
+        self._versions.set(namespace, (version, now))
+        return version
+
+    def _key(self, namespace, key):
+        key = str(key)
+        if len(key) > 100 or not key.isprintable() or ' ' in key:
+            key = hashlib.sha256(key.encode()).hexdigest()
+        return f'{self.key_prefix}:{namespace}:{self.version(namespace)}:{key}'
+
+    # ------------------------------------------------------------------
+    # Reads and fills
+    # ------------------------------------------------------------------
+
+    def _lookup(self, namespace, full_key):
+        entry = self.local.get(full_key)
+        if entry is not None:
+            self._count(namespace, 'l1_hits')
+            return entry
+        entry = self._l2(namespace, 'get', full_key)
+        if entry is not None:
+            self._count(namespace, 'l2_hits')
+            self._store_local(full_key, entry)
+        return entry
+
+    def _store_local(self, full_key, entry):
+        remaining = entry[2] - self._clock()
+        if remaining > 0:
+            self.local.set(full_key, entry, min(self.l1_ttl, remaining))
+
+    def _refresh_due(self, entry):
+        if not self.beta:
+            return False
+        _, delta, expires_at = entry
+        # XFetch: -log(u) is exponentially distributed, so the refresh
+        # point moves earlier at random, more so for slow computations.
+        return self._clock() - delta * self.beta * math.log(1.0 - self._rand()) >= expires_at
+
+    def get(self, namespace, key, default=None):
+        entry = self._lookup(namespace, self._key(namespace, key))
+        return default if entry is None else entry[0]
+
+    def set(self, namespace, key, value, ttl=None, delta=0.0):
+        ttl = self.default_ttl if ttl is None else ttl
+        full_key = self._key(namespace, key)
+        entry = (value, delta, self._clock() + ttl)
+        self._store_local(full_key, entry)
+        self._l2(namespace, 'set', full_key, entry, ttl)
+
+    def delete(self, namespace, key):
+        full_key = self._key(namespace, key)
+        self.local.delete(full_key)
+        self._l2(namespace, 'delete', full_key)
+
+    def get_or_set(self, namespace, key, compute, ttl=None):
+        """Return the cached value for ``key``, computing it with ``compute()`` if needed."""
+        started = time.perf_counter()
+        full_key = self._key(namespace, key)
+        try:
+            entry = self._lookup(namespace, full_key)
+            if entry is not None:
+                if not self._refresh_due(entry):
+                    return entry[0]
+                self._count(namespace, 'early_refreshes')
+            else:
+                self._count(namespace, 'misses')
+            return self._fill(namespace, key, full_key, compute, ttl, stale=entry)
+        finally:
+            self._count(namespace, 'get_seconds', time.perf_counter() - started)
+
+    def _fill(self, namespace, key, full_key, compute, ttl, stale):
+        if not self._flights.acquire(full_key, blocking=stale is None):
+            # Another thread is refreshing this value.
+            self._count(namespace, 'stale_served')
+            return stale[0]
+        try:
+            if stale is None:
+                # Filled while we waited for the lock?
+                entry = self._lookup(namespace, full_key)
+                if entry is not None:
+                    return entry[0]
+
+            lease = f'{full_key}:lease'
+            leased = self._l2(namespace, 'add', lease, 1, self.lock_timeout, default=True)
+            if not leased:
+                if stale is not None:
+                    self._count(namespace, 'stale_served')
+                    return stale[0]
+                entry = self._await_fill(namespace, full_key)
+                if entry is not None:
+                    return entry[0]
+            try:
+                started = time.perf_counter()
+                value = compute()
+                delta = time.perf_counter() - started
+                self._count(namespace, 'fills')
+                self._count(namespace, 'fill_seconds', delta)
+                self.set(namespace, key, value, ttl, delta)
+                return value
+            finally:
+                # Computing anyway after waiting out another process's
+                # lease: it is still theirs to release.
+                if leased:
+                    self._l2(namespace, 'delete', lease)
+        finally:
+            self._flights.release(full_key)
+
+    def _await_fill(self, namespace, full_key):
+        """Poll L2 while another process holds the lease."""
+        self._count(namespace, 'lease_waits')
+        deadline = time.monotonic() + self.lock_timeout
+        pause = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(pause)
+            entry = self._l2(namespace, 'get', full_key)
+            if entry is not None:
+                self._store_local(full_key, entry)
+                return entry
+            pause = min(pause * 2, 0.2)
+        return None
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def invalidate(self, namespace):
+        """Drop every key in ``namespace``, in all processes within VERSION_TTL."""
+        version_key = self._version_key(namespace)
+        current = self.version(namespace)
+        # incr() needs the key to exist; add() is a no-op when it does.
+        self._l2(namespace, 'add', version_key, current, None)
+        version = self._l2(namespace, 'incr', version_key, default=current + 1)
+        self._versions.set(namespace, (version, time.monotonic()))
+
+    def clear(self):
+        """Empty L1 and the whole L2 alias (tests and maintenance only)."""
+        self.local.clear()
+        self._versions.clear()
+        self._l2(None, 'clear')
+
+
+_tiered_cache = None
+
+
+def get_tiered_cache():
+    global _tiered_cache
+    if _tiered_cache is None:
+        _tiered_cache = TieredCache.from_settings()
+    return _tiered_cache
+
+
+@receiver(setting_changed)
+def reset_tiered_cache(sender, setting, **kwargs):
+    global _tiered_cache
+    if setting in ('TIERED_CACHE', 'CACHES'):
+        _tiered_cache = None
+
+
+def _call_key(args, kwargs):
+    return hashlib.sha256(repr((args, sorted(kwargs.items()))).encode()).hexdigest()[:32]
+
+
+def cached(namespace, ttl=None, key=None):
+    """
+    Cache a function's results in the tiered cache.
+
+    ``key`` builds the cache key from the call's arguments; by default it
+    is a hash of their reprs. The wrapper's ``invalidate()`` drops every
+    cached result of the namespace.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key is not None else _call_key(args, kwargs)
+            return get_tiered_cache().get_or_set(
+                namespace, cache_key, lambda: fn(*args, **kwargs), ttl,
+            )
+        wrapper.invalidate = lambda: get_tiered_cache().invalidate(namespace)
+        return wrapper
+    return decorator
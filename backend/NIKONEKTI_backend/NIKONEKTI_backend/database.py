@@ -0,0 +1,115 @@
+"""
+DATABASES['default'], built from the environment.
+
+    DATABASE_ENGINE          sqlite (default) or postgresql
+    DATABASE_NAME            SQLite file (default BASE_DIR/db.sqlite3) or
+                             PostgreSQL database name
+    DATABASE_USER, DATABASE_PASSWORD, DATABASE_HOST, DATABASE_PORT
+    DATABASE_CONN_MAX_AGE    seconds a connection is reused (default 60)
+    DATABASE_POOL            1 to use psycopg's connection pool instead of
+                             persistent connections (PostgreSQL only)
+    DATABASE_POOL_MIN_SIZE, DATABASE_POOL_MAX_SIZE
+    DATABASE_REPLICAS        comma-separated read replicas: SQLite files or
+                             PostgreSQL hosts (see replica_configs())
+"""
+
+import os
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+# Applied to every new SQLite connection.
+#   journal_mode=WAL     readers no longer block the writer, or it them
+#   synchronous=NORMAL   fsync at checkpoints only; safe with WAL
+#   busy_timeout         wait up to 5s for the write lock instead of
+#                        failing with "database is locked"
+#   cache_size           20 MB page cache per connection (negative = KiB)
+#   mmap_size            read the first 256 MB through mmap
+#   temp_store           sorts and temp indexes in memory
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+DEFAULT_CONN_MAX_AGE = 60
+
+
+def sqlite_init_command(pragmas=None):
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    return ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items())
+
+
+def database_config(base_dir, environ=None):
+    environ = os.environ if environ is None else environ
+    engine = environ.get('DATABASE_ENGINE', 'sqlite')
+    conn_max_age = int(environ.get('DATABASE_CONN_MAX_AGE', DEFAULT_CONN_MAX_AGE))
+
+    if engine == 'sqlite':
+        return {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': environ.get('DATABASE_NAME') or base_dir / 'db.sqlite3',
+            'CONN_MAX_AGE': conn_max_age,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': sqlite_init_command(),
+                # Take the write lock at BEGIN. A deferred transaction that
+                # reads and then writes can't wait out busy_timeout: SQLite
+                # fails the upgrade at once to avoid a deadlock.
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+
+    if engine == 'postgresql':
+        config = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': environ.get('DATABASE_NAME', 'nikonekti'),
+            'USER': environ.get('DATABASE_USER', ''),
+            'PASSWORD': environ.get('DATABASE_PASSWORD', ''),
+            'HOST': environ.get('DATABASE_HOST', ''),
+            'PORT': environ.get('DATABASE_PORT', ''),
+            'CONN_MAX_AGE': conn_max_age,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+        if environ.get('DATABASE_POOL', '0') == '1':
+            # Pooled connections are returned to the pool after each
+            # request, so Django must not also hold them open.
+            config['CONN_MAX_AGE'] = 0
+            config['OPTIONS']['pool'] = {
+                'min_size': int(environ.get('DATABASE_POOL_MIN_SIZE', 2)),
+                'max_size': int(environ.get('DATABASE_POOL_MAX_SIZE', 10)),
+                'timeout': 10,
+            }
+        return config
+
+    raise ImproperlyConfigured(
+        f"DATABASE_ENGINE must be 'sqlite' or 'postgresql', not {engine!r}"
+    )
+
+
+def replica_configs(base_dir, environ=None):
+    """
+    DATABASES entries for DATABASE_REPLICAS, named replica, replica_2, ...
+
+    Each replica copies the primary's settings with another SQLite file
+    or PostgreSQL host. A local SQLite replica is refreshed from the
+    primary by ``manage.py sync_replicas``; its interval is the simulated
+    replication lag. Tests mirror the replicas onto the test database.
+    """
+    environ = os.environ if environ is None else environ
+    primary = database_config(base_dir, environ)
+    names = [name.strip() for name in environ.get('DATABASE_REPLICAS', '').split(',') if name.strip()]
+    configs = {}
+    for index, name in enumerate(names, start=1):
+        config = {**primary, 'OPTIONS': dict(primary['OPTIONS']), 'TEST': {'MIRROR': 'default'}}
+        if primary['ENGINE'] == 'django.db.backends.sqlite3':
+            config['NAME'] = Path(name) if Path(name).is_absolute() else base_dir / name
+        else:
+            config['HOST'] = name
+        configs['replica' if index == 1 else f'replica_{index}'] = config
+    return configs
@@ -0,0 +1,358 @@
+"""
+Request metrics in the Prometheus text exposition format.
+
+MetricsMiddleware adds each request to in-process aggregates keyed by URL
+name (e.g. ``users:login``): a latency histogram, request counts by
+method and status, and DB time and queries (from SQLBudgetMiddleware).
+Recording is a bisect and a few additions under a lock.
+
+With METRICS['MULTIPROCESS_DIR'] set, every worker writes its aggregates
+to <dir>/<pid>.json every FLUSH_INTERVAL seconds and at exit, and the
+/metrics endpoint sums all of them, so any worker can answer a scrape.
+Files of exited workers are kept so counters never go backwards.
+
+/metrics is served to staff users and to requests bearing
+``Authorization: Bearer <METRICS['TOKEN']>``.
+"""
+
+import atexit
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .cache import get_tiered_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+# ======================================================
+# CONFIGURATION
+# ======================================================
+
+DEFAULT_METRICS = {
+    'ENABLED': True,
+    # Latency histogram upper bounds, in seconds.
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    # Directory shared by all workers of a deployment; None for a single
+    # process. Clear it when the deployment restarts.
+    'MULTIPROCESS_DIR': None,
+    'FLUSH_INTERVAL': 5,
+    # Bearer token accepted by /metrics besides a staff session.
+    'TOKEN': None,
+}
+
+
+def get_metrics_options():
+    return {
+        **DEFAULT_METRICS,
+        **getattr(settings, 'METRICS', {}),
+    }
+
+
+# Methods counted under their own name; any other method is counted as
+# OTHER, so clients cannot add series by making methods up.
+METHODS = frozenset({'GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS'})
+
+
+def method_label(method):
+    return method if method in METHODS else 'OTHER'
+
+
+# ======================================================
+# AGGREGATES
+# ======================================================
+
+class MetricsRegistry:
+    """Per-process request aggregates, serialisable as a JSON snapshot."""
+
+    def __init__(self, buckets, multiprocess_dir=None, flush_interval=5):
+        self.buckets = tuple(buckets)
+        self.multiprocess_dir = Path(multiprocess_dir) if multiprocess_dir else None
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset()
+
+    @classmethod
+    def from_settings(cls):
+        options = get_metrics_options()
+        return cls(
+            buckets=options['BUCKETS'],
+            multiprocess_dir=options['MULTIPROCESS_DIR'],
+            flush_interval=options['FLUSH_INTERVAL'],
+        )
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._requests = Counter()
+        # view -> [count per bucket..., count above the last bucket, sum]
+        self._latency = {}
+        # view -> [db seconds, db queries]
+        self._db = {}
+        self._thread = None
+
+    def observe(self, view, method, status, seconds, db_seconds=0.0, db_queries=0):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: the parent's numbers are the parent's.
+                self._reset()
+            self._requests[view, method, status] += 1
+            histogram = self._latency.get(view)
+            if histogram is None:
+                histogram = self._latency[view] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += seconds
+            if db_queries:
+                db = self._db.setdefault(view, [0.0, 0])
+                db[0] += db_seconds
+                db[1] += db_queries
+        if self.multiprocess_dir is not None and self._thread is None:
+            self._ensure_flusher()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'buckets': list(self.buckets),
+                'requests': [[*key, count] for key, count in self._requests.items()],
+                'latency': {view: list(values) for view, values in self._latency.items()},
+                'db': {view: list(values) for view, values in self._db.items()},
+                'cache': get_tiered_cache().stats(),
+            }
+
+    # ------------------------------------------------------------------
+    # Multiprocess
+    # ------------------------------------------------------------------
+
+    def write(self):
+        """Publish this process's snapshot for the other workers."""
+        self.multiprocess_dir.mkdir(parents=True, exist_ok=True)
+        path = self.multiprocess_dir / f'{os.getpid()}.json'
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(self.snapshot()))
+        temporary.replace(path)
+
+    def collect(self):
+        """This process's snapshot merged with every other worker's."""
+        snapshots = [self.snapshot()]
+        if self.multiprocess_dir is not None and self.multiprocess_dir.is_dir():
+            own = f'{os.getpid()}.json'
+            for path in self.multiprocess_dir.glob('*.json'):
+                if path.name == own:
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    logger.warning('Skipping unreadable metrics file %s', path)
+        return merge_snapshots(snapshots)
+
+    def _ensure_flusher(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.write()
+            except OSError:
+                logger.exception('Failed to write metrics')
+
+
+def merge_snapshots(snapshots):
+    requests = Counter()
+    latency = {}
+    db = {}
+    cache = Counter()
+    buckets = snapshots[0]['buckets']
+    for snapshot in snapshots:
+        if snapshot['buckets'] != buckets:
+            continue
+        for *key, count in snapshot['requests']:
+            requests[tuple(key)] += count
+        for view, values in snapshot['latency'].items():
+            total = latency.setdefault(view, [0] * len(values))
+            latency[view] = [a + b for a, b in zip(total, values)]
+        for view, values in snapshot['db'].items():
+            total = db.setdefault(view, [0.0, 0])
+            db[view] = [total[0] + values[0], total[1] + values[1]]
+        cache.update(snapshot.get('cache', {}))
+    return {'buckets': buckets, 'requests': requests, 'latency': latency, 'db': db, 'cache': cache}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry.from_settings()
+    return _registry
+
+
+@receiver(setting_changed)
+def reset_metrics_registry(sender, setting, **kwargs):
+    global _registry
+    if setting == 'METRICS':
+        _registry = None
+
+
+@atexit.register
+def _write_at_exit():
+    if _registry is not None and _registry.multiprocess_dir is not None:
+        try:
+            _registry.write()
+        except OSError:
+            logger.exception('Failed to write metrics at shutdown')
+
+
+# ======================================================
+# EXPOSITION
+# ======================================================
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def render(metrics):
+    """Prometheus text format (version 0.0.4) for merged snapshots."""
+    lines = [
+        '# HELP nikonekti_http_requests_total Requests by URL name, method and status.',
+        '# TYPE nikonekti_http_requests_total counter',
+    ]
+    for (view, method, status), count in sorted(metrics['requests'].items()):
+        lines.append(f'nikonekti_http_requests_total{_labels(view=view, method=method, status=status)} {count}')
+
+    lines += [
+        '# HELP nikonekti_http_request_duration_seconds Request latency by URL name.',
+        '# TYPE nikonekti_http_request_duration_seconds histogram',
+    ]
+    bounds = [*(f'{bound:g}' for bound in metrics['buckets']), '+Inf']
+    for view, values in sorted(metrics['latency'].items()):
+        cumulative = 0
+        for bound, count in zip(bounds, values[:-1]):
+            cumulative += count
+            lines.append(
+                f'nikonekti_http_request_duration_seconds_bucket{_labels(view=view, le=bound)} {cumulative}'
+            )
+        lines.append(f'nikonekti_http_request_duration_seconds_sum{_labels(view=view)} {values[-1]:.6f}')
+        lines.append(f'nikonekti_http_request_duration_seconds_count{_labels(view=view)} {cumulative}')
+
+    lines += [
+        '# HELP nikonekti_http_request_db_seconds_total Time spent in SQL by URL name.',
+        '# TYPE nikonekti_http_request_db_seconds_total counter',
+    ]
+    lines += [
+        f'nikonekti_http_request_db_seconds_total{_labels(view=view)} {seconds:.6f}'
+        for view, (seconds, _) in sorted(metrics['db'].items())
+    ]
+    lines += [
+        '# HELP nikonekti_http_request_db_queries_total SQL queries by URL name.',
+        '# TYPE nikonekti_http_request_db_queries_total counter',
+    ]
+    lines += [
+        f'nikonekti_http_request_db_queries_total{_labels(view=view)} {queries}'
+        for view, (_, queries) in sorted(metrics['db'].items())
+    ]
+
+    lines += [
+        '# HELP nikonekti_cache_events_total Tiered cache hits, misses and refreshes.',
+        '# TYPE nikonekti_cache_events_total counter',
+    ]
+    lines += [
+        f'nikonekti_cache_events_total{_labels(event=event)} {count}'
+        for event, count in sorted(metrics['cache'].items())
+        if not event.endswith('_seconds')
+    ]
+    lines += [
+        '# HELP nikonekti_cache_seconds_total Time spent in tiered cache reads and fills.',
+        '# TYPE nikonekti_cache_seconds_total counter',
+    ]
+    lines += [
+        f'nikonekti_cache_seconds_total{_labels(operation=event.removesuffix("_seconds"))} {seconds:.6f}'
+        for event, seconds in sorted(metrics['cache'].items())
+        if event.endswith('_seconds')
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    token = get_metrics_options()['TOKEN']
+    auth = request.META.get('HTTP_AUTHORIZATION', '')
+    bearer = auth[7:] if auth.startswith('Bearer ') else ''
+    if not (
+        (token and bearer and hmac.compare_digest(bearer, token))
+        or getattr(request.user, 'is_staff', False)
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render(get_metrics_registry().collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+# ======================================================
+# MIDDLEWARE
+# ======================================================
+
+class MetricsMiddleware:
+    """Times each request; place it first so the whole stack is measured."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(self.get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.enabled = get_metrics_options()['ENABLED']
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, time.perf_counter() - started)
+        return response
+
+    def _observe(self, request, response, seconds):
+        match = request.resolver_match
+        stats = getattr(response, 'sql_stats', None)
+        get_metrics_registry().observe(
+            # Unmatched paths share one series so scanners can't add more.
+            match.view_name if match is not None else '<unmatched>',
+            method_label(request.method),
+            response.status_code,
+            seconds,
+            stats.seconds if stats is not None else 0.0,
+            stats.count if stats is not None else 0,
+        )
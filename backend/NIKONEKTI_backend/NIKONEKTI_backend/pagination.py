@@ -0,0 +1,75 @@
+"""
+Paginators for large tables.
+"""
+
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimate_table_rows(model, using='default'):
+    """
+    Approximate row count of ``model``'s table without scanning it, or
+    None if the database offers no cheap estimate.
+
+    PostgreSQL: the planner's reltuples. SQLite: the row count recorded by
+    ANALYZE, else the largest rowid (an upper bound when rows were deleted).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone():
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s AND idx IS NULL', [table])
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+            cursor.execute(f'SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}')
+            return cursor.fetchone()[0] or 0
+    return None
+
+
+def estimate_query_rows(queryset):
+    """The planner's row estimate for ``queryset`` (PostgreSQL only), or None."""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return plan[0]['Plan']['Plan Rows']
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never runs an unbounded COUNT(*).
+
+    - Unfiltered querysets report the table's estimated row count.
+    - Filtered querysets are counted exactly up to ``count_limit`` rows,
+      which stays cheap because the count stops there. Past it the
+      planner's estimate is used where the database has one; elsewhere
+      the count is reported as ``count_limit``, so only that many rows
+      can be paged through (narrow the search to reach the rest).
+    """
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+
+        if not queryset.query.has_filters():
+            estimate = estimate_table_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.count_limit:
+                return estimate
+
+        count = queryset.order_by()[:self.count_limit + 1].count()
+        if count <= self.count_limit:
+            return count
+        estimate = estimate_query_rows(queryset)
+        return max(estimate or 0, self.count_limit)
@@ -0,0 +1,319 @@
+"""
+Primary/replica database routing.
+
+Writes go to the primary ('default') and reads to a random replica from
+REPLICA_ROUTING['REPLICAS']. Reads go to the primary instead:
+
+- inside a transaction on the primary;
+- for the rest of a request once it has written;
+- for STICKY_SECONDS after a client's last write, so it reads its own
+  writes while the replicas catch up. Clients are recognised by their
+  Authorization token or session cookie (shared between workers through
+  SHARED_CACHE_ALIAS), and browsers also get a cookie;
+- in views with ``read_from_primary = True`` (or the @read_from_primary
+  decorator), and inside ``with use_primary():`` blocks.
+
+With no replicas configured the router stays out of the way.
+"""
+
+import hashlib
+import random
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.dispatch import receiver
+
+from .cache import LRUCache
+
+
+# ======================================================
+# CONFIGURATION
+# ======================================================
+
+DEFAULT_REPLICA_ROUTING = {
+    # DATABASES aliases that serve reads. Empty sends everything to 'default'.
+    'REPLICAS': [],
+    # How long a client's reads stay on the primary after it writes. Keep
+    # it above the replicas' worst normal lag.
+    'STICKY_SECONDS': 5,
+    'COOKIE_NAME': 'db_primary_until',
+    # Clients remembered in-process; set SHARED_CACHE_ALIAS so a client
+    # that writes through one worker is pinned on all of them.
+    'MAX_CLIENTS': 100000,
+    'SHARED_CACHE_ALIAS': None,
+    'KEY_PREFIX': 'db-primary',
+}
+
+
+def get_routing_options():
+    return {
+        **DEFAULT_REPLICA_ROUTING,
+        **getattr(settings, 'REPLICA_ROUTING', {}),
+    }
+
+
+# ======================================================
+# ROUTING STATE
+# ======================================================
+
+@dataclass
+class RoutingState:
+    """Per-request routing flags, shared with sync_to_async threads."""
+    primary: bool = False
+    wrote: bool = False
+    sticky_keys: list = field(default_factory=list)
+
+
+_state = ContextVar('replica_routing_state', default=None)
+
+
+@contextmanager
+def use_primary():
+    """Send every read in the block to the primary."""
+    current = _state.get()
+    token = _state.set(RoutingState(
+        primary=True,
+        wrote=current.wrote if current else False,
+        sticky_keys=current.sticky_keys if current else [],
+    ))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def read_from_primary(view):
+    """View decorator: the view reads only from the primary."""
+    view.read_from_primary = True
+    return view
+
+
+def stick_to_primary(token_key):
+    """
+    Pin the client holding ``token_key`` to the primary, as if its own
+    request had written. For responses that hand out a new token (e.g.
+    registration), whose next request the client makes with that token.
+    """
+    state = _state.get()
+    if state is not None:
+        state.sticky_keys.append(f'token:{token_key}')
+
+
+# ======================================================
+# ROUTER
+# ======================================================
+
+class PrimaryReplicaRouter:
+    def _replicas(self):
+        return get_routing_options()['REPLICAS']
+
+    def db_for_read(self, model, **hints):
+        replicas = self._replicas()
+        if not replicas:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Follow relations on the database the instance came from.
+            return instance._state.db
+        state = _state.get()
+        if state is not None and (state.primary or state.wrote):
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if not self._replicas():
+            return None
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *self._replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in self._replicas():
+            return False
+        return None
+
+
+# ======================================================
+# READ-YOUR-WRITES
+# ======================================================
+
+class StickyClients:
+    """Clients whose reads go to the primary until a deadline."""
+
+    def __init__(self, seconds, max_clients, shared_cache_alias=None, key_prefix='db-primary'):
+        self.seconds = seconds
+        self.local = LRUCache(max_entries=max_clients, ttl=seconds)
+        self.shared_cache_alias = shared_cache_alias
+        self.key_prefix = key_prefix
+
+    @classmethod
+    def from_settings(cls):
+        options = get_routing_options()
+        return cls(
+            seconds=options['STICKY_SECONDS'],
+            max_clients=options['MAX_CLIENTS'],
+            shared_cache_alias=options['SHARED_CACHE_ALIAS'],
+            key_prefix=options['KEY_PREFIX'],
+        )
+
+    @property
+    def shared(self):
+        if self.shared_cache_alias is None:
+            return None
+        return caches[self.shared_cache_alias]
+
+    def _key(self, client_key):
+        # Never keep raw tokens or session keys around as cache keys.
+        return hashlib.sha256(client_key.encode()).hexdigest()[:32]
+
+    def pin(self, client_keys):
+        keys = [self._key(key) for key in client_keys]
+        for key in keys:
+            self.local.set(key, True)
+        if self.shared is not None and keys:
+            self.shared.set_many({f'{self.key_prefix}:{key}': True for key in keys}, self.seconds)
+
+    def is_pinned(self, client_keys):
+        keys = [self._key(key) for key in client_keys]
+        if any(key in self.local for key in keys):
+            return True
+        if self.shared is not None and keys:
+            return bool(self.shared.get_many([f'{self.key_prefix}:{key}' for key in keys]))
+        return False
+
+    def clear(self):
+        self.local.clear()
+
+
+_sticky_clients = None
+
+
+def get_sticky_clients():
+    global _sticky_clients
+    if _sticky_clients is None:
+        _sticky_clients = StickyClients.from_settings()
+    return _sticky_clients
+
+
+@receiver(setting_changed)
+def reset_sticky_clients(sender, setting, **kwargs):
+    global _sticky_clients
+    if setting in ('REPLICA_ROUTING', 'CACHES'):
+        _sticky_clients = None
+
+
+def client_keys(request):
+    keys = []
+    auth = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(auth) == 2:
+        keys.append(f'token:{auth[1]}')
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session_key:
+        keys.append(f'session:{session_key}')
+    return keys
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Tracks writes per request and pins recent writers to the primary.
+    Place it above SessionMiddleware so session saves count as writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(request, response, state)
+
+    async def __acall__(self, request):
+        state, token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(request, response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        view_class = getattr(view_func, 'view_class', None)
+        if state is not None and (
+            getattr(view_func, 'read_from_primary', False)
+            or getattr(view_class, 'read_from_primary', False)
+        ):
+            state.primary = True
+
+    def _start(self, request):
+        options = get_routing_options()
+        state = RoutingState()
+        if options['REPLICAS']:
+            try:
+                until = float(request.COOKIES.get(options['COOKIE_NAME'], 0))
+            except ValueError:
+                until = 0
+            state.primary = until > time.time() or get_sticky_clients().is_pinned(client_keys(request))
+        return state, _state.set(state)
+
+    def _finish(self, request, response, state):
+        if state.wrote:
+            options = get_routing_options()
+            get_sticky_clients().pin(client_keys(request) + state.sticky_keys)
+            seconds = options['STICKY_SECONDS']
+            response.set_cookie(
+                options['COOKIE_NAME'], f'{time.time() + seconds:.0f}',
+                max_age=seconds, httponly=True, samesite='Lax',
+            )
+        return response
+
+
+# ======================================================
+# LOCAL SQLITE REPLICAS
+# ======================================================
+
+def copy_sqlite_database(source, target):
+    """
+    Copy the SQLite database ``source`` over ``target`` with the online
+    backup API, so readers of ``target`` see a consistent snapshot.
+    """
+    with closing(sqlite3.connect(source)) as src, closing(sqlite3.connect(target)) as dst:
+        src.backup(dst)
+
+
+def sync_sqlite_replicas(using=DEFAULT_DB_ALIAS):
+    """Refresh every SQLite replica from the primary; returns their aliases."""
+    source = connections[using].settings_dict['NAME']
+    synced = []
+    for alias in get_routing_options()['REPLICAS']:
+        replica = connections[alias]
+        if replica.vendor == 'sqlite':
+            replica.close()
+            copy_sqlite_database(source, replica.settings_dict['NAME'])
+            synced.append(alias)
+    return synced
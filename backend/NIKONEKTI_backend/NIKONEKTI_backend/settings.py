@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
+from .database import database_config, replica_configs
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,20 +47,116 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'properties',
     'payments',
+    'profiling',
 ]
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Used by the sliding-window throttles in users/throttling.py.
+    'DEFAULT_THROTTLE_RATES': {
+        'login_phone': '5/min',
+        'login_ip': '30/min',
+        'register_phone': '3/hour',
+        'register_ip': '20/hour',
+    },
+    # Reverse proxies in front of the app, each appending to
+    # X-Forwarded-For. Left unset, DRF would key IP throttles on whatever
+    # X-Forwarded-For the client sends; 0 uses REMOTE_ADDR alone.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0')),
+}
+
+# 'default' is private to each process. 'shared' is seen by every worker:
+# Redis when CACHE_REDIS_URL is set, else a file-based cache on this host.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['CACHE_REDIS_URL'],
+    } if os.environ.get('CACHE_REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR') or Path(tempfile.gettempdir()) / 'nikonekti-cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# In-process LRU in front of CACHES['shared'] with single-flight fills,
+# early refresh and namespace invalidation (NIKONEKTI_backend/cache.py).
+TIERED_CACHE = {
+    'L1_MAX_ENTRIES': 10000,
+    'L1_TTL': 30,
+    'L2_ALIAS': 'shared',
+    'DEFAULT_TTL': 300,
+}
+
+# Throttle counters live in-process (MAX_KEYS per scope, idle keys evicted)
+# unless SHARED_CACHE_ALIAS names a CACHES alias shared by all workers.
+THROTTLING = {
+    'MAX_KEYS': 100000,
+    'SHARED_CACHE_ALIAS': None,
+}
+
+# Token -> user lookups made by CachedTokenAuthentication are kept in a
+# bounded in-process LRU for TTL seconds. Set SHARED_CACHE_ALIAS to a
+# CACHES alias to add a second tier shared between worker processes.
+TOKEN_AUTH_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 60,
+    'SHARED_CACHE_ALIAS': None,
+    'SHARED_TTL': 300,
+}
+
+# Per-user role/KYC/permission snapshots read by users.permission and
+# User.has_perm(); see users/authorization.py.
+AUTHORIZATION_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 60,
+    'SHARED_CACHE_ALIAS': None,
+    'SHARED_TTL': 300,
+}
+
+# Per-request query count, DB time and N+1 detection; views declare
+# query_budget = N (NIKONEKTI_backend/sql_budget.py).
+SQL_BUDGET = {
+    'ENABLED': True,
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'RAISE': False,
+}
+
+
+# Request latency, status and DB time per URL name, served at /metrics
+# (NIKONEKTI_backend/metrics.py). Set METRICS_DIR when running several
+# worker processes so any of them can report for all.
+METRICS = {
+    'ENABLED': True,
+    'MULTIPROCESS_DIR': os.environ.get('METRICS_DIR') or None,
+    'FLUSH_INTERVAL': 5,
+    'TOKEN': os.environ.get('METRICS_TOKEN') or None,
+}
+
+# Statistical profiling of requests with a signed X-Profile header
+# (`manage.py profile_token`) or drawn by SAMPLE_RATES, e.g.
+# {'users:login': 0.01}. Profiles are listed in the admin.
+PROFILING = {
+    'SAMPLE_RATES': {},
+    'INTERVAL': 0.005,
+    'TOKEN_MAX_AGE': 3600,
+    'MAX_PROFILES': 500,
 }
 
 
 MIDDLEWARE = [
+    'NIKONEKTI_backend.metrics.MetricsMiddleware',
+    'profiling.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'NIKONEKTI_backend.sql_budget.SQLBudgetMiddleware',
+    'NIKONEKTI_backend.replicas.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -84,18 +184,25 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'NIKONEKTI_backend.wsgi.application'
 
-
-from pathlib import Path
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
+# Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite with WAL and a busy timeout by default; set DATABASE_ENGINE=postgresql
+# (and DATABASE_POOL=1 for a connection pool) in production. See
+# NIKONEKTI_backend/database.py for the variables.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR),
+    **replica_configs(BASE_DIR),
+}
+
+# Reads go to the replicas (if any), writes and recent writers' reads to
+# 'default'; see NIKONEKTI_backend/replicas.py.
+DATABASE_ROUTERS = ['NIKONEKTI_backend.replicas.PrimaryReplicaRouter']
+
+REPLICA_ROUTING = {
+    'REPLICAS': [alias for alias in DATABASES if alias != 'default'],
+    'STICKY_SECONDS': 5,
+    'SHARED_CACHE_ALIAS': None,
 }
 
 
@@ -104,6 +211,12 @@ DATABASES = {
 
 AUTH_USER_MODEL = 'users.User'
 
+# Accepts phone numbers in any Tanzanian format and looks the user up with a
+# single query on the unique phone_number index.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.PhoneNumberBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -119,6 +232,31 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# last_login is buffered in memory and written in batched UPDATEs every
+# FLUSH_INTERVAL seconds, skipping users whose stored value is younger than
+# THRESHOLD seconds (users/activity.py).
+LOGIN_ACTIVITY = {
+    'THRESHOLD': 300,
+    'FLUSH_INTERVAL': 30,
+    'MAX_PENDING': 1000,
+    'BATCH_SIZE': 500,
+}
+
+# Password hashing runs in a bounded worker pool (users/hashing.py) so that
+# bursts of logins cannot tie up every request worker. When more than
+# MAX_WORKERS + MAX_QUEUE hashes are in flight, new ones get HTTP 503.
+PASSWORD_HASHING = {
+    'EXECUTOR': 'thread',
+    'MAX_WORKERS': 4,
+    'MAX_QUEUE': 64,
+    'RETRY_AFTER': 1,
+    'PREFERRED_HASHER': None,
+}
+
+# Route /api/users/ to the native async views (users/async_views.py).
+# asgi.py turns this on; WSGI deployments keep the DRF views.
+USERS_ASYNC_VIEWS = os.environ.get('USERS_ASYNC_VIEWS', '0') == '1'
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
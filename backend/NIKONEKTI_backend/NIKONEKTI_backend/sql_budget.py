@@ -0,0 +1,244 @@
+"""
+Per-request SQL instrumentation.
+
+SQLBudgetMiddleware counts the queries a request runs, their total time
+and how often each statement shape (the SQL with IN lists and VALUES rows
+collapsed) repeats. It then
+
+- logs one structured record per request to ``NIKONEKTI_backend.sql``,
+  at WARNING when a shape repeats N_PLUS_ONE_THRESHOLD times (the
+  signature of an N+1 loop) or the view exceeds its query budget;
+- adds X-DB-Queries, X-DB-Time-Ms and X-DB-Duplicates headers to the
+  response when DEBUG is on or the user is staff;
+- raises QueryBudgetExceeded instead when SQL_BUDGET['RAISE'] is set,
+  which tests turn on with NIKONEKTI_backend.testing.QueryBudgetMixin.
+
+Views declare their budget with ``query_budget = N`` or the
+@query_budget(N) decorator.
+"""
+
+import functools
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.functional import SimpleLazyObject, empty
+
+
+logger = logging.getLogger('NIKONEKTI_backend.sql')
+
+
+# ======================================================
+# CONFIGURATION
+# ======================================================
+
+DEFAULT_SQL_BUDGET = {
+    'ENABLED': True,
+    # Executions of one statement shape in a request that count as N+1.
+    'N_PLUS_ONE_THRESHOLD': 5,
+    # Raise QueryBudgetExceeded instead of logging (tests).
+    'RAISE': False,
+}
+
+
+def get_sql_budget_options():
+    return {
+        **DEFAULT_SQL_BUDGET,
+        **getattr(settings, 'SQL_BUDGET', {}),
+    }
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(limit):
+    """View decorator declaring the most queries the view may run."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def view_query_budget(view_func):
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        budget = getattr(getattr(view_func, 'view_class', None), 'query_budget', None)
+    return budget
+
+
+# ======================================================
+# RECORDING
+# ======================================================
+
+_IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+_ROWS = re.compile(r'(\(\.\.\.\))(?:, \(\.\.\.\))+')
+
+
+@functools.lru_cache(maxsize=2048)
+def statement_shape(sql):
+    """``sql`` with placeholder lists collapsed, so batches of any size match."""
+    return _ROWS.sub(r'\1', _IN_LIST.sub('(...)', sql))
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def record(self, sql, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Executions beyond the first of each shape."""
+        return sum(count - 1 for count in self.shapes.values())
+
+    def repeated(self, threshold):
+        return {shape: count for shape, count in self.shapes.most_common() if count >= threshold}
+
+    def as_dict(self):
+        return {
+            'queries': self.count,
+            'db_ms': round(self.seconds * 1000, 2),
+            'duplicates': self.duplicates,
+        }
+
+
+_current = ContextVar('sql_budget_stats', default=None)
+
+
+_TRANSACTION_CONTROL = re.compile(r'BEGIN\b|(?:RELEASE |ROLLBACK TO )?SAVEPOINT ')
+
+
+def _record(execute, sql, params, many, context):
+    stats = _current.get()
+    # BEGIN (SQLite's IMMEDIATE transactions) and savepoints (every atomic
+    # block under TestCase) are transaction bookkeeping, not queries a
+    # view should be charged for.
+    if stats is None or _TRANSACTION_CONTROL.match(sql):
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, time.perf_counter() - started)
+
+
+def _instrument(connection, **kwargs):
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+def install():
+    """Record queries on this thread's connections and every new one."""
+    connection_created.connect(_instrument, dispatch_uid='sql_budget')
+    for connection in connections.all():
+        _instrument(connection)
+
+
+# ======================================================
+# MIDDLEWARE
+# ======================================================
+
+class SQLBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        install()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not get_sql_budget_options()['ENABLED']:
+            return self.get_response(request)
+        # Connections first used by this thread before the signal was connected.
+        for connection in connections.all(initialized_only=True):
+            _instrument(connection)
+        stats = QueryStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, stats)
+
+    async def __acall__(self, request):
+        if not get_sql_budget_options()['ENABLED']:
+            return await self.get_response(request)
+        stats = QueryStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, stats)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = view_query_budget(view_func)
+
+    def _report(self, request, response, stats):
+        options = get_sql_budget_options()
+        budget = getattr(request, 'query_budget', None)
+        repeated = stats.repeated(options['N_PLUS_ONE_THRESHOLD'])
+        over_budget = budget is not None and stats.count > budget
+        response.sql_stats = stats
+
+        if over_budget and options['RAISE']:
+            raise QueryBudgetExceeded(
+                f'{request.method} {request.path} ran {stats.count} queries; '
+                f'its budget is {budget}.\n' + '\n'.join(
+                    f'{count} x {shape}' for shape, count in stats.shapes.most_common()
+                )
+            )
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'budget': budget,
+            **stats.as_dict(),
+        }
+        if repeated:
+            record['n_plus_one'] = repeated
+        if over_budget or repeated:
+            logger.warning(
+                'SQL %s %s: %d queries (budget %s), %d repeated shapes',
+                request.method, request.path, stats.count, budget, len(repeated),
+                extra={'sql': record},
+            )
+        else:
+            logger.info(
+                'SQL %s %s: %d queries in %.1f ms',
+                request.method, request.path, stats.count, stats.seconds * 1000,
+                extra={'sql': record},
+            )
+
+        if settings.DEBUG or _is_staff(request):
+            response['X-DB-Queries'] = str(stats.count)
+            response['X-DB-Time-Ms'] = f'{stats.seconds * 1000:.1f}'
+            response['X-DB-Duplicates'] = str(stats.duplicates)
+        return response
+
+
+def _is_staff(request):
+    user = getattr(request, 'user', None)
+    if user is None:
+        return False
+    # Don't load a session user just to decide on headers.
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return False
+    return bool(getattr(user, 'is_staff', False))
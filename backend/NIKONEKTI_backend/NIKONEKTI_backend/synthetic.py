@@ -0,0 +1,84 @@
+"""
+Synthetic data generators for ``manage.py seed_synthetic``.
+
+Apps define generators in a ``synthetic`` module and decorate them with
+``register``; they run in INSTALLED_APPS order, so listings can pick
+landlords from the users generated before them.
+
+Work is split into chunks of rows. Each chunk draws from its own Random
+seeded with (seed, generator, first row), so the data depends only on
+the seed and the counts, never on the number of workers or the order in
+which chunks finish. Timestamps are generated relative to a fixed
+epoch (--epoch), not the time of the run, for the same reason.
+
+Chunks may be built in worker processes, but only the process running
+the command inserts them: SQLite takes one writer at a time, and
+workers queued on its write lock ran past busy_timeout.
+"""
+
+import random
+from datetime import datetime, timezone
+
+from django.db import transaction
+from django.utils.module_loading import autodiscover_modules
+
+
+_generators = {}
+
+# Default --epoch.
+DEFAULT_EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class Generator:
+    """Builds and inserts one model's rows, a chunk at a time."""
+
+    # Name of the command's count option, e.g. ``--users``.
+    name = None
+    model = None
+    default_count = 0
+
+    def context(self, count, seed, options):
+        """
+        Picklable state shared by every chunk, built once in the parent
+        process (lookup tables, foreign key pools, a password hash).
+        """
+        return {}
+
+    def rows(self, rng, start, stop, context):
+        """Unsaved instances for rows ``start`` to ``stop``."""
+        raise NotImplementedError
+
+    def insert(self, objects):
+        """
+        Insert a chunk, skipping rows an earlier run with the same seed
+        made. This relies on a unique natural key (users' phone numbers);
+        a model without one needs a seeded key of its own and its own
+        insert() (properties.synthetic.ListingGenerator).
+        """
+        self.model.objects.bulk_create(objects, ignore_conflicts=True)
+
+
+def register(cls):
+    _generators[cls.name] = cls()
+    return cls
+
+
+def get_generators():
+    autodiscover_modules('synthetic')
+    return dict(_generators)
+
+
+def chunk_random(seed, name, start):
+    return random.Random(f'{seed}:{name}:{start}')
+
+
+def build_chunk(name, seed, start, stop, context):
+    """Unsaved rows of one chunk; safe to run in a worker process."""
+    generator = get_generators()[name]
+    return generator.rows(chunk_random(seed, name, start), start, stop, context)
+
+
+def insert_chunk(name, objects):
+    """Insert one chunk built by build_chunk(), in its own transaction."""
+    with transaction.atomic():
+        get_generators()[name].insert(objects)
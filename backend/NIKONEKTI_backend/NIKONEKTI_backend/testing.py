@@ -0,0 +1,24 @@
+"""
+Test helpers shared by the project apps.
+"""
+
+from django.test import override_settings
+
+from .sql_budget import get_sql_budget_options
+
+
+class QueryBudgetMixin:
+    """
+    Fails any request made in the test whose view runs more queries than
+    its ``query_budget``, listing the statements it ran.
+
+    Add it to an app's base TestCase. Views without a budget are not
+    checked here; NIKONEKTI_backend.tests requires every API view to
+    declare one.
+    """
+
+    def setUp(self):
+        super().setUp()
+        override = override_settings(SQL_BUDGET={**get_sql_budget_options(), 'RAISE': True})
+        override.enable()
+        self.addCleanup(override.disable)
@@ -0,0 +1,467 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from .cache import LRUCache, TieredCache, cached, get_tiered_cache
+from .database import database_config, replica_configs
+from .metrics import MetricsRegistry, merge_snapshots, render
+from .pagination import EstimatedCountPaginator, estimate_table_rows
+from .sql_budget import (
+    QueryBudgetExceeded,
+    SQLBudgetMiddleware,
+    query_budget,
+    statement_shape,
+    view_query_budget,
+)
+from .replicas import (
+    PrimaryReplicaRouter,
+    ReplicaRoutingMiddleware,
+    copy_sqlite_database,
+    get_sticky_clients,
+    stick_to_primary,
+    use_primary,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 2)
+
+    def test_entries_expire(self):
+        clock = FakeClock()
+        cache = LRUCache(max_entries=10, ttl=5, clock=clock)
+        cache.set('a', 1)
+        clock.now = 4.9
+        self.assertEqual(cache.get('a'), 1)
+        clock.now = 5.0
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_delete(self):
+        cache = LRUCache()
+        cache.set('a', 1)
+        self.assertTrue(cache.delete('a'))
+        self.assertFalse(cache.delete('a'))
+
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-tests'},
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.clock.now = 1000.0
+        self.cache = TieredCache(early_refresh_beta=0, clock=self.clock)
+        self.cache.clear()
+
+    def test_l1_then_l2_then_compute(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 'value'
+
+        self.assertEqual(self.cache.get_or_set('ns', 'k', compute), 'value')
+        self.assertEqual(self.cache.get_or_set('ns', 'k', compute), 'value')
+        # Another process shares only L2.
+        other = TieredCache(early_refresh_beta=0, clock=self.clock)
+        self.assertEqual(other.get_or_set('ns', 'k', compute), 'value')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+        self.assertEqual(self.cache.stats()['l1_hits'], 1)
+        self.assertEqual(other.stats('ns')['l2_hits'], 1)
+
+    def test_namespace_invalidation(self):
+        self.cache.set('ns', 'a', 1)
+        self.cache.set('other', 'a', 2)
+        other = TieredCache(version_ttl=0, clock=self.clock)
+        self.assertEqual(other.get('ns', 'a'), 1)
+        self.cache.invalidate('ns')
+        self.assertIsNone(self.cache.get('ns', 'a'))
+        self.assertIsNone(other.get('ns', 'a'))
+        self.assertEqual(self.cache.get('other', 'a'), 2)
+
+    def test_namespace_versions_are_bounded(self):
+        # In-process only: evicting a version must not bring back values
+        # stored before the namespace was invalidated.
+        cache = TieredCache(l1_max_entries=2, l2_alias=None, clock=self.clock)
+        cache.set('ns', 'a', 'old')
+        cache.invalidate('ns')
+        cache.set('ns', 'a', 'new')
+        for namespace in ('b', 'c', 'd'):
+            cache.get(namespace, 'a')
+        self.assertEqual(len(cache._versions), 2)
+        self.assertIsNone(cache.get('ns', 'a'))
+
+    def test_stats_are_kept_per_namespace_family(self):
+        cache = TieredCache(l1_max_entries=2, l2_alias=None, clock=self.clock)
+        for tile in range(50):
+            cache.get_or_set(f'tiles:12/{tile}/0', 'k', lambda: 'value')
+        self.assertEqual({ns for ns, _ in cache._stats}, {'tiles'})
+        self.assertEqual(cache.stats('tiles')['misses'], 50)
+        self.assertEqual(cache.stats('tiles:12/0/0')['misses'], 50)
+
+    def test_single_flight(self):
+        cache = TieredCache(early_refresh_beta=0)
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'value'
+
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_set('ns', 'k', compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 8)
+
+    def test_timed_out_wait_keeps_the_other_lease(self):
+        cache = TieredCache(early_refresh_beta=0, lock_timeout=0.05)
+        full_key = cache._key('ns', 'k')
+        # Another process is filling the key and has not finished.
+        cache.shared.add(f'{full_key}:lease', 1, 10)
+        self.assertEqual(cache.get_or_set('ns', 'k', lambda: 'value'), 'value')
+        self.assertEqual(cache.stats()['lease_waits'], 1)
+        self.assertIsNotNone(cache.shared.get(f'{full_key}:lease'))
+
+    def test_early_refresh(self):
+        cache = TieredCache(early_refresh_beta=1.0, clock=self.clock, rand=lambda: 0.5)
+        # Computing took 10s, so refreshes start -ln(0.5) * 10 = 6.9s early.
+        cache.set('ns', 'k', 'old', ttl=60, delta=10.0)
+        self.clock.now += 50
+        self.assertEqual(cache.get_or_set('ns', 'k', lambda: 'new'), 'old')
+        self.clock.now += 4
+        self.assertEqual(cache.get_or_set('ns', 'k', lambda: 'new'), 'new')
+        self.assertEqual(cache.stats()['early_refreshes'], 1)
+
+    def test_l2_errors_are_misses(self):
+        cache = TieredCache(l2_alias='missing')
+        with self.assertLogs('NIKONEKTI_backend.cache', 'WARNING'):
+            self.assertEqual(cache.get_or_set('ns', 'k', lambda: 'value'), 'value')
+        self.assertGreater(cache.stats()['l2_errors'], 0)
+
+    def test_cached_decorator(self):
+        get_tiered_cache().clear()
+        calls = []
+
+        @cached('squares', key=lambda n: n)
+        def square(n):
+            calls.append(n)
+            return n * n
+
+        self.assertEqual(square(3), 9)
+        self.assertEqual(square(3), 9)
+        square.invalidate()
+        self.assertEqual(square(3), 9)
+        self.assertEqual(calls, [3, 3])
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        User.objects.bulk_create(
+            User(phone_number=f'+2557000000{i:02d}', full_name=f'User {i}', role='LANDLORD' if i % 2 else 'TENANT')
+            for i in range(30)
+        )
+
+    def paginator(self, queryset, limit):
+        paginator = EstimatedCountPaginator(queryset.order_by('pk'), 10)
+        paginator.count_limit = limit
+        return paginator
+
+    def test_unfiltered_uses_table_estimate(self):
+        User = get_user_model()
+        self.assertEqual(estimate_table_rows(User), User.objects.order_by('-pk').first().pk)
+        paginator = self.paginator(User.objects.all(), 5)
+        # Two catalogue lookups; no COUNT(*).
+        with self.assertNumQueries(2):
+            self.assertGreaterEqual(paginator.count, 30)
+
+    def test_filtered_count_is_exact_below_limit(self):
+        User = get_user_model()
+        self.assertEqual(self.paginator(User.objects.filter(role='LANDLORD'), 100).count, 15)
+
+    def test_filtered_count_stops_at_limit(self):
+        User = get_user_model()
+        paginator = self.paginator(User.objects.filter(role='LANDLORD'), 10)
+        self.assertEqual(paginator.count, 10)
+        self.assertEqual(paginator.num_pages, 1)
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    def test_sqlite_defaults(self):
+        config = database_config(Path('/srv'), environ={})
+        self.assertEqual(config['NAME'], Path('/srv/db.sqlite3'))
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertIn('PRAGMA journal_mode=WAL', config['OPTIONS']['init_command'])
+
+    def test_postgres_pool(self):
+        environ = {'DATABASE_ENGINE': 'postgresql', 'DATABASE_NAME': 'nyumba'}
+        self.assertEqual(database_config(Path('/srv'), environ)['CONN_MAX_AGE'], 60)
+        config = database_config(Path('/srv'), {**environ, 'DATABASE_POOL': '1', 'DATABASE_POOL_MAX_SIZE': '20'})
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool']['max_size'], 20)
+
+    def test_replicas(self):
+        environ = {'DATABASE_REPLICAS': 'replica.sqlite3, /data/replica2.sqlite3'}
+        replicas = replica_configs(Path('/srv'), environ)
+        self.assertEqual(list(replicas), ['replica', 'replica_2'])
+        self.assertEqual(replicas['replica']['NAME'], Path('/srv/replica.sqlite3'))
+        self.assertEqual(replicas['replica_2']['TEST'], {'MIRROR': 'default'})
+        self.assertEqual(replica_configs(Path('/srv'), {}), {})
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ImproperlyConfigured):
+            database_config(Path('/srv'), {'DATABASE_ENGINE': 'mysql'})
+
+
+class SQLitePragmaTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_to_connection(self):
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('cache_size'), -20000)
+        self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+
+
+@override_settings(REPLICA_ROUTING={'REPLICAS': ['replica'], 'STICKY_SECONDS': 5})
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        get_sticky_clients().clear()
+
+    def request(self, view=None, token='abc', write=False):
+        """Run a request through the middleware; returns the response and where its reads went."""
+        reads = []
+
+        def get_response(request):
+            if view is not None:
+                middleware.process_view(request, view, (), {})
+            reads.append(self.router.db_for_read(None))
+            if write:
+                self.router.db_for_write(None)
+                stick_to_primary('new-token')
+            reads.append(self.router.db_for_read(None))
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        request = self.factory.get('/', headers={'Authorization': f'Token {token}'})
+        response = middleware(request)
+        return response, reads
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        self.assertEqual(self.router.db_for_read(None), 'replica')
+        self.assertEqual(self.router.db_for_write(None), 'default')
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(None), 'default')
+        with override_settings(REPLICA_ROUTING={'REPLICAS': []}):
+            self.assertIsNone(self.router.db_for_read(None))
+            self.assertIsNone(self.router.db_for_write(None))
+
+    def test_reads_after_write_stick_to_primary(self):
+        response, reads = self.request(write=True)
+        self.assertEqual(reads, ['replica', 'default'])
+        self.assertIn('db_primary_until', response.cookies)
+        # The writer and the token it was handed stay on the primary;
+        # other clients do not.
+        self.assertEqual(self.request(token='abc')[1], ['default', 'default'])
+        self.assertEqual(self.request(token='new-token')[1], ['default', 'default'])
+        self.assertEqual(self.request(token='xyz')[1], ['replica', 'replica'])
+
+    def test_view_override(self):
+        class View:
+            read_from_primary = True
+
+        def view():
+            pass
+        view.view_class = View
+        self.assertEqual(self.request(view=view)[1], ['default', 'default'])
+
+
+class SQLiteReplicaTests(SimpleTestCase):
+    def test_replica_lags_until_synced(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            primary, replica = Path(tmp) / 'primary.sqlite3', Path(tmp) / 'replica.sqlite3'
+            with closing(sqlite3.connect(primary)) as db:
+                db.execute('CREATE TABLE t (x)')
+                db.execute('INSERT INTO t VALUES (1)')
+                db.commit()
+                copy_sqlite_database(primary, replica)
+                db.execute('INSERT INTO t VALUES (2)')
+                db.commit()
+                with closing(sqlite3.connect(replica)) as reader:
+                    self.assertEqual(reader.execute('SELECT COUNT(*) FROM t').fetchone(), (1,))
+                    copy_sqlite_database(primary, replica)
+                    self.assertEqual(reader.execute('SELECT COUNT(*) FROM t').fetchone(), (2,))
+
+
+class SQLBudgetTests(TestCase):
+    def run_view(self, view):
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = SQLBudgetMiddleware(get_response)
+        return middleware(RequestFactory().get('/listings/'))
+
+    def test_statement_shape(self):
+        self.assertEqual(
+            statement_shape('SELECT 1 FROM t WHERE id IN (%s, %s, %s) AND x = %s'),
+            'SELECT 1 FROM t WHERE id IN (...) AND x = %s',
+        )
+        self.assertEqual(
+            statement_shape('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO t (a, b) VALUES (...)',
+        )
+
+    @override_settings(DEBUG=True)
+    def test_counts_queries_and_flags_n_plus_one(self):
+        User = get_user_model()
+
+        @query_budget(10)
+        def view(request):
+            for pk in range(6):
+                User.objects.filter(pk=pk).exists()
+            User.objects.count()
+            return HttpResponse()
+
+        with self.assertLogs('NIKONEKTI_backend.sql', 'WARNING') as logs:
+            response = self.run_view(view)
+        self.assertEqual(response['X-DB-Queries'], '7')
+        self.assertEqual(response['X-DB-Duplicates'], '5')
+        record = logs.records[0].sql
+        self.assertEqual(record['budget'], 10)
+        self.assertEqual(list(record['n_plus_one'].values()), [6])
+
+    def test_headers_hidden_from_non_staff(self):
+        response = self.run_view(lambda request: HttpResponse())
+        self.assertNotIn('X-DB-Queries', response)
+        self.assertEqual(response.sql_stats.count, 0)
+
+    @override_settings(SQL_BUDGET={'RAISE': True})
+    def test_budget_exceeded(self):
+        User = get_user_model()
+
+        @query_budget(1)
+        def view(request):
+            User.objects.count()
+            User.objects.exists()
+            return HttpResponse()
+
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'ran 2 queries; its budget is 1'):
+            self.run_view(view)
+
+
+class QueryBudgetCoverageTests(SimpleTestCase):
+    def api_views(self, patterns, prefix=''):
+        for pattern in patterns:
+            route = prefix + str(pattern.pattern)
+            if isinstance(pattern, URLResolver):
+                yield from self.api_views(pattern.url_patterns, route)
+            elif isinstance(pattern, URLPattern) and route.startswith('api/'):
+                yield route, pattern.callback
+
+    def test_every_api_view_declares_a_budget(self):
+        views = list(self.api_views(get_resolver().url_patterns))
+        self.assertTrue(views)
+        for route, view in views:
+            with self.subTest(route=route):
+                self.assertIsNotNone(view_query_budget(view), f'{route} has no query_budget')
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def test_histogram_exposition(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        registry.observe('users:login', 'POST', 200, 0.05, db_seconds=0.01, db_queries=3)
+        registry.observe('users:login', 'POST', 400, 0.5)
+        registry.observe('users:login', 'POST', 200, 3.0)
+        text = render(registry.collect())
+        self.assertIn('nikonekti_http_requests_total{view="users:login",method="POST",status="200"} 2', text)
+        self.assertIn('nikonekti_http_request_duration_seconds_bucket{view="users:login",le="0.1"} 1', text)
+        self.assertIn('nikonekti_http_request_duration_seconds_bucket{view="users:login",le="1"} 2', text)
+        self.assertIn('nikonekti_http_request_duration_seconds_bucket{view="users:login",le="+Inf"} 3', text)
+        self.assertIn('nikonekti_http_request_duration_seconds_count{view="users:login"} 3', text)
+        self.assertIn('nikonekti_http_request_db_queries_total{view="users:login"} 3', text)
+
+    def test_workers_are_merged(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            registry = MetricsRegistry(buckets=(0.1,), multiprocess_dir=tmp)
+            registry.observe('users:login', 'POST', 200, 0.05)
+            other = MetricsRegistry(buckets=(0.1,))
+            other.observe('users:login', 'POST', 200, 0.2)
+            (Path(tmp) / f'{os.getpid() + 1}.json').write_text(json.dumps(other.snapshot()))
+            merged = registry.collect()
+        self.assertEqual(merged['requests'][('users:login', 'POST', 200)], 2)
+        self.assertEqual(merged['latency']['users:login'][:2], [1, 1])
+        self.assertEqual(merge_snapshots([registry.snapshot()])['requests'][('users:login', 'POST', 200)], 1)
+
+
+@override_settings(METRICS={'TOKEN': 's3cret'})
+class MetricsEndpointTests(TestCase):
+    def test_requires_token_or_staff(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer nope'}).status_code, 403)
+
+    def test_reports_requests_by_url_name(self):
+        self.client.post('/api/users/login/', {'phone_number': '0712345678', 'password': 'x'})
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('nikonekti_http_requests_total{view="users:login",method="POST",status="400"} 1', text)
+        self.assertIn('nikonekti_http_request_db_queries_total{view="users:login"}', text)
+
+    def test_labels_are_bounded(self):
+        self.client.generic('PROPFIND', '/api/users/login/')
+        self.client.generic('X' * 100, '/no/such/path/')
+        self.client.generic('BREW', '/no/such/path/')
+        text = self.client.get('/metrics', headers={'Authorization': 'Bearer s3cret'}).content.decode()
+        self.assertIn('nikonekti_http_requests_total{view="users:login",method="OTHER",status="405"} 1', text)
+        self.assertIn('nikonekti_http_requests_total{view="<unmatched>",method="OTHER",status="404"} 2', text)
+        self.assertNotIn('BREW', text)
@@ -0,0 +1,82 @@
+"""
+Benchmarks for the NIKONEKTI backend.
+
+Each module is runnable from the backend directory, e.g.::
+
+    python -m benchmarks.token_auth
+
+Benchmarks run against a throwaway test database created with Django's
+test runner machinery, so they never touch db.sqlite3.
+"""
+
+import os
+import time
+
+
+def setup_django(database_file=None, fast_hasher=False):
+    """
+    Configure Django and create a test database; returns a teardown callable.
+
+    ``database_file`` puts the SQLite test database on disk instead of in
+    memory, which multi-threaded benchmarks need to see real lock
+    behaviour. ``fast_hasher`` swaps in MD5 so a benchmark measures the
+    database path rather than PBKDF2.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'NIKONEKTI_backend.settings')
+
+    import django
+    from django.conf import settings
+    django.setup()
+
+    if database_file is not None:
+        settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = str(database_file)
+    if fast_hasher:
+        settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+    from django.test.utils import (
+        setup_databases,
+        setup_test_environment,
+        teardown_databases,
+        teardown_test_environment,
+    )
+
+    setup_test_environment(debug=False)
+    old_config = setup_databases(verbosity=0, interactive=False)
+
+    def teardown():
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+    return teardown
+
+
+def measure(fn, duration=2.0):
+    """Call ``fn`` repeatedly for ``duration`` seconds; return calls per second."""
+    calls = 0
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        fn()
+        calls += 1
+    return calls / (time.perf_counter() - started)
+
+
+def timings(fn, duration=2.0):
+    """Call ``fn`` repeatedly for ``duration`` seconds; return each call's seconds."""
+    samples = []
+    deadline = time.perf_counter() + duration
+    while True:
+        started = time.perf_counter()
+        if started >= deadline:
+            return samples
+        fn()
+        samples.append(time.perf_counter() - started)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples`` (0 < pct <= 100)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
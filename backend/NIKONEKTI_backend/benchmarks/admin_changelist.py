@@ -0,0 +1,148 @@
+"""
+UserAdmin changelist over a large synthetic users table: Django's default
+search, COUNT(*) and facet counts versus users.search, the estimated-count
+paginator and the cached filter counts.
+
+    python -m benchmarks.admin_changelist [--users N] [--repeat N]
+
+Builds an on-disk SQLite test database with --users rows (default one
+million; the load takes a few minutes) and reports the median time
+of each operation.
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        teardown = setup_django(database_file=Path(tmp) / 'bench.sqlite3', fast_hasher=True)
+        try:
+            load(args.users, args.seed)
+            run(args.repeat)
+        finally:
+            teardown()
+
+
+def load(count, seed, batch_size=20000):
+    from django.contrib.auth.hashers import make_password
+    from users.models import User
+    from users.synthetic import FIRST_NAMES, LAST_NAMES
+
+    rng = random.Random(seed)
+    roles = [choice for choice, _ in User.Role.choices]
+    statuses = [choice for choice, _ in User.KYCStatus.choices]
+    password = make_password(None)
+    phones = rng.sample(range(2 * 10**8), count)
+
+    started = time.perf_counter()
+    for start in range(0, count, batch_size):
+        User.objects.bulk_create([
+            User(
+                phone_number=f'+255{6 + phone // 10**8}{phone % 10**8:08d}',
+                full_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.randrange(10**6)}',
+                role=rng.choice(roles),
+                kyc_status=rng.choice(statuses),
+                password=password,
+            )
+            for phone in phones[start:start + batch_size]
+        ])
+    print(f'loaded {count:,} users in {time.perf_counter() - started:.0f}s\n')
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def run(repeat):
+    from django.contrib import admin
+    from django.core.paginator import Paginator
+    from django.db.models import Q
+    from django.test import Client
+    from django.urls import reverse
+
+    from NIKONEKTI_backend.cache import get_tiered_cache
+    from NIKONEKTI_backend.pagination import EstimatedCountPaginator
+    from users.activity import get_login_recorder
+    from users.models import User
+    from users.search import search_users
+
+    page = slice(0, 100)
+    users = User.objects.order_by('-pk')
+    sample = users.filter(pk=users.count() // 2).first()
+    phone_term = '0' + sample.phone_number[4:9]
+    name_term = sample.full_name.split()[1]
+
+    def legacy_search(term):
+        query = Q(phone_number__icontains=term) | Q(full_name__icontains=term)
+        return lambda: list(users.filter(query)[page])
+
+    def indexed_search(term):
+        return lambda: list(search_users(users, term)[page])
+
+    def legacy_facets():
+        for field in ('role', 'kyc_status'):
+            for value, _ in User._meta.get_field(field).flatchoices:
+                User.objects.filter(**{field: value}).count()
+        for field in ('is_verified', 'is_staff', 'is_active'):
+            for value in (True, False):
+                User.objects.filter(**{field: value}).count()
+
+    def cached_facets():
+        model_admin = admin.site._registry[User]
+        for field, filter_class in model_admin.list_filter:
+            spec = filter_class(User._meta.get_field(field), None, {}, User, model_admin, field)
+            spec.cached_counts()
+
+    rows = [
+        ('search phone prefix', legacy_search(phone_term), indexed_search(phone_term)),
+        ('search name', legacy_search(name_term), indexed_search(name_term)),
+        ('count unfiltered', lambda: Paginator(users, 100).count,
+         lambda: EstimatedCountPaginator(users, 100).count),
+        ('count filtered', lambda: Paginator(users.filter(role='AGENT'), 100).count,
+         lambda: EstimatedCountPaginator(users.filter(role='AGENT'), 100).count),
+        ('filter counts (miss)', legacy_facets,
+         lambda: (get_tiered_cache().invalidate('admin-filter-counts'), cached_facets())),
+        ('filter counts (hit)', legacy_facets, cached_facets),
+    ]
+    print(f'{"operation":<22} {"default":>12} {"optimized":>12}')
+    for label, default, optimized in rows:
+        print(
+            f'{label:<22} {timed(default, repeat) * 1000:>10.1f}ms '
+            f'{timed(optimized, repeat) * 1000:>10.1f}ms'
+        )
+
+    admin_user = User.objects.create_superuser('+255600000000', 'Bench Admin', 'bench-Passw0rd')
+    client = Client()
+    client.force_login(admin_user)
+    url = reverse('admin:users_user_changelist')
+    print()
+    for label, params in (
+        ('changelist', {}),
+        ('changelist ?q=phone', {'q': phone_term}),
+        ('changelist ?q=name', {'q': name_term}),
+    ):
+        print(f'{label:<22} {timed(lambda: client.get(url, params), repeat) * 1000:>10.1f}ms')
+    # Write the buffered last_login before the test database goes away.
+    get_login_recorder().stop()
+
+
+if __name__ == '__main__':
+    main()
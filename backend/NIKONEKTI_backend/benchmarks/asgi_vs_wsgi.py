@@ -0,0 +1,147 @@
+"""
+Login latency at high concurrency: the DRF views on a thread pool (how a
+threaded WSGI server runs them) versus users.async_views on one event loop
+(how asgi.py runs them).
+
+    python -m benchmarks.asgi_vs_wsgi [--concurrency N] [--logins N]
+
+Each login is a distinct user from a distinct client IP, so the throttles
+never fire. Runs against an on-disk SQLite test database; MD5 replaces
+PBKDF2 unless --real-hasher is given.
+"""
+
+import argparse
+import asyncio
+import itertools
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks import percentile, setup_django
+
+
+PASSWORD = 'bench-Passw0rd'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--logins', type=int, default=1000)
+    parser.add_argument('--real-hasher', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        teardown = setup_django(
+            database_file=Path(tmp) / 'bench.sqlite3',
+            fast_hasher=not args.real_hasher,
+        )
+        try:
+            run(args.concurrency, args.logins)
+        finally:
+            teardown()
+
+
+def create_users(count):
+    from django.contrib.auth.hashers import make_password
+    from users.models import User
+
+    password = make_password(PASSWORD)
+    users = User.objects.bulk_create(
+        User(phone_number=f'+2557{i:08d}', full_name='Bench User', password=password)
+        for i in range(count)
+    )
+    return [user.phone_number for user in users]
+
+
+def client_ips():
+    for a, b in itertools.product(range(256), repeat=2):
+        yield f'10.{a}.{b}.1'
+
+
+def report(label, latencies, statuses, elapsed):
+    failed = sum(1 for code in statuses if code != 200)
+    print(
+        f'{label:<5} {len(latencies) / elapsed:>8.0f} logins/s  '
+        f'p50 {percentile(latencies, 50) * 1000:7.1f} ms  '
+        f'p95 {percentile(latencies, 95) * 1000:7.1f} ms  '
+        f'p99 {percentile(latencies, 99) * 1000:7.1f} ms  '
+        f'failed {failed}'
+    )
+
+
+def run(concurrency, logins):
+    from django.db import connection
+    from django.test import AsyncRequestFactory, RequestFactory
+
+    from users.activity import get_login_recorder
+    from users.async_views import AsyncLoginAPIView
+    from users.views import LoginAPIView
+
+    phones = create_users(logins)
+    ips = client_ips()
+
+    # WSGI: one thread per in-flight request.
+    wsgi_view = LoginAPIView.as_view()
+    factory = RequestFactory()
+    requests = [
+        factory.post(
+            '/api/users/login/',
+            {'phone_number': phone, 'password': PASSWORD},
+            content_type='application/json',
+            REMOTE_ADDR=next(ips),
+        )
+        for phone in phones
+    ]
+    latencies, statuses = [], []
+
+    def login(request):
+        start = time.perf_counter()
+        try:
+            response = wsgi_view(request)
+        finally:
+            connection.close()
+        latencies.append(time.perf_counter() - start)
+        statuses.append(response.status_code)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(login, requests))
+    report('wsgi', latencies, statuses, time.perf_counter() - started)
+
+    # ASGI: every request is a task on one event loop.
+    asgi_view = AsyncLoginAPIView.as_view()
+    factory = AsyncRequestFactory()
+    requests = []
+    for phone in phones:
+        request = factory.post(
+            '/api/users/login/',
+            {'phone_number': phone, 'password': PASSWORD},
+            content_type='application/json',
+        )
+        # AsyncRequestFactory takes the client address from the ASGI scope,
+        # not from extra kwargs.
+        request.META['REMOTE_ADDR'] = next(ips)
+        requests.append(request)
+    latencies, statuses = [], []
+
+    async def alogin(request, slots):
+        async with slots:
+            start = time.perf_counter()
+            response = await asgi_view(request)
+            latencies.append(time.perf_counter() - start)
+            statuses.append(response.status_code)
+
+    async def main():
+        slots = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(alogin(request, slots) for request in requests))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    report('asgi', latencies, statuses, time.perf_counter() - started)
+    # Write buffered last_login values before the test database goes away.
+    get_login_recorder().stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Concurrent logins, signups and reads against one SQLite file: Django's
+default SQLite settings (rollback journal, deferred transactions, a new
+connection per request) versus NIKONEKTI_backend.database (WAL, busy
+timeout, BEGIN IMMEDIATE, persistent connections).
+
+    python -m benchmarks.db_concurrency [--threads N] [--requests N] [--seed N]
+
+Each worker thread behaves like a request worker: it runs
+close_old_connections() around every request, as Django's request
+signals do. A "login" reads the user and updates last_login inside one
+transaction, which is what turns into "database is locked" when two
+deferred transactions both try to upgrade to a write.
+"""
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks import percentile, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        teardown = setup_django(database_file=Path(tmp) / 'bench.sqlite3', fast_hasher=True)
+        try:
+            run(args.threads, args.requests, args.users, args.seed)
+        finally:
+            teardown()
+
+
+def run(threads, requests, users, seed):
+    from django.contrib.auth.hashers import make_password
+    from django.db import close_old_connections, connection, connections, transaction
+    from django.utils import timezone
+
+    from NIKONEKTI_backend.database import database_config
+    from users.models import User
+    from users.services import register_user
+
+    rng = random.Random(seed)
+    User.objects.bulk_create(
+        User(phone_number=f'+2556{i:08d}', full_name=f'User {i}', password=make_password(None))
+        for i in range(users)
+    )
+    tuned = database_config(Path('.'), environ={})
+    configs = (
+        ('django default', {'CONN_MAX_AGE': 0, 'OPTIONS': {'init_command': 'PRAGMA journal_mode=DELETE'}}),
+        ('tuned', {key: tuned[key] for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')}),
+    )
+    signup_numbers = iter(range(10**7, 2 * 10**7))
+
+    def login():
+        phone = f'+2556{rng.randrange(users):08d}'
+        with transaction.atomic():
+            user = User.objects.get(phone_number=phone)
+            User.objects.filter(pk=user.pk).update(last_login=timezone.now())
+
+    def signup():
+        register_user(f'+2557{next(signup_numbers):08d}', 'Bench User', 'bench-Passw0rd')
+
+    def browse():
+        list(User.objects.order_by('-pk')[:20])
+
+    workload = [login] * 2 + [signup, browse]
+    schedule = [rng.choice(workload) for _ in range(requests)]
+
+    print(f'{"settings":<16} {"req/s":>8} {"p50":>9} {"p95":>9} {"locked":>7}')
+    for label, overrides in configs:
+        # New thread connections are built from this dict.
+        connections.settings['default'].update(overrides)
+        connection.close()
+        connection.settings_dict.update(overrides)
+        connection.ensure_connection()
+
+        latencies = []
+        locked = []
+        lock = threading.Lock()
+
+        def request(operation):
+            close_old_connections()
+            start = time.perf_counter()
+            try:
+                operation()
+            except Exception as exc:
+                if 'locked' not in str(exc):
+                    raise
+                with lock:
+                    locked.append(exc)
+            finally:
+                close_old_connections()
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(request, schedule))
+        elapsed = time.perf_counter() - started
+
+        print(
+            f'{label:<16} {requests / elapsed:>8.0f} '
+            f'{percentile(latencies, 50) * 1000:>7.1f}ms '
+            f'{percentile(latencies, 95) * 1000:>7.1f}ms '
+            f'{len(locked):>7}'
+        )
+        connections.close_all()
+
+
+if __name__ == '__main__':
+    main()
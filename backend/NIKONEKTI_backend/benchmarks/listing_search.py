@@ -0,0 +1,138 @@
+"""
+Listing search latency over a large synthetic listings table: p50 and
+p95 of the first page and of pages reached by following `next` links,
+for a spread of filter combinations, text searches and map searches in
+each ordering.
+
+    python -m benchmarks.listing_search [--listings N] [--repeat N]
+
+Builds an on-disk SQLite test database with --listings rows (default one
+million; seeding takes a few minutes) through `manage.py seed_synthetic`.
+"""
+
+import argparse
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import percentile, setup_django
+
+
+FILTERS = (
+    {},
+    {'city': 'Dar es Salaam'},
+    {'city': 'Mwanza', 'minPrice': 200_000, 'maxPrice': 400_000},
+    {'type': 'Hostel'},
+    {'type': 'House', 'bedrooms': 5},
+    {'type': 'Frame', 'bedrooms': 3},
+    {'bedrooms': 4},
+    {'city': 'Arusha', 'type': 'Hostel'},
+    {'city': 'Dodoma', 'type': 'House', 'bedrooms': 5, 'maxPrice': 300_000},
+    {'city': 'Mwanza', 'bedrooms': 5, 'minPrice': 3_000_000},
+    {'type': 'Room', 'minPrice': 1_000_000},
+    {'minPrice': 5_000_000},
+    {'maxPrice': 50_000},
+    {'amenities': 'water,power'},
+    {'amenities': 'water,power', 'city': 'Arusha', 'bedrooms': 3},
+    {'amenities': 'ac,wifi,parking'},
+    {'anyAmenities': 'ac,wifi', 'type': 'House'},
+    {'term': 'hostel sinza'},
+    {'term': 'spacious masaki', 'bedrooms': 3},
+    {'term': 'jenereta', 'city': 'Dar es Salaam'},
+    {'term': 'vyumba kisasa'},
+    {'term': 'apartment'},
+    {'bbox': '39.20,-6.80,39.22,-6.78'},
+    {'bbox': '39.0,-7.0,39.5,-6.5', 'type': 'House'},
+    {'bbox': '30.0,-10.0,30.1,-9.9'},
+    {'bbox': '36.6,-3.5,36.8,-3.3', 'city': 'Dar es Salaam'},
+    {'near': '-6.7924,39.2083', 'radius': 1},
+    {'near': '-6.7924,39.2083'},
+    {'near': '-3.3869,36.683', 'radius': 2, 'maxPrice': 500_000},
+)
+
+
+def orderings(filters):
+    if 'near' in filters:
+        return ('distance', 'price')
+    if 'term' in filters:
+        return ('price', '-price', 'relevance')
+    return ('price', '-price')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--listings', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--pages', type=int, default=10, help='pages followed per search')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        teardown = setup_django(database_file=Path(tmp) / 'bench.sqlite3', fast_hasher=True)
+        try:
+            load(args)
+            run(args.pages, args.repeat)
+        finally:
+            teardown()
+
+
+def load(args):
+    from django.core.management import call_command
+
+    started = time.perf_counter()
+    # Worker processes would open the configured database, not this one.
+    call_command(
+        'seed_synthetic', users=args.users, listings=args.listings,
+        seed=args.seed, workers=0, stdout=io.StringIO(),
+    )
+    print(f'loaded {args.listings:,} listings in {time.perf_counter() - started:.0f}s\n')
+
+
+def run(pages, repeat):
+    from rest_framework.test import APIRequestFactory
+
+    from properties.views import ListingSearchAPIView
+
+    view = ListingSearchAPIView.as_view()
+    factory = APIRequestFactory()
+
+    def get(request):
+        started = time.perf_counter()
+        response = view(request)
+        response.render()
+        assert response.status_code == 200, response.status_code
+        return time.perf_counter() - started, response.data
+
+    first_pages, later_pages = [], []
+    for filters in FILTERS:
+        for ordering in orderings(filters):
+            params = {**filters, 'ordering': ordering}
+            first, later = [], []
+            for _ in range(repeat):
+                elapsed, data = get(factory.get('/api/properties/', params))
+                first.append(elapsed)
+                for _ in range(pages):
+                    if data['next'] is None:
+                        break
+                    elapsed, data = get(factory.get(data['next']))
+                    later.append(elapsed)
+            first_pages += first
+            later_pages += later
+            print(
+                f'{str(params):<92} first p95 {percentile(first, 95) * 1000:6.1f} ms'
+                f'  later p95 {percentile(later, 95) * 1000:6.1f} ms'
+            )
+
+    print()
+    for label, samples in (('first page', first_pages), ('later pages', later_pages)):
+        print(
+            f'{label:<12} p50 {percentile(samples, 50) * 1000:6.1f} ms  '
+            f'p95 {percentile(samples, 95) * 1000:6.1f} ms  '
+            f'max {max(samples, default=0) * 1000:6.1f} ms'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Credential-stuffing load test for LoginAPIView.
+
+Replays an attack of many login attempts spread over a few phone numbers
+and client IPs, once with the login throttles disabled and once with them
+enabled, and reports how many password hashes ran and how much CPU the
+process burned. With throttling the hash count is capped by the configured
+rates no matter how many attempts arrive.
+
+    python -m benchmarks.login_throttle [--attempts N] [--fast-hasher]
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks import setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--attempts', type=int, default=60)
+    parser.add_argument('--phones', type=int, default=4)
+    parser.add_argument('--ips', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--fast-hasher', action='store_true')
+    args = parser.parse_args()
+
+    teardown = setup_django(fast_hasher=args.fast_hasher)
+    try:
+        run(args)
+    finally:
+        teardown()
+
+
+def run(args):
+    from django.test import override_settings
+    from rest_framework.test import APIRequestFactory
+
+    from users.hashing import get_hashing_executor
+    from users.models import User
+    from users.throttling import reset_throttle_stores
+    from users.views import LoginAPIView
+
+    rng = random.Random(args.seed)
+    phones = [f'+25571200{i:04d}' for i in range(args.phones)]
+    for phone in phones:
+        User.objects.create_user(phone, 'Target', 'real-Passw0rd')
+    attempts = [
+        (rng.choice(phones), f'guess-{i}', f'198.51.100.{rng.randrange(args.ips)}')
+        for i in range(args.attempts)
+    ]
+
+    factory = APIRequestFactory()
+    metrics = get_hashing_executor().metrics
+
+    for label, throttle_classes in (
+        ('unthrottled', []),
+        ('throttled', LoginAPIView.throttle_classes),
+    ):
+        view = LoginAPIView.as_view(throttle_classes=throttle_classes)
+        reset_throttle_stores(sender=None, setting='THROTTLING')
+        metrics.reset()
+        statuses = {}
+
+        with override_settings(LOGIN_ACTIVITY={'FLUSH_INTERVAL': 0}):
+            cpu = time.process_time()
+            wall = time.perf_counter()
+            for phone, password, ip in attempts:
+                request = factory.post(
+                    '/api/users/login/',
+                    {'phone_number': phone, 'password': password},
+                    format='json',
+                    REMOTE_ADDR=ip,
+                )
+                status = view(request).status_code
+                statuses[status] = statuses.get(status, 0) + 1
+            cpu = time.process_time() - cpu
+            wall = time.perf_counter() - wall
+
+        print(
+            f'{label:<12} attempts {len(attempts):>5}  '
+            f'hashes {metrics.snapshot()["completed"]:>5}  '
+            f'cpu {cpu:7.2f}s  wall {wall:7.2f}s  statuses {dict(sorted(statuses.items()))}'
+        )
+
+
+if __name__ == '__main__':
+    main()
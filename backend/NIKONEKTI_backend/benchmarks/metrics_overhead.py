@@ -0,0 +1,76 @@
+"""
+Per-request cost of MetricsMiddleware: a bare view versus the same view
+wrapped in the middleware, plus MetricsRegistry.observe() on its own.
+
+    python -m benchmarks.metrics_overhead [--requests N] [--views N]
+
+No database is involved; the view returns an empty response, so the
+difference is the middleware's own overhead.
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200_000)
+    parser.add_argument('--views', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'NIKONEKTI_backend.settings')
+    import django
+    django.setup()
+    run(args.requests, args.views, args.repeat)
+
+
+def per_call_us(fn, calls, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        samples.append((time.perf_counter() - started) / calls * 1e6)
+    return statistics.median(samples)
+
+
+def run(requests, views, repeat):
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from django.urls import ResolverMatch
+
+    from NIKONEKTI_backend.metrics import MetricsMiddleware, MetricsRegistry, get_metrics_registry
+
+    response = HttpResponse()
+    factory = RequestFactory()
+    batch = []
+    for index in range(views):
+        request = factory.get(f'/bench/{index}/')
+        request.resolver_match = ResolverMatch(lambda r: response, (), {}, url_name=f'view_{index}')
+        batch.append(request)
+
+    def view(request):
+        return response
+
+    middleware = MetricsMiddleware(view)
+    bare = iter(batch * (requests // views + 1))
+    wrapped = iter(batch * (requests // views + 1) * repeat)
+    registry = MetricsRegistry(buckets=get_metrics_registry().buckets)
+
+    baseline = per_call_us(lambda: view(next(bare)), requests // repeat, repeat)
+    with_metrics = per_call_us(lambda: middleware(next(wrapped)), requests // repeat, repeat)
+    observe = per_call_us(
+        lambda: registry.observe('users:login', 'POST', 200, 0.012, 0.002, 3),
+        requests // repeat, repeat,
+    )
+    print(f'bare view              {baseline:6.2f} us/request')
+    print(f'with MetricsMiddleware {with_metrics:6.2f} us/request')
+    print(f'overhead               {with_metrics - baseline:6.2f} us/request')
+    print(f'MetricsRegistry.observe {observe:5.2f} us/call')
+
+
+if __name__ == '__main__':
+    main()
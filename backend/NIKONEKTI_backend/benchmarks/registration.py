@@ -0,0 +1,103 @@
+"""
+Registration throughput under concurrent signups: the legacy four-query
+flow (exists() pre-check, INSERT user, INSERT token, re-read token) versus
+users.services.register_user.
+
+    python -m benchmarks.registration [--threads N] [--signups N] [--seed N]
+
+Runs against an on-disk SQLite test database so writers contend for the
+lock as they do in production. MD5 replaces PBKDF2 unless --real-hasher is
+given, so the numbers reflect the database path.
+"""
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks import percentile, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--signups', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--real-hasher', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        teardown = setup_django(
+            database_file=Path(tmp) / 'bench.sqlite3',
+            fast_hasher=not args.real_hasher,
+        )
+        try:
+            run(args.threads, args.signups, args.seed)
+        finally:
+            teardown()
+
+
+def phone_numbers(count, seed):
+    rng = random.Random(seed)
+    numbers = set()
+    while len(numbers) < count:
+        numbers.add(f'+255{rng.choice("67")}{rng.randrange(10**8):08d}')
+    return sorted(numbers)
+
+
+def run(threads, signups, seed):
+    from django.db import connection
+    from rest_framework.authtoken.models import Token
+
+    from users.models import User
+    from users.services import PhoneNumberTaken, register_user
+
+    def legacy(phone):
+        if User.objects.filter(phone_number=phone).exists():
+            raise PhoneNumberTaken(phone)
+        user = User.objects.create_user(phone, 'Bench User', 'bench-Passw0rd')
+        Token.objects.create(user=user)
+        return Token.objects.get(user=user).key
+
+    def transactional(phone):
+        return register_user(phone, 'Bench User', 'bench-Passw0rd').auth_token.key
+
+    numbers = phone_numbers(signups * 2, seed)
+    for label, flow, batch in (
+        ('legacy', legacy, numbers[:signups]),
+        ('register_user', transactional, numbers[signups:]),
+    ):
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def signup(phone):
+            start = time.perf_counter()
+            try:
+                flow(phone)
+            except Exception as exc:  # duplicates, "database is locked", ...
+                with lock:
+                    errors.append(exc)
+            finally:
+                connection.close()
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(signup, batch))
+        elapsed = time.perf_counter() - started
+
+        print(
+            f'{label:<14} {len(batch) / elapsed:>8.0f} signups/s  '
+            f'p50 {percentile(latencies, 50) * 1000:6.1f} ms  '
+            f'p95 {percentile(latencies, 95) * 1000:6.1f} ms  '
+            f'errors {len(errors)}'
+        )
+
+
+if __name__ == '__main__':
+    main()
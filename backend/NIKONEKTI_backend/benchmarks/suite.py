@@ -0,0 +1,374 @@
+"""
+Performance baseline for the users API: throughput and latency
+percentiles for register, login, logout and an authenticated request
+under concurrency, plus ORM and serializer micro-benchmarks.
+
+    python -m benchmarks.suite [--only api,orm,serializers] [--threads N]
+                               [--requests N] [--url http://127.0.0.1:8000]
+                               [--output results.json] [--update-baseline]
+
+Results are printed, optionally written to --output as JSON, and compared
+with the stored baseline (benchmarks/baseline.json by default). A
+benchmark regresses when its throughput drops, or its p95 latency grows,
+by more than --tolerance; the exit status is then 1. Baselines are only
+comparable on the machine that recorded them.
+
+By default the API runs in-process through Django's test client with the
+login and register throttles lifted. With --url it is driven over HTTP
+against a running server instead; start that server with relaxed
+DEFAULT_THROTTLE_RATES, and pass --reviewer-token (a KYC reviewer's
+token) to include the authenticated request. ORM and serializer
+benchmarks always run in-process on a throwaway on-disk SQLite database.
+MD5 replaces PBKDF2 unless --real-hasher is given.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+from benchmarks import percentile, setup_django, timings
+from benchmarks.admin_changelist import load
+from benchmarks.registration import phone_numbers
+
+
+BASELINE = Path(__file__).with_name('baseline.json')
+GROUPS = ('api', 'orm', 'serializers')
+PASSWORD = 'bench-Passw0rd'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', default=','.join(GROUPS), help='comma-separated subset of: ' + ', '.join(GROUPS))
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=300, help='requests per API scenario')
+    parser.add_argument('--duration', type=float, default=1.0, help='seconds per micro-benchmark')
+    parser.add_argument('--users', type=int, default=5000, help='rows seeded for the ORM benchmarks')
+    parser.add_argument('--seed', type=int, default=None, help='phone number seed; random by default')
+    parser.add_argument('--url', help='drive the API over HTTP against this server')
+    parser.add_argument('--reviewer-token', help='token of a KYC reviewer on the --url server')
+    parser.add_argument('--real-hasher', action='store_true')
+    parser.add_argument('--output', type=Path, help='write the results to this JSON file')
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    groups = [group for group in args.only.split(',') if group]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f'unknown groups: {", ".join(sorted(unknown))}')
+    if args.seed is None:
+        args.seed = random.SystemRandom().randrange(2**32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        teardown = setup_django(
+            database_file=Path(tmp) / 'bench.sqlite3',
+            fast_hasher=not args.real_hasher,
+        )
+        try:
+            results = run(args, groups)
+        finally:
+            teardown()
+
+    report = {'meta': environment(args), 'benchmarks': results}
+    print_results(results)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + '\n')
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + '\n')
+        print(f'\nbaseline written to {args.baseline}')
+        return 0
+    if not args.baseline.exists():
+        print(f'\nno baseline at {args.baseline}; run with --update-baseline to record one')
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(results, baseline['benchmarks'], args.tolerance)
+    print(f'\ncompared with {args.baseline} ({baseline["meta"]["recorded_at"]}, '
+          f'tolerance {args.tolerance:.0%})')
+    for line in regressions:
+        print(f'  REGRESSION {line}')
+    if not regressions:
+        print('  no regressions')
+    return 1 if regressions else 0
+
+
+def environment(args):
+    import django
+
+    return {
+        'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'target': args.url or 'in-process',
+        'threads': args.threads,
+        'requests': args.requests,
+        'users': args.users,
+        'hasher': 'pbkdf2' if args.real_hasher else 'md5',
+    }
+
+
+# ======================================================
+# MEASUREMENT
+# ======================================================
+
+def summarize(latencies, elapsed=None, errors=0):
+    """
+    Throughput and latency percentiles of ``latencies`` (seconds).
+
+    ``elapsed`` is the wall time of a concurrent run; without it calls
+    were sequential and throughput follows from their total time.
+    """
+    total = elapsed if elapsed is not None else sum(latencies)
+    return {
+        'count': len(latencies),
+        'errors': errors,
+        'ops_per_sec': round(len(latencies) / total, 1) if total else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def run_load(call, items, threads, expected_status):
+    """Run ``call(item)`` for every item on ``threads`` workers; return (stats, payloads)."""
+    latencies = []
+    payloads = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(item):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            status, payload = call(item)
+        except Exception:
+            status, payload = None, None
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if status == expected_status:
+                payloads.append(payload)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, items))
+    return summarize(latencies, time.perf_counter() - started, errors), payloads
+
+
+def compare(results, baseline, tolerance):
+    """Describe each benchmark that is slower than ``baseline`` beyond ``tolerance``."""
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current['ops_per_sec'] < previous['ops_per_sec'] * (1 - tolerance):
+            regressions.append(
+                f'{name}: {current["ops_per_sec"]:.0f} ops/s, baseline {previous["ops_per_sec"]:.0f}'
+            )
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f'{name}: p95 {current["p95_ms"]:.2f} ms, baseline {previous["p95_ms"]:.2f}'
+            )
+        if current['errors'] > previous['errors']:
+            regressions.append(f'{name}: {current["errors"]} errors, baseline {previous["errors"]}')
+    return regressions
+
+
+def print_results(results):
+    print(f'{"benchmark":<34} {"ops/s":>10} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"errors":>7}')
+    for name, stats in results.items():
+        print(
+            f'{name:<34} {stats["ops_per_sec"]:>10.0f} {stats["p50_ms"]:>9.2f} '
+            f'{stats["p95_ms"]:>9.2f} {stats["p99_ms"]:>9.2f} {stats["errors"]:>7}'
+        )
+
+
+# ======================================================
+# TRANSPORTS
+# ======================================================
+
+class InProcessTransport:
+    """The full middleware and URL stack through one test client per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, method, path, data=None, token=None):
+        from django.test import Client
+
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client()
+        headers = {'Authorization': f'Token {token}'} if token else {}
+        if method == 'GET':
+            response = client.get(path, headers=headers)
+        else:
+            response = client.post(path, data or {}, content_type='application/json', headers=headers)
+        return response.status_code, response.json() if response.content else None
+
+
+class HTTPTransport:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, data=None, token=None):
+        import urllib.error
+        import urllib.request
+
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(data).encode() if data is not None else None,
+            method=method,
+            headers={'Content-Type': 'application/json', 'Accept': 'application/json'},
+        )
+        if token:
+            request.add_header('Authorization', f'Token {token}')
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, json.loads(response.read() or 'null')
+        except urllib.error.HTTPError as exc:
+            return exc.code, None
+
+
+# ======================================================
+# BENCHMARKS
+# ======================================================
+
+def run(args, groups):
+    results = {}
+    if 'orm' in groups or 'serializers' in groups or ('api' in groups and not args.url):
+        # Background rows so lookups and the KYC queue are not trivially small.
+        load(args.users, args.seed)
+    if 'api' in groups:
+        results.update(api_benchmarks(args))
+    if 'orm' in groups:
+        results.update(orm_benchmarks(args.duration))
+    if 'serializers' in groups:
+        results.update(serializer_benchmarks(args.duration))
+    # Write buffered last_login updates while the database still exists.
+    from users.activity import get_login_recorder
+    get_login_recorder().flush()
+    return results
+
+
+def api_benchmarks(args):
+    from django.urls import reverse
+    from rest_framework.authtoken.models import Token
+
+    from users import urls
+    from users.models import User
+
+    if args.url:
+        transport = HTTPTransport(args.url)
+        reviewer_token = args.reviewer_token
+        throttles = []
+    else:
+        transport = InProcessTransport()
+        reviewer = User.objects.create_superuser('+255700000000', 'Bench Reviewer', PASSWORD)
+        reviewer_token = Token.objects.get_or_create(user=reviewer)[0].key
+        # The benchmark is one client hammering a handful of endpoints.
+        throttles = [
+            mock.patch.object(view, 'throttle_classes', [])
+            for view in (urls.LoginView, urls.RegisterView)
+        ]
+
+    phones = phone_numbers(args.requests, args.seed)
+    results = {}
+    for patch in throttles:
+        patch.start()
+    try:
+        results['api.register'], _ = run_load(
+            lambda phone: transport.request('POST', reverse('users:register'), {
+                'phone_number': phone,
+                'full_name': 'Bench User',
+                'password': PASSWORD,
+                'password2': PASSWORD,
+            }),
+            phones, args.threads, expected_status=201,
+        )
+        results['api.login'], payloads = run_load(
+            lambda phone: transport.request('POST', reverse('users:login'), {
+                'phone_number': phone,
+                'password': PASSWORD,
+            }),
+            phones, args.threads, expected_status=200,
+        )
+        if reviewer_token:
+            results['api.authenticated.kyc_queue'], _ = run_load(
+                lambda _: transport.request('GET', reverse('users:kyc-queue'), token=reviewer_token),
+                range(args.requests), args.threads, expected_status=200,
+            )
+        results['api.logout'], _ = run_load(
+            lambda payload: transport.request('POST', reverse('users:logout'), token=payload['token']),
+            payloads, args.threads, expected_status=200,
+        )
+    finally:
+        for patch in throttles:
+            patch.stop()
+    return results
+
+
+def orm_benchmarks(duration):
+    from rest_framework.authtoken.models import Token
+
+    from users.kyc import review_queue
+    from users.models import User
+
+    user = User.objects.order_by('?').first()
+    token, _ = Token.objects.get_or_create(user=user)
+    benchmarks = {
+        'orm.users.get_by_phone': lambda: User.objects.get(phone_number=user.phone_number),
+        'orm.users.exists_by_phone': lambda: User.objects.filter(phone_number=user.phone_number).exists(),
+        'orm.users.count_by_role_and_kyc': lambda: User.objects.filter(
+            role=User.Role.TENANT, kyc_status=User.KYCStatus.APPROVED,
+        ).count(),
+        'orm.users.kyc_queue_page': lambda: list(review_queue(User.KYCStatus.PENDING)[:20]),
+        'orm.users.token_lookup': lambda: Token.objects.select_related('user').get(key=token.key),
+    }
+    return {name: summarize(timings(fn, duration)) for name, fn in benchmarks.items()}
+
+
+def serializer_benchmarks(duration):
+    from users.kyc import review_queue
+    from users.models import User
+    from users.serializers import KYCQueueSerializer, LoginSerializer, RegisterSerializer
+
+    user = User.objects.create_user('+255799999999', 'Bench Login', PASSWORD)
+    login = {'phone_number': user.phone_number, 'password': PASSWORD}
+    register = {
+        'phone_number': '0799999998',
+        'full_name': 'Bench Register',
+        'password': PASSWORD,
+        'password2': PASSWORD,
+    }
+    page = list(review_queue(User.KYCStatus.PENDING)[:20])
+
+    def validate(serializer):
+        assert serializer.is_valid(), serializer.errors
+
+    benchmarks = {
+        # authenticate(), the password check and the token lookup.
+        'serializer.login.validate': lambda: validate(LoginSerializer(data=login, context={'request': None})),
+        # Field validation and the password validators; no INSERT.
+        'serializer.register.validate': lambda: validate(RegisterSerializer(data=register)),
+        'serializer.kyc_queue.page': lambda: KYCQueueSerializer(page, many=True).data,
+    }
+    return {name: summarize(timings(fn, duration)) for name, fn in benchmarks.items()}
+
+
+if __name__ == '__main__':
+    sys.exit(main())
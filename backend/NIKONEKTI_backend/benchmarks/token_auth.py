@@ -0,0 +1,74 @@
+"""
+Requests/sec of an authenticated DRF endpoint with the stock
+TokenAuthentication versus CachedTokenAuthentication.
+
+    python -m benchmarks.token_auth [--duration SECONDS]
+"""
+
+import argparse
+
+from benchmarks import measure, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=2.0)
+    args = parser.parse_args()
+
+    teardown = setup_django()
+    try:
+        run(args.duration)
+    finally:
+        teardown()
+
+
+def run(duration):
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from rest_framework.response import Response
+    from rest_framework.test import APIRequestFactory
+    from rest_framework.views import APIView
+
+    from users.authentication import CachedTokenAuthentication, get_token_cache
+    from users.models import User
+
+    user = User.objects.create_user(
+        phone_number='+255712000001',
+        full_name='Bench User',
+        password='bench-Passw0rd',
+    )
+    token = Token.objects.create(user=user)
+    factory = APIRequestFactory()
+
+    def make_view(authentication_class):
+        class WhoAmI(APIView):
+            authentication_classes = [authentication_class]
+
+            def get(self, request):
+                return Response({'id': request.user.pk})
+
+        return WhoAmI.as_view()
+
+    results = {}
+    for label, auth_class in (
+        ('TokenAuthentication', TokenAuthentication),
+        ('CachedTokenAuthentication', CachedTokenAuthentication),
+    ):
+        get_token_cache().clear()
+        view = make_view(auth_class)
+
+        def call():
+            request = factory.get('/whoami/', HTTP_AUTHORIZATION=f'Token {token.key}')
+            response = view(request)
+            assert response.status_code == 200, response.status_code
+
+        call()
+        results[label] = measure(call, duration)
+
+    baseline = results['TokenAuthentication']
+    for label, rate in results.items():
+        print(f'{label:<28} {rate:>10.0f} req/s  ({rate / baseline:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
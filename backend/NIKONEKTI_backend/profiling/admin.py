@@ -0,0 +1,47 @@
+from django.contrib import admin
+from django.http import HttpResponse
+from django.utils.translation import gettext_lazy as _
+
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """
+    Recent request profiles. "Download collapsed stacks" merges the
+    selected profiles into one file for flamegraph.pl or speedscope.
+    """
+    list_display = ('created_at', 'method', 'path', 'view_name', 'status_code', 'duration_ms', 'samples', 'trigger', 'user')
+    list_filter = ('trigger', 'view_name')
+    list_select_related = ('user',)
+    search_fields = ('path',)
+    date_hierarchy = 'created_at'
+    raw_id_fields = ('user',)
+    actions = ['download_collapsed_stacks']
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            # The stacks can run to megabytes; the list doesn't show them.
+            queryset = queryset.defer('collapsed_stacks')
+        return queryset
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description=_('Download collapsed stacks'), permissions=['view'])
+    def download_collapsed_stacks(self, request, queryset):
+        stacks = {}
+        for profile in queryset.only('collapsed_stacks'):
+            for line in profile.collapsed_stacks.splitlines():
+                stack, _, count = line.rpartition(' ')
+                stacks[stack] = stacks.get(stack, 0) + int(count)
+        response = HttpResponse(
+            ''.join(f'{stack} {count}\n' for stack, count in stacks.items()),
+            content_type='text/plain; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'attachment; filename="profiles.collapsed"'
+        return response
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from profiling.middleware import get_profiling_options, make_profile_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Print an X-Profile header value. Requests sent with it are "
+        "profiled and listed under Profiling > Request profiles in the admin."
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'X-Profile: {make_profile_token()}')
+        self.stderr.write(f"Valid for {get_profiling_options()['TOKEN_MAX_AGE']} seconds.")
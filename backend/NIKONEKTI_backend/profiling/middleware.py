@@ -0,0 +1,155 @@
+"""
+Profiles requests that carry a valid ``X-Profile`` header (see
+``manage.py profile_token``) or are drawn by PROFILING['SAMPLE_RATES'],
+and stores their collapsed stacks as RequestProfile rows.
+
+Requests that are neither pay one header lookup and, when sample rates
+are configured, one random() call.
+"""
+
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.urls import Resolver404, resolve
+from django.utils.functional import SimpleLazyObject, empty
+
+from NIKONEKTI_backend.metrics import method_label
+
+from .models import RequestProfile
+from .sampler import StackSampler
+
+
+DEFAULT_PROFILING = {
+    # URL name -> fraction of its requests to profile, e.g. {'users:login': 0.01}.
+    'SAMPLE_RATES': {},
+    # Seconds between stack samples.
+    'INTERVAL': 0.005,
+    # Seconds a token from `manage.py profile_token` stays valid.
+    'TOKEN_MAX_AGE': 3600,
+    # Newest profiles kept; older ones are deleted as new ones arrive.
+    'MAX_PROFILES': 500,
+}
+
+HEADER = 'HTTP_X_PROFILE'
+SALT = 'profiling.header'
+
+
+def get_profiling_options():
+    return {
+        **DEFAULT_PROFILING,
+        **getattr(settings, 'PROFILING', {}),
+    }
+
+
+def make_profile_token():
+    """Value for the X-Profile header; valid for TOKEN_MAX_AGE seconds."""
+    return signing.TimestampSigner(salt=SALT).sign('profile')
+
+
+def valid_profile_token(value):
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            value, max_age=get_profiling_options()['TOKEN_MAX_AGE'],
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(self.get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        options = get_profiling_options()
+        self.sample_rates = dict(options['SAMPLE_RATES'])
+        self.max_rate = max(self.sample_rates.values(), default=0)
+        self.interval = options['INTERVAL']
+        self.max_profiles = options['MAX_PROFILES']
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        trigger = self._trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        sampler = StackSampler(threading.get_ident(), self.interval).start()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            sampler.stop()
+        RequestProfile.objects.create(**self._profile(request, response, trigger, sampler, elapsed))
+        self._prune()
+        return response
+
+    async def __acall__(self, request):
+        trigger = self._trigger(request)
+        if trigger is None:
+            return await self.get_response(request)
+
+        sampler = StackSampler(threading.get_ident(), self.interval, follow_sync_to_async=True).start()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            sampler.stop()
+        await RequestProfile.objects.acreate(**self._profile(request, response, trigger, sampler, elapsed))
+        await self._aprune()
+        return response
+
+    def _trigger(self, request):
+        header = request.META.get(HEADER)
+        if header is not None and valid_profile_token(header):
+            return RequestProfile.Trigger.HEADER
+        if self.max_rate and random.random() < self.max_rate:
+            try:
+                view_name = resolve(request.path_info).view_name
+            except Resolver404:
+                return None
+            # Drawn against the highest rate; rescale to this URL's own.
+            if random.random() * self.max_rate < self.sample_rates.get(view_name, 0):
+                return RequestProfile.Trigger.SAMPLE
+        return None
+
+    def _profile(self, request, response, trigger, sampler, elapsed):
+        match = request.resolver_match
+        user = getattr(request, 'user', None)
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            # Not loaded by the view; don't query the session for it here.
+            user = None
+        return {
+            # Made-up methods can be longer than the column; store them as OTHER.
+            'method': method_label(request.method),
+            'path': request.path[:255],
+            'view_name': match.view_name if match is not None else '',
+            'status_code': response.status_code,
+            'duration_ms': elapsed * 1000,
+            'samples': sampler.samples,
+            'trigger': trigger,
+            'user_id': user.pk if getattr(user, 'is_authenticated', False) else None,
+            'collapsed_stacks': sampler.collapsed(),
+        }
+
+    def _stale(self):
+        return RequestProfile.objects.filter(
+            pk__in=RequestProfile.objects.order_by('-created_at', '-pk')
+            .values('pk')[self.max_profiles:self.max_profiles + 100]
+        )
+
+    def _prune(self):
+        self._stale().delete()
+
+    async def _aprune(self):
+        await self._stale().adelete()
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class RequestProfile(models.Model):
+    """
+    Sampled call stacks of one request, in collapsed-stack format: one
+    ``frame;frame;frame count`` line per distinct stack, as read by
+    flamegraph.pl, speedscope and most flamegraph viewers.
+    """
+
+    class Trigger(models.TextChoices):
+        HEADER = 'HEADER', _('Signed header')
+        SAMPLE = 'SAMPLE', _('Sample rate')
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    view_name = models.CharField(max_length=200, blank=True, db_index=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    samples = models.PositiveIntegerField()
+    trigger = models.CharField(max_length=10, choices=Trigger.choices)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    collapsed_stacks = models.TextField()
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _('request profile')
+        verbose_name_plural = _('request profiles')
+
+    def __str__(self):
+        return f'{self.method} {self.path} ({self.duration_ms:.0f} ms)'
@@ -0,0 +1,99 @@
+"""
+A statistical profiler: a background thread that snapshots the stacks of
+the threads serving a request every ``interval`` seconds.
+"""
+
+import os
+import sys
+import sysconfig
+import threading
+from collections import Counter
+
+
+_PREFIXES = sorted(
+    {os.path.join(path, '') for path in (
+        sysconfig.get_paths()['purelib'],
+        sysconfig.get_paths()['stdlib'],
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )},
+    key=len,
+    reverse=True,
+)
+
+_labels = {}
+
+
+def frame_label(code):
+    """``function (path:line)`` with site-packages, stdlib and project prefixes cut."""
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        for prefix in _PREFIXES:
+            if filename.startswith(prefix):
+                filename = filename[len(prefix):]
+                break
+        # ';' separates frames and ' ' the count in collapsed stacks.
+        label = f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ':').replace(' ', '_')
+        _labels[code] = label
+    return label
+
+
+def collapse(frame):
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def _is_sync_to_async_worker(frame):
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == 'thread_handler' and 'asgiref' in code.co_filename:
+            return True
+        frame = frame.f_back
+    return False
+
+
+class StackSampler:
+    """
+    Samples ``thread_id`` and, with ``follow_sync_to_async``, any thread
+    currently running sync_to_async work. Under ASGI that is where sync
+    views and ORM calls run; concurrent requests on the same worker can
+    appear in the profile.
+    """
+
+    def __init__(self, thread_id, interval=0.005, follow_sync_to_async=False):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.follow_sync_to_async = follow_sync_to_async
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            self.samples += 1
+            for thread_id, frame in frames.items():
+                if thread_id == own:
+                    continue
+                if thread_id == self.thread_id or (
+                    self.follow_sync_to_async and _is_sync_to_async_worker(frame)
+                ):
+                    self.stacks[collapse(frame)] += 1
+
+    def collapsed(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common())
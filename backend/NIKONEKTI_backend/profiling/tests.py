@@ -0,0 +1,98 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .middleware import make_profile_token
+from .models import RequestProfile
+from .sampler import StackSampler
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class StackSamplerTests(SimpleTestCase):
+    def test_samples_only_the_target_thread(self):
+        other = threading.Thread(target=spin, args=(0.1,))
+        other.start()
+        sampler = StackSampler(threading.get_ident(), interval=0.002).start()
+        spin(0.1)
+        stacks = sampler.stop()
+        other.join()
+        self.assertGreater(sampler.samples, 2)
+        self.assertTrue(all('test_samples_only_the_target_thread' in stack for stack in stacks))
+        self.assertIn(';spin_(profiling/tests.py:13) ', sampler.collapsed())
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def login(self, **headers):
+        return self.client.post(reverse('users:login'), {'phone_number': '0712345678'}, headers=headers)
+
+    def test_signed_header(self):
+        self.login()
+        self.login(**{'X-Profile': 'forged'})
+        self.assertFalse(RequestProfile.objects.exists())
+
+        response = self.login(**{'X-Profile': make_profile_token()})
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.trigger, RequestProfile.Trigger.HEADER)
+        self.assertEqual(profile.view_name, 'users:login')
+        self.assertEqual(profile.status_code, response.status_code)
+        self.assertEqual(profile.method, 'POST')
+
+    def test_unknown_method(self):
+        self.client.generic('X' * 20, reverse('users:login'), headers={'X-Profile': make_profile_token()})
+        self.assertEqual(RequestProfile.objects.get().method, 'OTHER')
+
+    @override_settings(PROFILING={'TOKEN_MAX_AGE': 0})
+    def test_expired_header(self):
+        token = make_profile_token()
+        time.sleep(1)
+        self.login(**{'X-Profile': token})
+        self.assertFalse(RequestProfile.objects.exists())
+
+    async def test_asgi(self):
+        await self.async_client.post(
+            reverse('users:login'), {'phone_number': '0712345678'},
+            headers={'X-Profile': make_profile_token()},
+        )
+        profile = await RequestProfile.objects.aget()
+        self.assertEqual(profile.view_name, 'users:login')
+
+
+@override_settings(PROFILING={'SAMPLE_RATES': {'users:login': 1.0}, 'MAX_PROFILES': 2})
+class SampledProfilingTests(TestCase):
+    def test_sample_rate_and_pruning(self):
+        for _ in range(3):
+            self.client.post(reverse('users:login'), {})
+        self.client.post(reverse('users:register'), {})
+        self.assertEqual(
+            list(RequestProfile.objects.values_list('trigger', 'view_name')),
+            [(RequestProfile.Trigger.SAMPLE, 'users:login')] * 2,
+        )
+
+
+@override_settings(LOGIN_ACTIVITY={'FLUSH_INTERVAL': 0})
+class RequestProfileAdminTests(TestCase):
+    def test_download_merges_stacks(self):
+        profiles = [
+            RequestProfile.objects.create(
+                method='GET', path='/', status_code=200, duration_ms=1, samples=3,
+                trigger=RequestProfile.Trigger.HEADER, collapsed_stacks=stacks,
+            )
+            for stacks in ('a;b 2\na;c 1', 'a;b 3')
+        ]
+        admin_user = get_user_model().objects.create_superuser('+255700000001', 'Admin', 's3cure-Passw0rd')
+        self.client.force_login(admin_user)
+        url = reverse('admin:profiling_requestprofile_changelist')
+        self.assertContains(self.client.get(url), 'GET')
+        response = self.client.post(url, {
+            'action': 'download_collapsed_stacks',
+            '_selected_action': [profile.pk for profile in profiles],
+        })
+        self.assertEqual(sorted(response.content.decode().splitlines()), ['a;b 5', 'a;c 1'])
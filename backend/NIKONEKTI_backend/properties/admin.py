@@ -1,3 +1,18 @@
 from django.contrib import admin
 
-# Register your models here.
+from NIKONEKTI_backend.pagination import EstimatedCountPaginator
+
+from .models import Listing
+
+
+@admin.register(Listing)
+class ListingAdmin(admin.ModelAdmin):
+    list_display = ('title', 'city', 'type', 'price', 'period', 'status', 'verified', 'landlord')
+    list_filter = ('status', 'city', 'type', 'verified')
+    list_select_related = ('landlord',)
+    raw_id_fields = ('landlord',)
+    readonly_fields = ('created_at', 'updated_at')
+    # A million listings: no exact COUNT(*) on the unfiltered list.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
@@ -0,0 +1,137 @@
+"""
+Listing amenities, stored as bits of one integer column.
+
+The API and the ORM speak amenity ids ('water', 'power', ... as in the
+frontend's constants.ts); the database holds a bitmask with one bit per
+amenity (BITS). A filter on amenities is then a bitwise AND on a column
+the listing row already has, checked while walking whichever listing
+index the rest of the search picked, with no join or JSON parsing:
+
+    Listing.objects.filter(amenities__has_all=['water', 'power'])
+    Listing.objects.filter(amenities__has_any=['ac', 'wifi'])
+
+To add an amenity, add it to Amenity and give it the next unused bit.
+Never reuse or renumber a bit: stored masks would change meaning.
+"""
+
+from django import forms
+from django.core import exceptions
+from django.db import models
+from django.db.models import Lookup
+from django.utils.translation import gettext_lazy as _
+
+
+class Amenity(models.TextChoices):
+    WATER = 'water', _('Reliable water')
+    POWER = 'power', _('LUKU meter')
+    SECURITY = 'security', _('Fenced/security')
+    AC = 'ac', _('Air conditioning')
+    PARKING = 'parking', _('Parking')
+    WIFI = 'wifi', _('WiFi')
+
+
+# Amenity id: bit number in the mask.
+BITS = {
+    Amenity.WATER: 0,
+    Amenity.POWER: 1,
+    Amenity.SECURITY: 2,
+    Amenity.AC: 3,
+    Amenity.PARKING: 4,
+    Amenity.WIFI: 5,
+}
+
+
+def encode(amenities):
+    """The bitmask of an iterable of amenity ids; ValueError on unknown ids."""
+    mask = 0
+    for amenity in amenities:
+        try:
+            mask |= 1 << BITS[amenity]
+        except KeyError:
+            raise ValueError(f'Unknown amenity {amenity!r}.') from None
+    return mask
+
+
+def decode(mask):
+    """The amenity ids in a bitmask, in registry order."""
+    return [amenity.value for amenity, bit in BITS.items() if mask >> bit & 1]
+
+
+class AmenitiesField(models.Field):
+    """
+    A list of amenity ids in Python, their bitmask in the database.
+
+    Values come back in registry order without duplicates, so two lists
+    naming the same amenities compare equal once loaded.
+    """
+    description = _('Amenities (bitmask)')
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', list)
+        super().__init__(*args, **kwargs)
+
+    def get_internal_type(self):
+        return 'PositiveIntegerField'
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else decode(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, list):
+            return value
+        if isinstance(value, int):
+            return decode(value)
+        if isinstance(value, str):
+            value = [amenity for amenity in value.split(',') if amenity]
+        try:
+            return decode(encode(value))
+        except (TypeError, ValueError) as e:
+            raise exceptions.ValidationError(str(e), code='invalid') from None
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None or isinstance(value, int):
+            return value
+        return encode(value)
+
+    def validate(self, value, model_instance):
+        super().validate(value, model_instance)
+        try:
+            encode(value or ())
+        except ValueError as e:
+            raise exceptions.ValidationError(str(e), code='invalid') from None
+
+    def value_to_string(self, obj):
+        return ','.join(self.value_from_object(obj) or ())
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{
+            'form_class': forms.TypedMultipleChoiceField,
+            'choices': Amenity.choices,
+            'widget': forms.CheckboxSelectMultiple,
+            **kwargs,
+        })
+
+
+class HasAll(Lookup):
+    """``amenities__has_all``: listings with every one of the amenities."""
+    lookup_name = 'has_all'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'({lhs} & {rhs}) = {rhs}', [*lhs_params, *rhs_params, *rhs_params]
+
+
+class HasAny(Lookup):
+    """``amenities__has_any``: listings with at least one of the amenities."""
+    lookup_name = 'has_any'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'({lhs} & {rhs}) != 0', [*lhs_params, *rhs_params]
+
+
+AmenitiesField.register_lookup(HasAll)
+AmenitiesField.register_lookup(HasAny)
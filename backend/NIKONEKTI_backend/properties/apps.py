@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class PropertiesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'properties'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from . import signals  # noqa: F401
+        from .search import install_listing_search
+
+        # The full-text index is a virtual table outside the migration
+        # graph; it is created (and filled, the first time) after migrate.
+        post_migrate.connect(install_listing_search, sender=self)
@@ -0,0 +1,184 @@
+"""
+Map marker clusters: listings aggregated on a grid per map tile.
+
+The map asks for a viewport at a zoom level and gets back clusters with
+a count, centroid and price range instead of every listing. Clusters are
+computed per Web Mercator tile (the 256 px tiles Leaflet draws) on a
+CELLS x CELLS grid, so a cluster covers at most 32 px of screen.
+
+Each tile's clusters are cached in the tiered cache, keyed by the tile
+and a hash of the search filters, under the namespace of the tile or,
+past FOLD_ZOOM, of its ancestor at FOLD_ZOOM. A saved or deleted listing
+invalidates only the tiles holding it, and those it moved from, at zoom
+levels up to FOLD_ZOOM (invalidate_tiles), once the change commits.
+invalidate_all_tiles() drops every tile after bulk changes.
+"""
+
+import hashlib
+import json
+import math
+
+from django.db.models import Avg, Count, F, FloatField, Max, Min
+from django.db.models.functions import Floor, Ln, Radians, Tan
+
+from NIKONEKTI_backend.cache import get_tiered_cache
+
+from .search import Box, search_listings
+
+
+# Grid cells per tile side: 32 px cells on 256 px tiles.
+CELLS = 8
+MAX_ZOOM = 18
+# Finer tiles share the namespace of their ancestor at this zoom, about
+# 10 km across: a save drops them all, and costs 13 invalidations rather
+# than 19.
+FOLD_ZOOM = 12
+# More tiles than a large desktop screen shows at once.
+MAX_TILES = 64
+CACHE_NAMESPACE = 'listing-tiles'
+# Invalidation is precise; the TTL only bounds changes made behind the
+# ORM's back (queryset.update(), raw SQL).
+CACHE_TTL = 3600
+
+
+# ======================================================
+# TILES
+# ======================================================
+
+def mercator_y(lat):
+    """Web Mercator y of a latitude, in radians: 0 at the equator."""
+    return math.asinh(math.tan(math.radians(lat)))
+
+
+def tile_xy(lat, lng, zoom):
+    """The (x, y) of the tile holding a point at ``zoom``."""
+    n = 2 ** zoom
+    x = int((lng + 180) / 360 * n)
+    y = int((1 - mercator_y(max(min(lat, 85.0511), -85.0511)) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_box(zoom, x, y):
+    n = 2 ** zoom
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return Box(west=x / n * 360 - 180, south=lat(y + 1), east=(x + 1) / n * 360 - 180, north=lat(y))
+
+
+def tile_namespace(zoom, x, y):
+    """The cache namespace of a tile: its own, or its ancestor's past FOLD_ZOOM."""
+    shift = max(zoom - FOLD_ZOOM, 0)
+    return f'{CACHE_NAMESPACE}:{zoom - shift}/{x >> shift}/{y >> shift}'
+
+
+def tiles_covering(box, zoom):
+    """The (x, y) of every tile a viewport overlaps at ``zoom``."""
+    west, north = tile_xy(box.north, box.west, zoom)
+    east, south = tile_xy(box.south, box.east, zoom)
+    return [(x, y) for x in range(west, east + 1) for y in range(north, south + 1)]
+
+
+# ======================================================
+# CLUSTERS
+# ======================================================
+
+def filters_key(filters):
+    """A short, stable hash of the search filters (ListingClusterSerializer)."""
+    return hashlib.sha256(json.dumps(filters, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def compute_tile_clusters(zoom, x, y, filters):
+    box = tile_box(zoom, x, y)
+    top, bottom = mercator_y(box.north), mercator_y(box.south)
+    # Grid cell of each listing; the row in Mercator y, as on screen.
+    column = Floor((F('longitude') - box.west) * (CELLS / (box.east - box.west)))
+    row = Floor(
+        (top - Ln(Tan(Radians('latitude') / 2 + math.pi / 4), output_field=FloatField()))
+        * (CELLS / (top - bottom))
+    )
+    listings = search_listings(**filters, box=box, ranked=False, paged=False)
+    # search_listings() takes every edge of the box; a listing on an edge
+    # shared with the tile east or south belongs to that tile, as in
+    # tile_xy(), and would otherwise land in an extra cell here too.
+    n = 2 ** zoom
+    if x < n - 1:
+        listings = listings.filter(longitude__lt=box.east)
+    if y < n - 1:
+        listings = listings.filter(latitude__gt=box.south)
+    cells = (
+        listings
+        .order_by()
+        .annotate(column=column, row=row)
+        .values('column', 'row')
+        .annotate(
+            count=Count('id'),
+            lat=Avg('latitude'),
+            lng=Avg('longitude'),
+            min_price=Min('price'),
+            max_price=Max('price'),
+            listing=Min('id'),
+        )
+    )
+    return [
+        {
+            'lat': round(cell['lat'], 6),
+            'lng': round(cell['lng'], 6),
+            'count': cell['count'],
+            'minPrice': cell['min_price'],
+            'maxPrice': cell['max_price'],
+            # A cluster of one is a listing the map can link to.
+            'listingId': cell['listing'] if cell['count'] == 1 else None,
+        }
+        for cell in cells
+    ]
+
+
+def tile_clusters(zoom, x, y, filters):
+    cache = get_tiered_cache()
+    return cache.get_or_set(
+        tile_namespace(zoom, x, y),
+        # The global namespace's version lets invalidate_all_tiles() drop
+        # every tile at once.
+        f'{cache.version(CACHE_NAMESPACE)}:{zoom}/{x}/{y}:{filters_key(filters)}',
+        lambda: compute_tile_clusters(zoom, x, y, filters),
+        CACHE_TTL,
+    )
+
+
+def clusters(box, zoom, filters):
+    """
+    Clusters of the listings matching ``filters`` on every tile the
+    viewport overlaps; clusters of a tile reaching past the viewport
+    are included.
+    """
+    return [
+        cluster
+        for x, y in tiles_covering(box, zoom)
+        for cluster in tile_clusters(zoom, x, y, filters)
+    ]
+
+
+# ======================================================
+# INVALIDATION
+# ======================================================
+
+def invalidate_tiles(positions):
+    """
+    Drop the cached clusters of every tile, at every zoom level, holding
+    one of ``positions`` ((lat, lng) pairs; None coordinates are skipped).
+    """
+    cache = get_tiered_cache()
+    namespaces = {
+        tile_namespace(zoom, *tile_xy(lat, lng, zoom))
+        for lat, lng in positions
+        if lat is not None and lng is not None
+        for zoom in range(FOLD_ZOOM + 1)
+    }
+    for namespace in namespaces:
+        cache.invalidate(namespace)
+
+
+def invalidate_all_tiles():
+    get_tiered_cache().invalidate(CACHE_NAMESPACE)
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from properties.clusters import invalidate_all_tiles
+from properties.search import get_geo_index, get_listing_search
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the listing full-text and spatial search indexes from "
+        "the listings table and drop the cached map clusters. Saves and "
+        "deletes keep them up to date; run this after bulk changes that "
+        "bypass model signals (queryset.update(), raw SQL, restores)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Database to reindex.")
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help="Listings read per batch for the full-text index (default 2,000).",
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        text, geo = get_listing_search(using), get_geo_index(using)
+        self.rebuild(text, using, chunk_size=options['chunk_size'])
+        self.rebuild(geo, using)
+        invalidate_all_tiles()
+
+    def rebuild(self, index, using, **kwargs):
+        started = time.perf_counter()
+        # Filled once below, not also by install() if it creates the index.
+        index.install(connections[using], rebuild=False)
+        count = index.rebuild(using, **kwargs)
+        self.stdout.write(
+            f'Indexed {count:,} listings with {type(index).__name__} '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
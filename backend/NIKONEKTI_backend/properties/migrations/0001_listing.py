@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Listing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200, verbose_name='title')),
+                ('location', models.CharField(help_text='Neighbourhood and district, e.g. "Masaki, Kinondoni"', max_length=200, verbose_name='location')),
+                ('city', models.CharField(choices=[('Dar es Salaam', 'Dar es Salaam'), ('Dodoma', 'Dodoma'), ('Arusha', 'Arusha'), ('Mwanza', 'Mwanza')], max_length=20, verbose_name='city')),
+                ('price', models.PositiveIntegerField(help_text='Rent in TZS per period', verbose_name='price')),
+                ('period', models.CharField(choices=[('month', 'Month'), ('6 months', '6 months'), ('year', 'Year')], default='month', max_length=10, verbose_name='period')),
+                ('bedrooms', models.PositiveSmallIntegerField(verbose_name='bedrooms')),
+                ('bathrooms', models.PositiveSmallIntegerField(verbose_name='bathrooms')),
+                ('type', models.CharField(choices=[('Apartment', 'Apartment'), ('House', 'House'), ('Room', 'Room'), ('Hostel', 'Hostel'), ('Frame', 'Frame')], max_length=10, verbose_name='type')),
+                ('status', models.CharField(choices=[('ACTIVE', 'Active'), ('DRAFT', 'Draft'), ('RENTED', 'Rented')], default='ACTIVE', max_length=10, verbose_name='status')),
+                ('description_en', models.TextField(blank=True, verbose_name='description (English)')),
+                ('description_sw', models.TextField(blank=True, verbose_name='description (Swahili)')),
+                ('images', models.JSONField(blank=True, default=list, verbose_name='images')),
+                ('amenities', models.JSONField(blank=True, default=list, verbose_name='amenities')),
+                ('verified', models.BooleanField(default=False, verbose_name='verified')),
+                ('latitude', models.FloatField(blank=True, null=True, verbose_name='latitude')),
+                ('longitude', models.FloatField(blank=True, null=True, verbose_name='longitude')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('landlord', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'listing',
+                'verbose_name_plural': 'listings',
+                'db_table': 'listings',
+                'ordering': ['price', 'id'],
+                'indexes': [models.Index(fields=['status', 'city', 'price', 'id'], name='listings_city_price_idx'), models.Index(fields=['status', 'type', 'bedrooms', 'price', 'id'], name='listings_type_beds_idx'), models.Index(fields=['status', 'type', 'price', 'id'], name='listings_type_price_idx'), models.Index(fields=['status', 'bedrooms', 'price', 'id'], name='listings_beds_price_idx'), models.Index(fields=['status', 'price', 'id'], name='listings_price_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0001_listing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingDocument',
+            fields=[
+                ('listing', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='properties.listing')),
+                ('document', models.TextField(db_column='listings_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'listings_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+import properties.amenities
+
+
+# Bits as of this migration; properties.amenities.BITS only ever grows.
+BITS = {'water': 0, 'power': 1, 'security': 2, 'ac': 3, 'parking': 4, 'wifi': 5}
+
+# Listings updated per statement, within SQLite's parameter limit.
+CHUNK_SIZE = 900
+
+
+def update_grouped(Listing, groups, field):
+    for value, pks in groups.items():
+        for start in range(0, len(pks), CHUNK_SIZE):
+            Listing.objects.filter(pk__in=pks[start:start + CHUNK_SIZE]).update(**{field: value})
+
+
+def encode_amenities(apps, schema_editor):
+    # Listings grouped by mask: one UPDATE per chunk of listings sharing
+    # one, rather than one per listing. Ids no amenity has are dropped.
+    Listing = apps.get_model('properties', 'Listing')
+    groups = defaultdict(list)
+    for pk, amenities in Listing.objects.values_list('pk', 'amenities').iterator(chunk_size=10000):
+        mask = 0
+        for amenity in amenities or ():
+            if amenity in BITS:
+                mask |= 1 << BITS[amenity]
+        if mask:
+            groups[mask].append(pk)
+    update_grouped(Listing, groups, 'amenity_bits')
+
+
+def decode_amenities(apps, schema_editor):
+    Listing = apps.get_model('properties', 'Listing')
+    groups = defaultdict(list)
+    for pk, amenities in Listing.objects.values_list('pk', 'amenity_bits').iterator(chunk_size=10000):
+        if amenities:
+            groups[tuple(amenities)].append(pk)
+    update_grouped(Listing, groups, 'amenities')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0002_listingdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='amenity_bits',
+            field=properties.amenities.AmenitiesField(blank=True, default=list, verbose_name='amenities'),
+        ),
+        migrations.RunPython(encode_amenities, decode_amenities),
+        migrations.RemoveField(
+            model_name='listing',
+            name='amenities',
+        ),
+        migrations.RenameField(
+            model_name='listing',
+            old_name='amenity_bits',
+            new_name='amenities',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0003_amenities_bitmask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='external_id',
+            field=models.CharField(blank=True, editable=False, help_text='Key of a listing generated or imported from elsewhere, e.g. "synthetic:1:0000000042"', max_length=64, null=True, unique=True, verbose_name='external id'),
+        ),
+    ]
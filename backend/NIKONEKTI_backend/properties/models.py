@@ -1,3 +1,168 @@
+# ============================================================================
+# SECTION 1: IMPORTS
+# ============================================================================
+
+from django.conf import settings
 from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .amenities import AmenitiesField
+
+
+# ============================================================================
+# SECTION 2: LISTING
+# ============================================================================
+# Purpose: A property offered for rent, as shown by the frontend's
+# search, map and details pages
+
+class Listing(models.Model):
+    """
+    A rental listing owned by a landlord or agent.
+
+    EXPLANATION:
+    Choice values are the strings the frontend already uses (types.ts),
+    so the API passes them through unchanged.
+    """
+
+    class City(models.TextChoices):
+        DAR_ES_SALAAM = 'Dar es Salaam', _('Dar es Salaam')
+        DODOMA = 'Dodoma', _('Dodoma')
+        ARUSHA = 'Arusha', _('Arusha')
+        MWANZA = 'Mwanza', _('Mwanza')
+
+    class Period(models.TextChoices):
+        MONTH = 'month', _('Month')
+        SIX_MONTHS = '6 months', _('6 months')
+        YEAR = 'year', _('Year')
+
+    class Type(models.TextChoices):
+        APARTMENT = 'Apartment', _('Apartment')
+        HOUSE = 'House', _('House')
+        ROOM = 'Room', _('Room')
+        HOSTEL = 'Hostel', _('Hostel')
+        FRAME = 'Frame', _('Frame')
+
+    class Status(models.TextChoices):
+        """
+        - ACTIVE: Shown in search
+        - DRAFT: Being prepared by the landlord
+        - RENTED: Kept for the landlord's records, hidden from search
+        """
+        ACTIVE = 'ACTIVE', _('Active')
+        DRAFT = 'DRAFT', _('Draft')
+        RENTED = 'RENTED', _('Rented')
+
+    landlord = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='listings',
+    )
+    title = models.CharField(_('title'), max_length=200)
+    location = models.CharField(
+        _('location'),
+        max_length=200,
+        help_text=_('Neighbourhood and district, e.g. "Masaki, Kinondoni"'),
+    )
+    city = models.CharField(_('city'), max_length=20, choices=City.choices)
+    price = models.PositiveIntegerField(_('price'), help_text=_('Rent in TZS per period'))
+    period = models.CharField(_('period'), max_length=10, choices=Period.choices, default=Period.MONTH)
+    bedrooms = models.PositiveSmallIntegerField(_('bedrooms'))
+    bathrooms = models.PositiveSmallIntegerField(_('bathrooms'))
+    type = models.CharField(_('type'), max_length=10, choices=Type.choices)
+    status = models.CharField(_('status'), max_length=10, choices=Status.choices, default=Status.ACTIVE)
+    description_en = models.TextField(_('description (English)'), blank=True)
+    description_sw = models.TextField(_('description (Swahili)'), blank=True)
+    images = models.JSONField(_('images'), default=list, blank=True)
+    # Ids of properties.amenities.Amenity, stored as a bitmask.
+    amenities = AmenitiesField(_('amenities'), blank=True)
+    verified = models.BooleanField(_('verified'), default=False)
+    latitude = models.FloatField(_('latitude'), null=True, blank=True)
+    longitude = models.FloatField(_('longitude'), null=True, blank=True)
+    external_id = models.CharField(
+        _('external id'),
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_('Key of a listing generated or imported from elsewhere, e.g. "synthetic:1:0000000042"'),
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'listings'
+        ordering = ['price', 'id']
+        verbose_name = _('listing')
+        verbose_name_plural = _('listings')
+        indexes = [
+            models.Index(fields=['status', 'city', 'price', 'id'], name='listings_city_price_idx'),
+            models.Index(fields=['status', 'type', 'bedrooms', 'price', 'id'], name='listings_type_beds_idx'),
+            models.Index(fields=['status', 'type', 'price', 'id'], name='listings_type_price_idx'),
+            models.Index(fields=['status', 'bedrooms', 'price', 'id'], name='listings_beds_price_idx'),
+            models.Index(fields=['status', 'price', 'id'], name='listings_price_idx'),
+        ]
+        """
+        DATABASE INDEXES: One per shape of search (properties.search).
+
+        Every search filters on status and returns pages in (price, id)
+        order, so each index ends with price, id: once the columns before
+        them are pinned by equality filters, a page is a range scan that
+        stops after page_size rows, however many listings match.
+
+        - listings_city_price_idx: city
+        - listings_type_beds_idx: type and bedrooms
+        - listings_type_price_idx: type alone. Without it a search for a
+          rare type (hostels are cheap and few) walks the price index past
+          every dearer listing before it fills a page.
+        - listings_beds_price_idx: bedrooms alone, for the same reason
+        - listings_price_idx: only a price range, or nothing
+
+        A search combining city with type or bedrooms uses one of these
+        and checks the other filter row by row; no city is a small enough
+        share of listings for that to cost more than a few pages' worth.
+        """
+
+    def __str__(self):
+        return f"{self.title} ({self.city})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        listing = super().from_db(db, field_names, values)
+        # Where the listing was on the map when loaded, so a save that
+        # moves it can invalidate the map tiles it left (signals.py).
+        listing._loaded_position = (listing.__dict__.get('latitude'), listing.__dict__.get('longitude'))
+        return listing
+
+
+# ============================================================================
+# SECTION 3: LISTING SEARCH DOCUMENT
+# ============================================================================
+# Purpose: Lets the ORM join listings to their full-text index row
+
+class ListingDocument(models.Model):
+    """
+    A listing's row in the SQLite full-text index, read-only.
+
+    EXPLANATION:
+    listings_fts is an FTS5 table created and filled by
+    properties.search.SQLiteFTS5ListingSearch, not by migrations; this
+    unmanaged model only lets a listing search join to it on rowid, match
+    against it and order by its BM25 rank. Other databases have no such
+    table and never query it.
+    """
+    listing = models.OneToOneField(
+        Listing,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name='search_document',
+    )
+    # FTS5's hidden column named after the table: "listings_fts MATCH ..."
+    document = models.TextField(db_column='listings_fts')
+    rank = models.FloatField()
 
-# Create your models here.
+    class Meta:
+        managed = False
+        db_table = 'listings_fts'
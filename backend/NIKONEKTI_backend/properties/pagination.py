@@ -0,0 +1,125 @@
+import base64
+import binascii
+import math
+
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ListingCursorPagination(BasePagination):
+    """
+    Keyset pagination over listings in (price, id) order.
+
+    DRF's CursorPagination keys pages on the first ordering field alone
+    and OFFSETs past rows that share it; many listings share a price, so
+    the cursor here holds both price and id. Every page, however deep, is
+    an index range scan of page_size + 1 rows.
+
+    ?ordering=-price pages from the most expensive listing down.
+    ?ordering=relevance pages through a text search (a queryset annotated
+    with ``rank``, see properties.search) in (rank, id) order, and
+    ?ordering=distance through a radius search (annotated with
+    ``distance``) nearest first. Each is the default for its search.
+    """
+    # ordering: (key, descending)
+    orderings = {
+        'price': ('price', False),
+        '-price': ('price', True),
+        'relevance': ('rank', False),
+        'distance': ('distance', False),
+    }
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        annotations = queryset.query.annotations
+        orderings = [name for name, (key, _) in self.orderings.items() if key == 'price' or key in annotations]
+        default = next((name for name in ('distance', 'relevance') if name in orderings), 'price')
+        ordering = request.query_params.get(self.ordering_query_param) or default
+        if ordering not in orderings:
+            raise ValidationError({self.ordering_query_param: [f"Must be one of: {', '.join(orderings)}."]})
+        self.key, self.descending = self.orderings[ordering]
+
+        cursor = self.decode_cursor(request)
+        self.has_cursor = cursor is not None
+        self.forward = cursor is None or cursor[0]
+        # Walking towards higher (key, id)?
+        upward = self.forward != self.descending
+        order = (self.key, 'id') if upward else (f'-{self.key}', '-id')
+        if cursor is not None:
+            _, value, pk = cursor
+            if upward:
+                queryset = queryset.filter(**{f'{self.key}__gte': value}).exclude(**{self.key: value, 'id__lte': pk})
+            else:
+                queryset = queryset.filter(**{f'{self.key}__lte': value}).exclude(**{self.key: value, 'id__gte': pk})
+
+        rows = list(queryset.order_by(*order)[:self.page_size + 1])
+        self.has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if not self.forward:
+            rows.reverse()
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.page or (self.forward and not self.has_more):
+            return None
+        return self.link(True, self.page[-1])
+
+    def get_previous_link(self):
+        if not self.page or (self.forward and not self.has_cursor) or (not self.forward and not self.has_more):
+            return None
+        return self.link(False, self.page[0])
+
+    # ------------------------------------------------------------------
+    # Cursors
+    # ------------------------------------------------------------------
+
+    def link(self, forward, listing):
+        value = getattr(listing, self.key)
+        token = f"{'n' if forward else 'p'}{value!r}.{listing.pk}"
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, base64.urlsafe_b64encode(token.encode()).decode(),
+        )
+
+    def decode_cursor(self, request):
+        """(forward, key value, id) from the request's cursor, or None."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            token = base64.urlsafe_b64decode(encoded.encode()).decode()
+            direction, rest = token[0], token[1:]
+            # A rank or distance is a float whose repr may hold a '.' too.
+            value, _, pk = rest.rpartition('.')
+            value = int(value) if self.key == 'price' else float(value)
+            pk = int(pk)
+            if direction not in 'np' or not math.isfinite(value):
+                raise ValueError(direction)
+        except (binascii.Error, UnicodeDecodeError, IndexError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return direction == 'n', value, pk
+
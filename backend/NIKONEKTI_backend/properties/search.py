@@ -0,0 +1,628 @@
+import logging
+import math
+import re
+from dataclasses import dataclass
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import BooleanField, ExpressionWrapper, F, FloatField, Lookup, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Sqrt
+from django.utils.module_loading import import_string
+
+from .models import Listing, ListingDocument
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_LISTING_SEARCH = {
+    # Dotted path of the ListingTextSearch to use, or None to pick one by
+    # database vendor from TEXT_SEARCH_BACKENDS.
+    'TEXT_BACKEND': None,
+    # Likewise for the ListingGeoIndex, from GEO_INDEX_BACKENDS.
+    'GEO_BACKEND': None,
+}
+
+TEXT_SEARCH_BACKENDS = {
+    'sqlite': 'properties.search.SQLiteFTS5ListingSearch',
+    'postgresql': 'properties.search.PostgresListingSearch',
+}
+
+GEO_INDEX_BACKENDS = {
+    'sqlite': 'properties.search.SQLiteRTreeGeoIndex',
+    'postgresql': 'properties.search.PostgresGeoIndex',
+}
+
+
+def get_search_options():
+    return {
+        **DEFAULT_LISTING_SEARCH,
+        **getattr(settings, 'LISTING_SEARCH', {}),
+    }
+
+
+# ======================================================
+# SWAHILI TEXT
+# ======================================================
+
+# Noun-class plural prefixes and the singular prefix each replaces.
+SWAHILI_PLURALS = (
+    ('vy', 'ch'),   # vyumba -> chumba
+    ('vi', 'ki'),   # vitanda -> kitanda
+    ('wa', 'm'),    # wapangaji -> mpangaji
+    ('mi', 'm'),    # mifereji -> mfereji
+    ('ma', ''),     # magari -> gari
+)
+
+APOSTROPHES = str.maketrans({'’': "'", '‘': "'", 'ʼ': "'", '`': "'"})
+
+
+def words(text):
+    """
+    The words of ``text``. Apostrophes inside a word are kept, as in
+    Swahili's ng'ombe and ng'ambo, whichever apostrophe was typed.
+    """
+    return [
+        word.strip("'")
+        for word in re.findall(r"[\w']+", text.translate(APOSTROPHES))
+        if word.strip("'")
+    ]
+
+
+def swahili_stem(word):
+    """
+    ``word`` reduced to its singular, unlocated form: "vyumba" and
+    "chumbani" both become "chumba".
+
+    A heuristic, not a morphological analyser: it strips the locative
+    suffix -ni and swaps a plural noun-class prefix for its singular, but
+    never leaves fewer than three letters, so short words stay as typed.
+    Both the word and its stem are searchable, so a wrong stem costs a
+    little precision, never a match.
+    """
+    word = word.lower()
+    if len(word) >= 6 and word.endswith('ni'):
+        word = word[:-2]
+    for plural, singular in SWAHILI_PLURALS:
+        if word.startswith(plural) and len(word) - len(plural) >= 3:
+            return singular + word[len(plural):]
+    return word
+
+
+# ======================================================
+# TEXT SEARCH BACKENDS
+# ======================================================
+
+class ListingTextSearch:
+    """
+    Full-text search over a listing's title, location and English and
+    Swahili descriptions.
+
+    ``install()`` creates whatever the backend needs and runs after every
+    migrate, so it must be idempotent; it fills an index it had to create
+    unless passed ``rebuild=False``. ``index()`` and ``remove()`` keep
+    the index in step as listings are saved and deleted
+    (properties.signals); ``rebuild()`` refills it from the listings table.
+
+    ``filter()`` returns the listings matching every word of ``term``;
+    ``rank()`` returns them annotated with ``rank``, lower being more
+    relevant. Ranking scores every match, so a search ordered by
+    something else should only filter.
+    """
+
+    def install(self, connection, rebuild=True):
+        pass
+
+    def index(self, listings, using='default'):
+        pass
+
+    def remove(self, pks, using='default'):
+        pass
+
+    def rebuild(self, using='default', chunk_size=2000):
+        """Reindex every listing; returns how many were indexed."""
+        return 0
+
+    def filter(self, queryset, term):
+        raise NotImplementedError
+
+    def rank(self, queryset, term):
+        return self.filter(queryset, term).annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+class ContainsListingSearch(ListingTextSearch):
+    """Unindexed, unranked '%word%' matching; the fallback for other databases."""
+
+    def filter(self, queryset, term):
+        for word in words(term):
+            queryset = queryset.filter(
+                Q(title__icontains=word)
+                | Q(location__icontains=word)
+                | Q(city__icontains=word)
+                | Q(description_en__icontains=word)
+                | Q(description_sw__icontains=word)
+            )
+        return queryset
+
+
+class Match(Lookup):
+    """``document__match``: an FTS5 full-text query."""
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+ListingDocument._meta.get_field('document').register_lookup(Match)
+
+
+class SQLiteFTS5ListingSearch(ListingTextSearch):
+    """
+    Word-prefix search over an FTS5 index, ranked by BM25.
+
+    "kisasa vyumba" matches a listing when each word typed starts a word
+    of its title, location (with city) or either description. A word in
+    the title weighs most, then location, then the descriptions; see
+    ``weights``.
+
+    The index stores its own copy of the text rather than reading the
+    listings table (external content) because the Swahili description is
+    indexed with the stem of each word alongside the word itself
+    (swahili_stem), which the listings table does not hold. The query
+    side stems too, restricted to the Swahili column, so "chumba" finds
+    "vyumba" and "vyumba" finds "chumba" without English text being
+    stemmed by Swahili rules.
+
+    The unicode61 tokenizer folds case and diacritics and keeps
+    apostrophes inside words; prefix indexes of 2 and 3 characters keep
+    short prefixes from scanning the whole vocabulary.
+    """
+    table = 'listings_fts'
+    columns = ('title', 'location', 'description_en', 'description_sw')
+    # bm25() weight per column, in the order of ``columns``.
+    weights = (10.0, 5.0, 1.0, 1.0)
+
+    def install(self, connection, rebuild=True):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [self.table],
+            )
+            created = cursor.fetchone() is None
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                f"{', '.join(self.columns)}, "
+                f"tokenize=\"unicode61 remove_diacritics 2 tokenchars ''''\", prefix='2 3')"
+            )
+            # The rank column orders by this; it is stored with the index.
+            cursor.execute(
+                f"INSERT INTO {self.table}({self.table}, rank) VALUES ('rank', %s)",
+                [f"bm25({', '.join(map(str, self.weights))})"],
+            )
+        if created and rebuild:
+            self.rebuild(connection.alias)
+
+    @staticmethod
+    def document(listing):
+        """The indexed text of ``listing``, one string per column."""
+        swahili = listing.description_sw
+        surface = {word.lower() for word in words(swahili)}
+        stems = {swahili_stem(word) for word in surface} - surface
+        if stems:
+            swahili = f"{swahili} {' '.join(sorted(stems))}"
+        return (
+            listing.title,
+            f'{listing.location} {listing.city}',
+            listing.description_en,
+            swahili,
+        )
+
+    def index(self, listings, using='default'):
+        rows = [(listing.pk, *self.document(listing)) for listing in listings]
+        with connections[using].cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [row[:1] for row in rows])
+            self._insert(cursor, rows)
+
+    def _insert(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {self.table}(rowid, {', '.join(self.columns)}) "
+            f"VALUES (%s{', %s' * len(self.columns)})",
+            rows,
+        )
+
+    def remove(self, pks, using='default'):
+        with connections[using].cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(pk,) for pk in pks])
+
+    def rebuild(self, using='default', chunk_size=2000):
+        listings = Listing.objects.using(using).only(
+            'title', 'location', 'city', 'description_en', 'description_sw',
+        ).order_by('pk').iterator(chunk_size=chunk_size)
+        count = 0
+        with transaction.atomic(using), connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            while chunk := list(islice(listings, chunk_size)):
+                self._insert(cursor, [(listing.pk, *self.document(listing)) for listing in chunk])
+                count += len(chunk)
+            # Merge the many small segments a bulk load leaves behind.
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('optimize')")
+        return count
+
+    @staticmethod
+    def match_expression(term):
+        terms = []
+        for word in words(term):
+            stem = swahili_stem(word)
+            if stem == word.lower():
+                terms.append(f'"{word}"*')
+            else:
+                terms.append(f'("{word}"* OR description_sw : "{stem}"*)')
+        return ' AND '.join(terms)
+
+    def filter(self, queryset, term):
+        match = self.match_expression(term)
+        if not match:
+            return queryset.none()
+        # A subquery, not a join: joined, SQLite walks a price index and
+        # re-runs the full-text query for each listing until a page fills.
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match],
+        ))
+
+    def rank(self, queryset, term):
+        match = self.match_expression(term)
+        if not match:
+            return queryset.none()
+        # Ordered by rank, SQLite drives the join from the index's matches.
+        return queryset.filter(search_document__document__match=match).annotate(
+            rank=F('search_document__rank'),
+        )
+
+
+class PostgresListingSearch(ListingTextSearch):
+    """
+    Word-prefix search over a weighted tsvector, ranked by ts_rank_cd.
+
+    The vector is an expression over the listing's own columns with a GIN
+    index on it, so there is nothing to maintain on save or delete. It
+    uses the 'simple' configuration: Postgres has no Swahili stemmer, and
+    the English one would mangle Swahili words. Swahili plurals are
+    stemmed on the query side only, so "vyumba" finds "chumba" but not
+    the other way round.
+    """
+    index_name = 'listings_document_gin'
+    vector = (
+        "setweight(to_tsvector('simple', title), 'A') || "
+        "setweight(to_tsvector('simple', location || ' ' || city), 'B') || "
+        "setweight(to_tsvector('simple', description_en || ' ' || description_sw), 'C')"
+    )
+
+    def install(self, connection, rebuild=True):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.index_name} ON listings USING gin (({self.vector}))'
+            )
+
+    @staticmethod
+    def tsquery(term):
+        # to_tsquery syntax: every word, as a prefix, or its Swahili stem.
+        terms = []
+        for word in words(term):
+            for part in word.split("'"):
+                if not part:
+                    # A doubled or trailing apostrophe: (:*) is invalid.
+                    continue
+                alternatives = {f'{part.lower()}:*', f'{swahili_stem(part)}:*'}
+                terms.append(f"({' | '.join(sorted(alternatives))})")
+        return ' & '.join(terms)
+
+    def filter(self, queryset, term):
+        query = self.tsquery(term)
+        if not query:
+            return queryset.none()
+        return queryset.filter(
+            RawSQL(f"{self.vector} @@ to_tsquery('simple', %s)", [query], output_field=BooleanField()),
+        )
+
+    def rank(self, queryset, term):
+        return self.filter(queryset, term).annotate(rank=RawSQL(
+            f"-ts_rank_cd({self.vector}, to_tsquery('simple', %s))", [self.tsquery(term)],
+            output_field=FloatField(),
+        ))
+
+
+def get_listing_search(using='default'):
+    path = get_search_options()['TEXT_BACKEND']
+    if path is None:
+        vendor = connections[using].vendor
+        path = TEXT_SEARCH_BACKENDS.get(vendor, 'properties.search.ContainsListingSearch')
+    return import_string(path)()
+
+
+# ======================================================
+# GEO SEARCH BACKENDS
+# ======================================================
+
+# Kilometres per degree of latitude (and of longitude at the equator).
+KM_PER_DEGREE = 111.195
+
+
+@dataclass(frozen=True)
+class Box:
+    """A map viewport, in degrees."""
+    west: float
+    south: float
+    east: float
+    north: float
+
+
+@dataclass(frozen=True)
+class Circle:
+    """Everything within ``radius`` km of (lat, lng)."""
+    lat: float
+    lng: float
+    radius: float
+
+    def box(self):
+        """The smallest Box holding the circle."""
+        dlat = self.radius / KM_PER_DEGREE
+        dlng = dlat / max(math.cos(math.radians(self.lat)), 0.01)
+        return Box(self.lng - dlng, self.lat - dlat, self.lng + dlng, self.lat + dlat)
+
+    def distance(self):
+        """
+        Kilometres from the centre to a listing, as an expression.
+
+        An equirectangular approximation: plain arithmetic every database
+        evaluates quickly, and within a fraction of a percent of the great
+        circle distance at radii of tens of kilometres.
+        """
+        dlat = F('latitude') - self.lat
+        dlng = (F('longitude') - self.lng) * math.cos(math.radians(self.lat))
+        return ExpressionWrapper(Sqrt(dlat * dlat + dlng * dlng) * KM_PER_DEGREE, output_field=FloatField())
+
+
+class ListingGeoIndex:
+    """
+    Viewport and radius queries over listing coordinates.
+
+    Both take a queryset that is *not* yet restricted to active listings
+    and return only active ones, so a backend whose index holds nothing
+    else can leave out the status filter. ``near()`` annotates listings
+    with ``distance`` in km. ``within(paged=False)`` is for queries that
+    read every listing in the box, such as aggregates, rather than a page.
+
+    This base class filters the latitude and longitude columns directly;
+    it is the fallback for other databases. ``install()`` runs after
+    every migrate and must be idempotent; it fills an index it had to
+    create or repair unless passed ``rebuild=False``.
+    """
+
+    def install(self, connection, rebuild=True):
+        pass
+
+    def rebuild(self, using='default'):
+        """Reindex every listing; returns how many were indexed."""
+        return 0
+
+    def within(self, queryset, box, paged=True):
+        return queryset.filter(
+            status=Listing.Status.ACTIVE,
+            latitude__gte=box.south,
+            latitude__lte=box.north,
+            longitude__gte=box.west,
+            longitude__lte=box.east,
+        )
+
+    def near(self, queryset, circle):
+        return self.within(queryset, circle.box()).annotate(
+            distance=circle.distance(),
+        ).filter(distance__lte=circle.radius)
+
+
+class SQLiteRTreeGeoIndex(ListingGeoIndex):
+    """
+    An R*Tree of the coordinates of active listings.
+
+    listings_rtree holds a point (a zero-size box) per active listing
+    with coordinates; triggers keep it in step with the listings table,
+    whether rows change through the ORM, bulk_create or update().
+
+    A viewport holding few listings is searched from the R*Tree, which
+    finds them without touching the rest. The status filter is left out
+    on purpose: every indexed listing is active, and an equality on
+    status, which leads every listings index, is all it takes for
+    SQLite's planner to walk an index of every active listing instead.
+    A viewport holding many listings (more than ``sparse_limit``) is
+    searched the other way round: walking the listings in price order and
+    checking their coordinates fills a page within a few hundred rows,
+    where starting from the R*Tree would sort every listing in view. One
+    R*Tree query capped at sparse_limit + 1 rows tells the two apart.
+
+    Radius searches and unpaged queries always start from the R*Tree:
+    they read every listing in the area anyway.
+
+    R*Tree coordinates are 32-bit floats rounded outwards, so the index
+    is queried for overlap with the box and the exact columns checked.
+    """
+    table = 'listings_rtree'
+    sparse_limit = 2000
+    indexed = "new.status = 'ACTIVE' AND new.latitude IS NOT NULL AND new.longitude IS NOT NULL"
+
+    def install(self, connection, rebuild=True):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [self.table],
+            )
+            created = cursor.fetchone() is None
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+                f'USING rtree(id, min_lat, max_lat, min_lng, max_lng)'
+            )
+            # Django rebuilds a table to alter it on SQLite, which drops its
+            # triggers; recreating them here after each migrate repairs that.
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                [f'{self.table}_%'],
+            )
+            missing_triggers = cursor.fetchone()[0] < 3
+            insert = (
+                f'INSERT INTO {self.table} '
+                f'SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude WHERE {self.indexed}'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {self.table}_ai AFTER INSERT ON listings BEGIN {insert}; END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {self.table}_ad AFTER DELETE ON listings BEGIN '
+                f'DELETE FROM {self.table} WHERE id = old.id; END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {self.table}_au '
+                f'AFTER UPDATE OF status, latitude, longitude ON listings BEGIN '
+                f'DELETE FROM {self.table} WHERE id = old.id; {insert}; END'
+            )
+        if rebuild and (created or missing_triggers):
+            self.rebuild(connection.alias)
+
+    def rebuild(self, using='default'):
+        with transaction.atomic(using), connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} '
+                f'SELECT id, latitude, latitude, longitude, longitude FROM listings '
+                f"WHERE {self.indexed.replace('new.', '')}"
+            )
+            return cursor.rowcount
+
+    def _overlapping(self, box):
+        return (
+            f'SELECT id FROM {self.table} '
+            f'WHERE max_lat >= %s AND min_lat <= %s AND max_lng >= %s AND min_lng <= %s',
+            [box.south, box.north, box.west, box.east],
+        )
+
+    def within(self, queryset, box, paged=True):
+        if paged and self._dense(queryset.db, box):
+            return super().within(queryset, box)
+        return self._indexed(queryset, box)
+
+    def _dense(self, using, box):
+        sql, params = self._overlapping(box)
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM ({sql} LIMIT %s)', [*params, self.sparse_limit + 1])
+            return cursor.fetchone()[0] > self.sparse_limit
+
+    def _indexed(self, queryset, box):
+        # Active listings only, without saying so; see the class docstring.
+        return queryset.filter(
+            pk__in=RawSQL(*self._overlapping(box)),
+            latitude__gte=box.south,
+            latitude__lte=box.north,
+            longitude__gte=box.west,
+            longitude__lte=box.east,
+        )
+
+    def near(self, queryset, circle):
+        return self._indexed(queryset, circle.box()).annotate(
+            distance=circle.distance(),
+        ).filter(distance__lte=circle.radius)
+
+
+class PostgresGeoIndex(ListingGeoIndex):
+    """
+    Latitude and longitude filters served by a GiST index on the points
+    of active listings, which Postgres combines with the other filters.
+    """
+    index_name = 'listings_point_gist'
+    point = 'point(longitude, latitude)'
+
+    def install(self, connection, rebuild=True):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.index_name} ON listings USING gist (({self.point})) '
+                f"WHERE status = 'ACTIVE'"
+            )
+
+    def within(self, queryset, box, paged=True):
+        return queryset.filter(
+            RawSQL(
+                f'{self.point} <@ box(point(%s, %s), point(%s, %s))',
+                [box.west, box.south, box.east, box.north],
+                output_field=BooleanField(),
+            ),
+            status=Listing.Status.ACTIVE,
+        )
+
+
+def get_geo_index(using='default'):
+    path = get_search_options()['GEO_BACKEND']
+    if path is None:
+        vendor = connections[using].vendor
+        path = GEO_INDEX_BACKENDS.get(vendor, 'properties.search.ListingGeoIndex')
+    return import_string(path)()
+
+
+def install_listing_search(using='default', **kwargs):
+    """post_migrate hook: create or repair the listing search indexes."""
+    for index in (get_listing_search(using), get_geo_index(using)):
+        try:
+            index.install(connections[using])
+        except Exception:
+            logger.exception('Could not install %s on %r', type(index).__name__, using)
+
+
+# ======================================================
+# LISTING SEARCH
+# ======================================================
+
+def search_listings(
+    term=None, city=None, type=None, bedrooms=None, min_price=None, max_price=None,
+    amenities=None, any_amenities=None, box=None, near=None, ranked=True, paged=True,
+):
+    """
+    Active listings matching every given filter and, if ``term`` is
+    given, every word of it; ``ranked`` annotates those with ``rank``.
+    ``amenities`` keeps those with all of a list of amenity ids,
+    ``any_amenities`` those with at least one.
+    ``box`` keeps those inside a map viewport, ``near`` those within a
+    Circle, annotated with ``distance``. Pass ``paged=False`` when every
+    result will be read, not a page of them.
+
+    Every combination of structured filters is served by one of the
+    composite indexes on Listing, which hand back pages in (price, id)
+    order without sorting; see Listing.Meta.indexes and
+    ListingCursorPagination. Ranked text searches and searches of a
+    sparse area start from the full-text or spatial index instead and
+    sort what they find.
+    """
+    queryset = Listing.objects.all()
+    if city is not None:
+        queryset = queryset.filter(city=city)
+    if type is not None:
+        queryset = queryset.filter(type=type)
+    if bedrooms is not None:
+        queryset = queryset.filter(bedrooms=bedrooms)
+    if min_price is not None:
+        queryset = queryset.filter(price__gte=min_price)
+    if max_price is not None:
+        queryset = queryset.filter(price__lte=max_price)
+    if amenities:
+        queryset = queryset.filter(amenities__has_all=amenities)
+    if any_amenities:
+        queryset = queryset.filter(amenities__has_any=any_amenities)
+    if near is not None:
+        queryset = get_geo_index(queryset.db).near(queryset, near)
+    elif box is not None:
+        queryset = get_geo_index(queryset.db).within(queryset, box, paged)
+    else:
+        queryset = queryset.filter(status=Listing.Status.ACTIVE)
+    if term:
+        search = get_listing_search(queryset.db)
+        queryset = search.rank(queryset, term) if ranked else search.filter(queryset, term)
+    return queryset
@@ -0,0 +1,161 @@
+import math
+
+from rest_framework import serializers
+
+from .amenities import Amenity, decode, encode
+from .clusters import MAX_TILES, MAX_ZOOM, tiles_covering
+from .models import Listing
+from .search import Box, Circle
+
+
+# ======================================================
+# SEARCH
+# ======================================================
+
+class ListingSearchSerializer(serializers.Serializer):
+    """
+    Query parameters of the listing search. Names follow the frontend
+    (api.properties.getAll); blank values mean "any".
+
+    ``term`` is a full-text search (properties.search); its results come
+    most relevant first unless another ordering is asked for.
+
+    ``amenities`` ("water,power") keeps listings with all of those
+    amenities, ``anyAmenities`` those with at least one.
+
+    ``bbox`` ("west,south,east,north", as Leaflet's toBBoxString() gives
+    it) keeps the listings in a map viewport. ``near`` ("lat,lng") and
+    ``radius`` (km) keep those within a circle, nearest first.
+    """
+    DEFAULT_RADIUS = 5
+    MAX_RADIUS = 50
+
+    term = serializers.CharField(max_length=200, allow_blank=True, required=False)
+    city = serializers.ChoiceField(choices=Listing.City.choices, required=False)
+    type = serializers.ChoiceField(choices=Listing.Type.choices, required=False)
+    bedrooms = serializers.IntegerField(min_value=0, required=False)
+    minPrice = serializers.IntegerField(min_value=0, required=False, source='min_price')
+    maxPrice = serializers.IntegerField(min_value=0, required=False, source='max_price')
+    amenities = serializers.CharField(required=False)
+    anyAmenities = serializers.CharField(required=False, source='any_amenities')
+    bbox = serializers.CharField(required=False, source='box')
+    near = serializers.CharField(required=False)
+    radius = serializers.FloatField(min_value=0.1, max_value=MAX_RADIUS, required=False)
+
+    def to_internal_value(self, data):
+        return super().to_internal_value({key: value for key, value in data.items() if value != ''})
+
+    def validate(self, data):
+        if data.get('min_price', 0) > data.get('max_price', float('inf')):
+            raise serializers.ValidationError({"minPrice": ["Must not be greater than maxPrice."]})
+        if 'box' in data and 'near' in data:
+            raise serializers.ValidationError({"near": ["Search either a bbox or near a point, not both."]})
+        radius = data.pop('radius', None)
+        if 'near' in data:
+            lat, lng = data['near']
+            data['near'] = Circle(lat, lng, radius or self.DEFAULT_RADIUS)
+        elif radius is not None:
+            raise serializers.ValidationError({"radius": ["Only applies to a search near a point."]})
+        return data
+
+    def validate_amenities(self, value):
+        return amenity_ids(value)
+
+    def validate_anyAmenities(self, value):
+        return amenity_ids(value)
+
+    def validate_bbox(self, value):
+        west, south, east, north = degrees(value, ('west', 'south', 'east', 'north'))
+        if west > east or south > north:
+            raise serializers.ValidationError("Must be west,south,east,north with west <= east and south <= north.")
+        return Box(west, south, east, north)
+
+    def validate_near(self, value):
+        return tuple(degrees(value, ('lat', 'lng')))
+
+
+class ListingClusterSerializer(ListingSearchSerializer):
+    """
+    Query parameters of the map clusters: a viewport (``bbox``, required)
+    at a map ``zoom``, with the search filters; not ``near`` or ``radius``.
+    """
+    zoom = serializers.IntegerField(min_value=0, max_value=MAX_ZOOM)
+    bbox = serializers.CharField(source='box')
+    near = None
+    radius = None
+
+    def validate(self, data):
+        data = super().validate(data)
+        if len(tiles_covering(data['box'], data['zoom'])) > MAX_TILES:
+            raise serializers.ValidationError({"bbox": ["Too large a viewport for this zoom."]})
+        return data
+
+
+def amenity_ids(value):
+    """
+    The amenity ids in comma-separated ``value``, in registry order (so
+    equal filters hash alike for the cluster cache).
+    """
+    try:
+        return decode(encode(amenity for amenity in value.split(',') if amenity))
+    except ValueError:
+        raise serializers.ValidationError(
+            f"Expected comma-separated amenities out of {', '.join(Amenity.values)}."
+        ) from None
+
+
+def degrees(value, names):
+    """
+    The comma-separated numbers of ``value``, one per name; latitudes
+    ('lat', 'south', 'north') within 90 degrees of the equator, longitudes
+    within 180 of the meridian.
+    """
+    try:
+        numbers = [float(part) for part in value.split(',')]
+    except ValueError:
+        numbers = []
+    if len(numbers) != len(names) or not all(map(math.isfinite, numbers)):
+        raise serializers.ValidationError(f"Expected {','.join(names)} in degrees.")
+    for name, number in zip(names, numbers):
+        limit = 90 if name in ('lat', 'south', 'north') else 180
+        if abs(number) > limit:
+            raise serializers.ValidationError(f"{name} must be between -{limit} and {limit}.")
+    return numbers
+
+
+class ListingSerializer(serializers.ModelSerializer):
+    """A listing in the shape of the frontend's Property type."""
+    landlordId = serializers.IntegerField(source='landlord_id', read_only=True)
+    coordinates = serializers.SerializerMethodField()
+    amenities = serializers.ListField(child=serializers.ChoiceField(choices=Amenity.choices), read_only=True)
+    # Km from the centre of a radius search; left out otherwise.
+    distance = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Listing
+        fields = (
+            'id',
+            'title',
+            'location',
+            'city',
+            'price',
+            'period',
+            'bedrooms',
+            'bathrooms',
+            'type',
+            'description_en',
+            'description_sw',
+            'images',
+            'amenities',
+            'landlordId',
+            'verified',
+            'coordinates',
+            'status',
+            'distance',
+        )
+        read_only_fields = fields
+
+    def get_coordinates(self, listing):
+        if listing.latitude is None or listing.longitude is None:
+            return None
+        return {'lat': listing.latitude, 'lng': listing.longitude}
@@ -0,0 +1,62 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .clusters import invalidate_tiles
+from .models import Listing
+from .search import get_listing_search
+
+
+# Fields in a listing's full-text index document. A save restricted to
+# other fields (e.g. update_fields=['status']) leaves the index untouched.
+SEARCH_FIELDS = frozenset({
+    'title',
+    'location',
+    'city',
+    'description_en',
+    'description_sw',
+})
+
+# Fields map clusters are filtered or aggregated on (properties.clusters).
+TILE_FIELDS = SEARCH_FIELDS | {
+    'status',
+    'latitude',
+    'longitude',
+    'price',
+    'type',
+    'bedrooms',
+    'amenities',
+}
+
+
+@receiver(post_save, sender=Listing)
+def index_listing_on_save(sender, instance, using, update_fields=None, **kwargs):
+    if update_fields is not None and SEARCH_FIELDS.isdisjoint(update_fields):
+        return
+    get_listing_search(using).index([instance], using)
+
+
+@receiver(post_save, sender=Listing)
+def invalidate_tiles_on_save(sender, instance, using, update_fields=None, **kwargs):
+    if update_fields is not None and TILE_FIELDS.isdisjoint(update_fields):
+        return
+    position = (instance.latitude, instance.longitude)
+    # After commit: invalidated earlier, a map request could still read
+    # the old rows and cache them under the new tile version.
+    transaction.on_commit(
+        partial(invalidate_tiles, {position, getattr(instance, '_loaded_position', position)}),
+        using=using,
+    )
+    instance._loaded_position = position
+
+
+@receiver(post_delete, sender=Listing)
+def unindex_listing_on_delete(sender, instance, using, **kwargs):
+    get_listing_search(using).remove([instance.pk], using)
+
+
+@receiver(post_delete, sender=Listing)
+def invalidate_tiles_on_delete(sender, instance, using, **kwargs):
+    transaction.on_commit(partial(invalidate_tiles, [(instance.latitude, instance.longitude)]), using=using)
@@ -0,0 +1,160 @@
+"""
+Synthetic listings for ``manage.py seed_synthetic``; landlords are drawn
+from the landlords and agents already in the database.
+"""
+
+import math
+from array import array
+
+from NIKONEKTI_backend.synthetic import Generator, register
+from users.models import User
+
+from .clusters import invalidate_all_tiles
+from .models import Listing
+from .search import get_listing_search
+
+
+# city: (share of listings, centre (lat, lng), spread in degrees, neighbourhoods)
+CITIES = {
+    Listing.City.DAR_ES_SALAAM: (0.50, (-6.7924, 39.2083), 0.07, (
+        'Masaki', 'Mikocheni', 'Sinza', 'Kariakoo', 'Mbezi Beach', 'Kinondoni',
+        'Upanga', 'Tegeta', 'Kigamboni', 'Mbagala', 'Ubungo', 'Kimara',
+    )),
+    Listing.City.ARUSHA: (0.20, (-3.3869, 36.6830), 0.04, (
+        'Njiro', 'Sakina', 'Kijenge', 'Themi', 'Sekei', 'Olasiti', 'Kaloleni',
+    )),
+    Listing.City.DODOMA: (0.15, (-6.1630, 35.7516), 0.04, (
+        'Area D', 'Kisasa', 'Nzuguni', 'Makole', 'Iyumbu', 'Kikuyu', 'Mipango',
+    )),
+    Listing.City.MWANZA: (0.15, (-2.5164, 32.9175), 0.04, (
+        'Ilemela', 'Kirumba', 'Capri Point', 'Buswelu', 'Igoma', 'Nyakato', 'Isamilo',
+    )),
+}
+
+# type: (share, bedroom choices, median monthly rent in TZS)
+TYPES = {
+    Listing.Type.APARTMENT: (0.35, (1, 2, 2, 3, 3, 4), 700_000),
+    Listing.Type.HOUSE: (0.25, (2, 3, 3, 4, 5), 900_000),
+    Listing.Type.ROOM: (0.25, (1,), 150_000),
+    Listing.Type.HOSTEL: (0.05, (1,), 100_000),
+    Listing.Type.FRAME: (0.10, (0,), 300_000),
+}
+
+# Rent is quoted for the whole period.
+PERIODS = {
+    Listing.Period.MONTH: (0.70, 1),
+    Listing.Period.SIX_MONTHS: (0.20, 6),
+    Listing.Period.YEAR: (0.10, 12),
+}
+
+STATUSES = {
+    Listing.Status.ACTIVE: 0.85,
+    Listing.Status.RENTED: 0.10,
+    Listing.Status.DRAFT: 0.05,
+}
+
+AMENITIES = {
+    'water': 0.70,
+    'power': 0.80,
+    'security': 0.50,
+    'ac': 0.15,
+    'parking': 0.40,
+    'wifi': 0.20,
+}
+
+ADJECTIVES = ('Modern', 'Affordable', 'Spacious', 'Cosy', 'Quiet', 'Newly built', 'Furnished')
+
+DESCRIPTIONS_EN = (
+    'Close to the main road and public transport.',
+    'Water flows daily and the compound is fenced.',
+    'Tiled floors, gypsum ceiling and a modern kitchen.',
+    'Walking distance to supermarkets and schools.',
+    'Quiet neighbourhood, perfect for families.',
+    'Standby generator and secure parking.',
+)
+DESCRIPTIONS_SW = (
+    'Karibu na barabara kuu na usafiri wa umma.',
+    'Maji yanatoka kila siku na uwanja una fensi.',
+    'Sakafu ya tiles, gypsum na jiko la kisasa.',
+    'Karibu na supermarkets na shule.',
+    'Eneo tulivu, linafaa kwa familia.',
+    'Jenereta ya akiba na parking salama.',
+)
+
+
+def external_id(seed, index):
+    """Zero-padded so a seed's keys sort in row order."""
+    return f'synthetic:{seed}:{index:010d}'
+
+
+def _weighted(mapping, share=lambda value: value):
+    return list(mapping), [share(value) for value in mapping.values()]
+
+
+@register
+class ListingGenerator(Generator):
+    name = 'listings'
+    model = Listing
+    default_count = 5000
+
+    def context(self, count, seed, options):
+        landlords = array('q', User.objects.filter(
+            role__in=[User.Role.LANDLORD, User.Role.AGENT],
+        ).order_by('pk').values_list('pk', flat=True).iterator(chunk_size=10000))
+        if not landlords:
+            raise ValueError('Listings need landlords; generate users first (--users).')
+        return {'landlords': landlords, 'seed': seed}
+
+    def insert(self, objects):
+        # Listings made by an earlier run with the same seed are skipped
+        # by external_id. Not through ignore_conflicts: without it
+        # bulk_create sets the ids the search index needs, and it sends
+        # no post_save to index them. A chunk's keys are consecutive, so
+        # one range scan of the unique index finds those present.
+        present = set(Listing.objects.filter(
+            external_id__gte=objects[0].external_id,
+            external_id__lte=objects[-1].external_id,
+        ).values_list('external_id', flat=True))
+        objects = [listing for listing in objects if listing.external_id not in present]
+        if not objects:
+            return
+        Listing.objects.bulk_create(objects)
+        get_listing_search().index(objects)
+        invalidate_all_tiles()
+
+    def rows(self, rng, start, stop, context):
+        landlords = context['landlords']
+        cities = _weighted(CITIES, lambda city: city[0])
+        types = _weighted(TYPES, lambda type_: type_[0])
+        periods = _weighted(PERIODS, lambda period: period[0])
+        statuses = _weighted(STATUSES)
+        listings = []
+        for index in range(start, stop):
+            city = rng.choices(*cities)[0]
+            _, (lat, lng), spread, neighbourhoods = CITIES[city]
+            neighbourhood = rng.choice(neighbourhoods)
+            type_ = rng.choices(*types)[0]
+            _, bedroom_choices, median_rent = TYPES[type_]
+            bedrooms = rng.choice(bedroom_choices)
+            period = rng.choices(*periods)[0]
+            monthly = median_rent * math.exp(rng.gauss(0, 0.5)) * (1.4 if city == Listing.City.DAR_ES_SALAAM else 1)
+            listings.append(Listing(
+                landlord_id=rng.choice(landlords),
+                title=f'{rng.choice(ADJECTIVES)} {type_} in {neighbourhood}',
+                location=f'{neighbourhood}, {city}',
+                city=city,
+                price=max(10_000, int(round(monthly * PERIODS[period][1], -4))),
+                period=period,
+                bedrooms=bedrooms,
+                bathrooms=max(1, min(bedrooms, rng.randint(1, 3))),
+                type=type_,
+                status=rng.choices(*statuses)[0],
+                description_en=' '.join(rng.sample(DESCRIPTIONS_EN, 2)),
+                description_sw=' '.join(rng.sample(DESCRIPTIONS_SW, 2)),
+                amenities=[amenity for amenity, share in AMENITIES.items() if rng.random() < share],
+                verified=rng.random() < 0.6,
+                latitude=round(rng.gauss(lat, spread), 6),
+                longitude=round(rng.gauss(lng, spread), 6),
+                external_id=external_id(context['seed'], index),
+            ))
+        return listings
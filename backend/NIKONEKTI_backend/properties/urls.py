@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import ListingClusterAPIView, ListingSearchAPIView
+
+app_name = "properties"
+
+urlpatterns = [
+    path("", ListingSearchAPIView.as_view(), name="search"),
+    path("clusters/", ListingClusterAPIView.as_view(), name="clusters"),
+]
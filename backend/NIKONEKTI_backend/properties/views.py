@@ -1,3 +1,60 @@
-from django.shortcuts import render
+from rest_framework.generics import ListAPIView
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from .clusters import MAX_TILES, clusters
+from .pagination import ListingCursorPagination
+from .search import search_listings
+from .serializers import ListingClusterSerializer, ListingSearchSerializer, ListingSerializer
+
+
+class ListingSearchAPIView(ListAPIView):
+    """
+    API endpoint searching active listings, cheapest first.
+
+    Filters: city, type, bedrooms, minPrice, maxPrice, amenities (all of
+    them) and anyAmenities (at least one). `term` searches the title,
+    location and both descriptions, most relevant first. `bbox` keeps the
+    listings in a map viewport; `near` and `radius` those near a point,
+    nearest first. Results come a page at a time; follow the `next`
+    link for more.
+    """
+    permission_classes = [AllowAny]
+    # One page of listings, after at most one spatial index probe for a
+    # bbox (properties.search.SQLiteRTreeGeoIndex); keyset pagination
+    # never counts.
+    query_budget = 2
+    serializer_class = ListingSerializer
+    pagination_class = ListingCursorPagination
+
+    def get_queryset(self):
+        filters = ListingSearchSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        # Only rank a text search that will be ordered by relevance.
+        ordering = self.request.query_params.get(self.paginator.ordering_query_param)
+        if ordering:
+            ranked = ordering == 'relevance'
+        else:
+            ranked = 'near' not in filters.validated_data
+        return search_listings(**filters.validated_data, ranked=ranked)
+
+
+class ListingClusterAPIView(APIView):
+    """
+    API endpoint clustering the active listings in a map viewport.
+
+    Takes `bbox` and `zoom` plus the search filters; returns, for each
+    map tile in view, listings grouped on a grid with their count,
+    centroid and price range. A cluster of one carries its listingId.
+    """
+    permission_classes = [AllowAny]
+    # One GROUP BY per tile in view not yet cached (properties.clusters).
+    query_budget = MAX_TILES
+
+    def get(self, request):
+        params = ListingClusterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = dict(params.validated_data)
+        box, zoom = filters.pop('box'), filters.pop('zoom')
+        return Response({"zoom": zoom, "clusters": clusters(box, zoom, filters)})
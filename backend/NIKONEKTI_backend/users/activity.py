@@ -0,0 +1,178 @@
+import atexit
+import logging
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection
+from django.db.models import Case, DateTimeField, Value, When
+from django.dispatch import receiver
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_LOGIN_ACTIVITY = {
+    # Skip the write when the stored last_login is younger than this (seconds).
+    'THRESHOLD': 300,
+    # Seconds between background flushes. 0 writes through immediately.
+    'FLUSH_INTERVAL': 30,
+    # Flush early once this many users are waiting to be written.
+    'MAX_PENDING': 1000,
+    # Rows per UPDATE statement.
+    'BATCH_SIZE': 500,
+}
+
+
+class LoginActivityRecorder:
+    """
+    Buffers last_login timestamps and writes them in batched UPDATEs.
+
+    Replaces django.contrib.auth.models.update_last_login, which saves the
+    user on every login. Here a login is only recorded if the stored
+    last_login is older than ``threshold``, and recorded logins are flushed
+    every ``flush_interval`` seconds (and at shutdown) with
+    ``QuerySet.update()``, which leaves ``updated_at`` alone.
+    """
+
+    def __init__(self, threshold=300, flush_interval=30, max_pending=1000, batch_size=500):
+        self.threshold = timedelta(seconds=threshold)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_settings(cls):
+        options = {
+            **DEFAULT_LOGIN_ACTIVITY,
+            **getattr(settings, 'LOGIN_ACTIVITY', {}),
+        }
+        return cls(
+            threshold=options['THRESHOLD'],
+            flush_interval=options['FLUSH_INTERVAL'],
+            max_pending=options['MAX_PENDING'],
+            batch_size=options['BATCH_SIZE'],
+        )
+
+    def record(self, user, when=None):
+        """Note a login by ``user``; returns False if no write is needed."""
+        buffered, flush_now = self._buffer(user, when)
+        if flush_now:
+            self.flush()
+        return buffered
+
+    async def arecord(self, user, when=None):
+        """Async counterpart of record(); a due flush runs in a worker thread."""
+        buffered, flush_now = self._buffer(user, when)
+        if flush_now:
+            await sync_to_async(self.flush)()
+        return buffered
+
+    def _buffer(self, user, when):
+        when = when or timezone.now()
+        if user.last_login is not None and when - user.last_login < self.threshold:
+            return False, False
+
+        user.last_login = when
+        with self._lock:
+            previous = self._pending.get(user.pk)
+            if previous is None or previous < when:
+                self._pending[user.pk] = when
+            pending = len(self._pending)
+
+        if not self.flush_interval or pending >= self.max_pending:
+            return True, True
+        self._ensure_flusher()
+        return True, False
+
+    def flush(self):
+        """Write all buffered timestamps; returns the number of users updated."""
+        from .models import User
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            items = list(pending.items())
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                try:
+                    User.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                        last_login=Case(
+                            *[When(pk=pk, then=Value(when)) for pk, when in batch],
+                            output_field=DateTimeField(),
+                        )
+                    )
+                except Exception:
+                    # Put the unwritten timestamps back for the next flush.
+                    self._requeue(items[start:])
+                    raise
+            return len(items)
+
+    def _requeue(self, items):
+        with self._lock:
+            for pk, when in items:
+                previous = self._pending.get(pk)
+                if previous is None or previous < when:
+                    self._pending[pk] = when
+
+    def _ensure_flusher(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='login-activity-flusher', daemon=True,
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Failed to flush login activity')
+            finally:
+                connection.close()
+
+    def stop(self):
+        """Stop the background flusher and write what is still buffered."""
+        self._stop.set()
+        self.flush()
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_login_recorder():
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = LoginActivityRecorder.from_settings()
+    return _recorder
+
+
+@receiver(setting_changed)
+def reset_login_recorder(sender, setting, **kwargs):
+    global _recorder
+    if setting == 'LOGIN_ACTIVITY' and _recorder is not None:
+        _recorder.stop()
+        _recorder = None
+
+
+@atexit.register
+def _flush_at_exit():
+    if _recorder is not None:
+        try:
+            _recorder.stop()
+        except Exception:
+            logger.exception('Failed to flush login activity at shutdown')
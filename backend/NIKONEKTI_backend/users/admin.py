@@ -8,8 +8,14 @@ from django.contrib import admin
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from django.utils.translation import gettext_lazy as _
-from .models import User
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext_lazy as _, ngettext
+from NIKONEKTI_backend.pagination import EstimatedCountPaginator
+from .admin_filters import CachedCountsBooleanFilter, CachedCountsChoicesFilter
+from .export import CONTENT_TYPES, export_filename, export_queryset, iter_export
+from .kyc import review_kyc
+from .models import KYCReview, User
+from .search import search_users
 
 """
 EXPLANATION - IMPORTS:
@@ -70,19 +76,25 @@ class UserAdmin(BaseUserAdmin):
     # SECTION 3: LIST VIEW CONFIGURATION
     # ========================================================================
     
-    ordering = ['-date_joined']
+    ordering = ['-pk']
     """
     DEFAULT SORT ORDER for the user list page.
     
     EXPLANATION:
     - Controls how users appear in the admin list view
-    - ['-date_joined']: Sort by date_joined in DESCENDING order
+    - ['-pk']: Sort by id in DESCENDING order, i.e. most recently
+      inserted row first
     - Minus sign (-) = descending (newest first)
     - Without minus = ascending (oldest first)
+    - This is insertion order, NOT signup date: import_users and
+      seed_synthetic insert rows whose date_joined is in the past, so
+      it can differ from '-date_joined'. It is read straight off the
+      primary key; '-date_joined' has no index, so each page load would
+      sort the entire users table
     
     RESULT:
-    - Most recently registered users appear at the top
-    - Useful for monitoring new signups
+    - Most recently created accounts appear at the top
+    - Useful for monitoring new signups and imports
     
     ALTERNATIVE OPTIONS:
     - ['full_name']: Sort alphabetically by name
@@ -128,11 +140,11 @@ class UserAdmin(BaseUserAdmin):
     """
     
     list_filter = (
-        'role',
-        'is_verified',
-        'kyc_status',
-        'is_staff',
-        'is_active',
+        ('role', CachedCountsChoicesFilter),
+        ('is_verified', CachedCountsBooleanFilter),
+        ('kyc_status', CachedCountsChoicesFilter),
+        ('is_staff', CachedCountsBooleanFilter),
+        ('is_active', CachedCountsBooleanFilter),
     )
     """
     SIDEBAR FILTERS for the user list page.
@@ -141,6 +153,9 @@ class UserAdmin(BaseUserAdmin):
     - Creates a filter sidebar on the right side of list view
     - Each item becomes a collapsible filter section
     - Allows quick filtering of users by these criteria
+    - Counts next to each choice come from one cached GROUP BY per field
+      (users/admin_filters.py), refreshed every 5 minutes, instead of a
+      COUNT per choice on every page load
     
     FILTERS EXPLAINED:
     1. role: Filter by TENANT/LANDLORD/AGENT
@@ -181,30 +196,39 @@ class UserAdmin(BaseUserAdmin):
     
     EXPLANATION:
     - Adds a search box at the top of the user list
-    - Searches across specified fields
-    - Case-insensitive partial matching
-    
-    HOW IT WORKS:
-    - Type in search box: "+255712" or "John"
-    - Django searches both phone_number AND full_name
-    - Returns users where ANY field matches (OR logic)
-    - Uses SQL LIKE query: WHERE phone_number LIKE '%255712%' OR full_name LIKE '%John%'
-    
-    SEARCH EXAMPLES:
-    - "+255712" → Finds all numbers starting with +255712
-    - "john" → Finds "John Doe", "Johnny Smith", etc.
-    - "doe" → Finds "John Doe", "Jane Doe", etc.
+    - Declaring search_fields turns the box on; the matching itself is
+      done by get_search_results() below, not by Django's LIKE '%term%'
+    
+    HOW IT WORKS (users/search.py):
+    - Anything that looks like the start of a phone number, in any format
+      ("0712 34", "+25571", "7123"), is a PREFIX search on the canonical
+      number: phone_number >= '+25571234' AND < '+25571235'. That walks
+      the unique phone_number index.
+    - Anything else searches full_name through a word index: FTS5 on
+      SQLite ("ash mus" finds "Asha Mussa"), a pg_trgm GIN index on
+      PostgreSQL. Pick another backend with USER_SEARCH['NAME_BACKEND'].
+    
+    WHY NOT THE DEFAULT?
+    - WHERE phone_number LIKE '%255712%' OR full_name LIKE '%John%'
+      cannot use any index, so every search scanned the whole table
+    """
     
-    WHY THESE FIELDS?
-    - phone_number: Primary search (users often search by phone)
-    - full_name: Find users by name
-    - email NOT included (it's optional and might be null)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    """
+    COUNTING: An exact COUNT(*) over millions of users takes seconds.
     
-    PERFORMANCE NOTE:
-    - Searching is fast because we have database indexes on these fields
-    - See models.py Section 3H for index definitions
+    - paginator: Estimated total for the unfiltered list, exact counts
+      for filtered lists up to 10,000 rows (see NIKONEKTI_backend/pagination.py)
+    - show_full_result_count: Skips the second COUNT(*) behind
+      "5 results (1,000,000 total)"
+    - show_facets: Facet counts come from the cached filters instead
     """
     
+    def get_search_results(self, request, queryset, search_term):
+        return search_users(queryset, search_term), False
+    
     # ========================================================================
     # SECTION 4: DETAIL VIEW CONFIGURATION (EDIT EXISTING USER)
     # ========================================================================
@@ -449,6 +473,104 @@ class UserAdmin(BaseUserAdmin):
     4. User gets all group permissions
     5. Can add extra individual permissions if needed
     """
+    
+    # ========================================================================
+    # SECTION 7B: KYC REVIEW ACTIONS
+    # ========================================================================
+    
+    actions = ['approve_kyc', 'reject_kyc', 'request_kyc_resubmission']
+    """
+    BATCH KYC DECISIONS for the selected users.
+    
+    EXPLANATION:
+    - Each action goes through users.kyc.review_kyc(): one UPDATE per
+      500 users instead of one save() per user, plus an audit row each
+      (see KYCReviewAdmin below)
+    - Only users in the review queue are touched; anything else in the
+      selection is skipped and left out of the count
+    """
+    
+    def _review(self, request, queryset, decision):
+        user_ids = list(
+            queryset.filter(kyc_status__in=User.KYC_QUEUE_STATUSES)
+            .values_list('pk', flat=True)
+        )
+        updated = review_kyc(user_ids, decision, reviewer=request.user)
+        self.message_user(request, ngettext(
+            '%(count)d user marked %(status)s.',
+            '%(count)d users marked %(status)s.',
+            updated,
+        ) % {'count': updated, 'status': User.KYCStatus(decision).label})
+    
+    @admin.action(description=_('Approve KYC of selected users'), permissions=['change'])
+    def approve_kyc(self, request, queryset):
+        self._review(request, queryset, User.KYCStatus.APPROVED)
+    
+    @admin.action(description=_('Reject KYC of selected users'), permissions=['change'])
+    def reject_kyc(self, request, queryset):
+        self._review(request, queryset, User.KYCStatus.REJECTED)
+    
+    @admin.action(description=_('Ask selected users to resubmit KYC'), permissions=['change'])
+    def request_kyc_resubmission(self, request, queryset):
+        self._review(request, queryset, User.KYCStatus.RESUBMISSION_REQUIRED)
+    
+    # ========================================================================
+    # SECTION 7C: EXPORT ACTIONS
+    # ========================================================================
+    
+    actions += ['export_csv', 'export_csv_gz', 'export_jsonl_gz']
+    """
+    STREAMING EXPORT of the selected users (or all of them with "select
+    all").
+    
+    EXPLANATION:
+    - The file is streamed while it is read from the database, so the
+      export never sits in memory whatever the selection size
+    - Columns are users.export.EXPORT_FIELDS; the password hash is never
+      exported
+    - For scheduled or very large exports use:
+      python manage.py export_users --gzip --output users.csv.gz
+    """
+    
+    def _export(self, queryset, fmt, compress=False):
+        # A .gz download, not a gzip Content-Encoding of the CSV/JSONL body.
+        response = StreamingHttpResponse(
+            iter_export(export_queryset(queryset), fmt, compress),
+            content_type='application/gzip' if compress else CONTENT_TYPES[fmt],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{export_filename(fmt, compress)}"'
+        )
+        return response
+    
+    @admin.action(description=_('Export selected users as CSV'), permissions=['view'])
+    def export_csv(self, request, queryset):
+        return self._export(queryset, 'csv')
+    
+    @admin.action(description=_('Export selected users as CSV (gzip)'), permissions=['view'])
+    def export_csv_gz(self, request, queryset):
+        return self._export(queryset, 'csv', compress=True)
+    
+    @admin.action(description=_('Export selected users as JSON Lines (gzip)'), permissions=['view'])
+    def export_jsonl_gz(self, request, queryset):
+        return self._export(queryset, 'jsonl', compress=True)
+
+
+@admin.register(KYCReview)
+class KYCReviewAdmin(admin.ModelAdmin):
+    """
+    Read-only audit trail of KYC decisions.
+    """
+    list_display = ('created_at', 'user', 'previous_status', 'status', 'reviewer', 'note')
+    list_filter = ('status',)
+    list_select_related = ('user', 'reviewer')
+    raw_id_fields = ('user', 'reviewer')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 # ============================================================================
@@ -3,3 +3,18 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from django.contrib.auth.signals import user_logged_in
+        from django.db.models.signals import post_migrate
+
+        from . import signals  # noqa: F401
+        from .search import install_name_search
+
+        # Session logins (e.g. the admin) record last_login through the
+        # buffered LoginActivityRecorder instead of a save() per login.
+        user_logged_in.disconnect(dispatch_uid='update_last_login')
+
+        # The name search index lives outside the migration graph so it
+        # can be repaired after any migration that rebuilds the users table.
+        post_migrate.connect(install_name_search, sender=self)
@@ -0,0 +1,219 @@
+import math
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.serializers import ValidationError, as_serializer_error
+from rest_framework.settings import api_settings
+
+from NIKONEKTI_backend.replicas import stick_to_primary
+
+from .authentication import CachedTokenAuthentication
+from .permission import AllowAny, IsAuthenticated
+from .serializers import LoginSerializer, RegisterSerializer
+from .throttling import (
+    LoginIPRateThrottle,
+    LoginPhoneRateThrottle,
+    RegisterIPRateThrottle,
+    RegisterPhoneRateThrottle,
+)
+
+
+# ======================================================
+# ASYNC API VIEW
+# ======================================================
+
+class AsyncAPIView(View):
+    """
+    A small async stand-in for DRF's APIView, for use under ASGI.
+
+    DRF's APIView is sync only, so under ASGI every request costs a thread
+    hop and the hashing pool is waited on from a blocked thread. These views
+    run on the event loop: authentication, permissions and throttles use
+    their async variants when they have one (aauthenticate,
+    ahas_permission, aallow_request) and fall back to sync_to_async
+    otherwise. Requests are parsed with DRF's Request, and errors are
+    rendered the same way as DRF's exception handler.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [AllowAny]
+    throttle_classes = []
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token-authenticated API; DRF's APIView is csrf-exempt for the same reason.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request, parsers=[parser() for parser in self.parser_classes])
+        self.request = request
+        try:
+            await self.initial(request)
+            method = request.method.lower()
+            handler = getattr(self, method, None) if method in self.http_method_names else None
+            if handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+            return await handler(request, *args, **kwargs)
+        except (exceptions.APIException, Http404, PermissionDenied) as exc:
+            return self.handle_exception(exc)
+
+    async def initial(self, request):
+        await self.perform_authentication(request)
+        await self.check_permissions(request)
+        await self.check_throttles(request)
+
+    async def perform_authentication(self, request):
+        for authenticator in (auth() for auth in self.authentication_classes):
+            aauthenticate = getattr(authenticator, 'aauthenticate', None)
+            if aauthenticate is None:
+                aauthenticate = sync_to_async(authenticator.authenticate)
+            try:
+                result = await aauthenticate(request)
+            except exceptions.APIException:
+                self._not_authenticated(request)
+                raise
+            if result is not None:
+                self._authenticator = authenticator
+                request.user, request.auth = result
+                return
+        self._not_authenticated(request)
+
+    def _not_authenticated(self, request):
+        self._authenticator = None
+        request.user = api_settings.UNAUTHENTICATED_USER()
+        request.auth = None
+
+    async def check_permissions(self, request):
+        for permission in (perm() for perm in self.permission_classes):
+            ahas_permission = getattr(permission, 'ahas_permission', None)
+            if ahas_permission is None:
+                ahas_permission = sync_to_async(permission.has_permission)
+            if not await ahas_permission(request, self):
+                if self.authentication_classes and self._authenticator is None:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    async def check_throttles(self, request):
+        waits = []
+        for throttle in (throttle() for throttle in self.throttle_classes):
+            aallow_request = getattr(throttle, 'aallow_request', None)
+            if aallow_request is None:
+                aallow_request = sync_to_async(throttle.allow_request)
+            if not await aallow_request(request, self):
+                waits.append(throttle.wait())
+        if waits:
+            raise exceptions.Throttled(max((w for w in waits if w is not None), default=None))
+
+    def handle_exception(self, exc):
+        # Django's own exceptions, converted as DRF's exception handler does.
+        if isinstance(exc, Http404):
+            exc = exceptions.NotFound(*exc.args)
+        elif isinstance(exc, PermissionDenied):
+            exc = exceptions.PermissionDenied(*exc.args)
+
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            authenticator = self._get_authenticator()
+            if authenticator is not None:
+                headers['WWW-Authenticate'] = authenticator.authenticate_header(self.request)
+            else:
+                exc.status_code = status.HTTP_403_FORBIDDEN
+        if getattr(exc, 'wait', None):
+            headers['Retry-After'] = '%d' % math.ceil(exc.wait)
+
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {'detail': exc.detail}
+        return self.respond(data, status=exc.status_code, headers=headers)
+
+    def _get_authenticator(self):
+        if self.authentication_classes:
+            return self.authentication_classes[0]()
+        return None
+
+    def respond(self, data, status=status.HTTP_200_OK, headers=None):
+        return HttpResponse(
+            JSONRenderer().render(data),
+            status=status,
+            headers=headers,
+            content_type='application/json',
+        )
+
+
+# ======================================================
+# USER ENDPOINTS
+# ======================================================
+
+class AsyncLoginAPIView(AsyncAPIView):
+    """Async counterpart of views.LoginAPIView."""
+    permission_classes = [AllowAny]
+    query_budget = 4
+    throttle_classes = [LoginPhoneRateThrottle, LoginIPRateThrottle]
+    read_from_primary = True
+
+    async def post(self, request):
+        serializer = LoginSerializer(
+            data=request.data,
+            context={'request': request}
+        )
+        # is_valid() would call the sync validate(); run field validation
+        # here and the async object-level validation ourselves.
+        try:
+            attrs = serializer.to_internal_value(request.data)
+            data = await serializer.avalidate(attrs)
+        except ValidationError as exc:
+            raise ValidationError(as_serializer_error(exc))
+        stick_to_primary(data['token'])
+
+        return self.respond(data, status=status.HTTP_200_OK)
+
+
+class AsyncRegisterAPIView(AsyncAPIView):
+    """Async counterpart of views.RegisterAPIView."""
+    permission_classes = [AllowAny]
+    query_budget = 2
+    throttle_classes = [RegisterPhoneRateThrottle, RegisterIPRateThrottle]
+
+    async def post(self, request):
+        serializer = RegisterSerializer(data=request.data)
+        # Field validation does no queries; the phone number's uniqueness
+        # is enforced by the INSERT in aregister_user().
+        serializer.is_valid(raise_exception=True)
+        user = await serializer.acreate(serializer.validated_data)
+        stick_to_primary(user.auth_token.key)
+
+        return self.respond(
+            {
+                "message": "User registered successfully",
+                "token": user.auth_token.key,
+                "user_id": user.id,
+                "role": user.role,
+                "is_verified": user.is_verified,
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+
+class AsyncLogoutAPIView(AsyncAPIView):
+    """Async counterpart of views.LogoutAPIView."""
+    permission_classes = [IsAuthenticated]
+    query_budget = 2
+
+    async def post(self, request):
+        token = request.auth
+        if not isinstance(token, Token):
+            token = await Token.objects.aget(user=request.user)
+        await token.adelete()
+
+        return self.respond(
+            {"message": "Successfully logged out"},
+            status=status.HTTP_200_OK
+        )
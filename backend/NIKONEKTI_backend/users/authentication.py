@@ -0,0 +1,208 @@
+import copy
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+
+from NIKONEKTI_backend.cache import LRUCache
+
+
+# ======================================================
+# TOKEN CACHE
+# ======================================================
+
+DEFAULT_TOKEN_AUTH_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 60,
+    'SHARED_CACHE_ALIAS': None,
+    'SHARED_TTL': 300,
+    'KEY_PREFIX': 'auth-token',
+}
+
+
+class TokenCache:
+    """
+    Two-level cache of token key -> Token (with its user preloaded).
+
+    The first level is a bounded in-process LRU; the optional second level
+    is a Django cache alias shared between worker processes. Entries are
+    removed from both levels on invalidation, and the local TTL bounds how
+    long another process can serve a token that was revoked elsewhere.
+    """
+
+    def __init__(self, max_entries, ttl, shared_cache_alias=None,
+                 shared_ttl=None, key_prefix='auth-token'):
+        self.local = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.shared_cache_alias = shared_cache_alias
+        self.shared_ttl = shared_ttl
+        self.key_prefix = key_prefix
+
+    @classmethod
+    def from_settings(cls):
+        options = {
+            **DEFAULT_TOKEN_AUTH_CACHE,
+            **getattr(settings, 'TOKEN_AUTH_CACHE', {}),
+        }
+        return cls(
+            max_entries=options['MAX_ENTRIES'],
+            ttl=options['TTL'],
+            shared_cache_alias=options['SHARED_CACHE_ALIAS'],
+            shared_ttl=options['SHARED_TTL'],
+            key_prefix=options['KEY_PREFIX'],
+        )
+
+    @property
+    def shared(self):
+        if self.shared_cache_alias is None:
+            return None
+        return caches[self.shared_cache_alias]
+
+    def _shared_key(self, key):
+        return f'{self.key_prefix}:{key}'
+
+    def get(self, key):
+        token = self.local.get(key)
+        if token is not None:
+            return token
+
+        if self.shared is not None:
+            token = self.shared.get(self._shared_key(key))
+            if token is not None:
+                self.local.set(key, token)
+        return token
+
+    async def aget(self, key):
+        token = self.local.get(key)
+        if token is not None:
+            return token
+
+        if self.shared is not None:
+            token = await self.shared.aget(self._shared_key(key))
+            if token is not None:
+                self.local.set(key, token)
+        return token
+
+    def set(self, token):
+        self.local.set(token.key, token)
+        if self.shared is not None:
+            self.shared.set(self._shared_key(token.key), token, self.shared_ttl)
+
+    async def aset(self, token):
+        self.local.set(token.key, token)
+        if self.shared is not None:
+            await self.shared.aset(self._shared_key(token.key), token, self.shared_ttl)
+
+    def invalidate(self, *keys):
+        for key in keys:
+            self.local.delete(key)
+        if self.shared is not None and keys:
+            self.shared.delete_many([self._shared_key(key) for key in keys])
+
+    def invalidate_user(self, *user_ids):
+        keys = Token.objects.filter(user_id__in=user_ids).values_list('key', flat=True)
+        self.invalidate(*keys)
+
+    def clear(self):
+        self.local.clear()
+
+
+_token_cache = None
+
+
+def get_token_cache():
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache.from_settings()
+    return _token_cache
+
+
+@receiver(setting_changed)
+def reset_token_cache(sender, setting, **kwargs):
+    global _token_cache
+    if setting in ('TOKEN_AUTH_CACHE', 'CACHES'):
+        _token_cache = None
+
+
+# ======================================================
+# AUTHENTICATION CLASS
+# ======================================================
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for DRF's TokenAuthentication that serves the
+    token -> user lookup from TokenCache instead of querying the
+    Token/users join on every request.
+
+    Only successful lookups are cached, so unknown keys cannot be used to
+    flush useful entries out of the LRU. Each request gets its own copy of
+    the cached user so in-memory changes never leak between requests.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        token = cache.get(key)
+
+        if token is None:
+            model = self.get_model()
+            try:
+                token = model.objects.select_related('user').get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            cache.set(token)
+
+        return self._credentials(token)
+
+    async def aauthenticate(self, request):
+        """Async counterpart of authenticate(), used by the ASGI views."""
+        key = self.get_key(request)
+        if key is None:
+            return None
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        cache = get_token_cache()
+        token = await cache.aget(key)
+
+        if token is None:
+            model = self.get_model()
+            try:
+                token = await model.objects.select_related('user').aget(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            await cache.aset(token)
+
+        return self._credentials(token)
+
+    def get_key(self, request):
+        """Extract the token key from the Authorization header, as authenticate() does."""
+        auth = get_authorization_header(request).split()
+
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) == 1:
+            msg = _('Invalid token header. No credentials provided.')
+            raise exceptions.AuthenticationFailed(msg)
+        elif len(auth) > 2:
+            msg = _('Invalid token header. Token string should not contain spaces.')
+            raise exceptions.AuthenticationFailed(msg)
+
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            msg = _('Invalid token header. Token string should not contain invalid characters.')
+            raise exceptions.AuthenticationFailed(msg)
+
+    def _credentials(self, token):
+        user = copy.copy(token.user)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        token = copy.copy(token)
+        token.user = user
+        return (user, token)
@@ -0,0 +1,322 @@
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import BooleanField, CharField, Exists, Q, Value
+from django.dispatch import receiver
+
+from NIKONEKTI_backend.cache import LRUCache
+
+from .models import User
+
+
+# ======================================================
+# AUTHORIZATION SNAPSHOT
+# ======================================================
+
+@dataclass(frozen=True)
+class AuthorizationSnapshot:
+    """
+    Everything a permission check needs to know about one user.
+
+    Built from one query for the user's row and their direct and group
+    permissions ('app_label.codename'), then cached by
+    AuthorizationCache until the user's role, KYC state or permissions
+    change.
+    """
+    user_id: int = None
+    version: tuple = ()
+    role: str = None
+    is_active: bool = False
+    is_staff: bool = False
+    is_superuser: bool = False
+    kyc_approved: bool = False
+    permissions: frozenset = field(default_factory=frozenset)
+
+    @property
+    def is_authenticated(self):
+        return self.user_id is not None
+
+    @property
+    def is_tenant(self):
+        return self.role == User.Role.TENANT
+
+    @property
+    def is_landlord(self):
+        return self.role == User.Role.LANDLORD
+
+    @property
+    def is_agent(self):
+        return self.role == User.Role.AGENT
+
+    @property
+    def can_post_properties(self):
+        return (self.is_landlord or self.is_agent) and self.kyc_approved
+
+    def has_perm(self, perm):
+        if not self.is_active:
+            return False
+        return self.is_superuser or perm in self.permissions
+
+    def has_perms(self, perm_list):
+        return all(self.has_perm(perm) for perm in perm_list)
+
+    def has_module_perms(self, app_label):
+        if not self.is_active:
+            return False
+        return self.is_superuser or any(
+            perm.partition('.')[0] == app_label for perm in self.permissions
+        )
+
+
+ANONYMOUS = AuthorizationSnapshot()
+
+
+USER_FIELDS = ('role', 'kyc_status', 'is_verified', 'is_active', 'is_staff', 'is_superuser')
+
+
+def _snapshot_queryset(user_id):
+    """
+    The user's row and their permissions in one query: a UNION of the
+    USER_FIELDS row (permission columns NULL) and one row per
+    ('app_label', 'codename') held directly, through a group, or by
+    being a superuser (every permission, as with ModelBackend).
+
+    Read from the primary: a replica may not have the change that bumped
+    the version yet, and its rows would be cached under that version.
+    """
+    text, flag = Value(None, output_field=CharField()), Value(None, output_field=BooleanField())
+    row = User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id).order_by().values_list(*USER_FIELDS, text, text)
+    permissions = Permission.objects.using(DEFAULT_DB_ALIAS).filter(
+        Q(user=user_id)
+        | Q(group__user=user_id)
+        | Exists(User.objects.filter(pk=user_id, is_superuser=True))
+    ).order_by().values_list(
+        *[text if name in ('role', 'kyc_status') else flag for name in USER_FIELDS],
+        'content_type__app_label',
+        'codename',
+    )
+    return row.union(permissions)
+
+
+def _snapshot_from_rows(user_id, version, rows):
+    fields, permissions = None, set()
+    for *values, app, codename in rows:
+        if app is None:
+            fields = dict(zip(USER_FIELDS, values))
+        else:
+            permissions.add(f'{app}.{codename}')
+    if fields is None:
+        # Deleted since it was authenticated: no access.
+        return AuthorizationSnapshot(user_id=user_id, version=version)
+    return AuthorizationSnapshot(
+        user_id=user_id,
+        version=version,
+        role=fields['role'],
+        is_active=fields['is_active'],
+        is_staff=fields['is_staff'],
+        is_superuser=fields['is_superuser'],
+        kyc_approved=fields['kyc_status'] == User.KYCStatus.APPROVED and fields['is_verified'],
+        permissions=frozenset(permissions) if fields['is_active'] else frozenset(),
+    )
+
+
+def build_snapshot(user, version=()):
+    """
+    Compile a snapshot for ``user`` in one query.
+
+    Role, KYC state and flags are read from the database, not from
+    ``user``: that instance may be a cached copy from before the change
+    that bumped ``version``, and a snapshot built from it would be
+    shared with every worker under the new version.
+    """
+    return _snapshot_from_rows(user.pk, version, _snapshot_queryset(user.pk))
+
+
+async def abuild_snapshot(user, version=()):
+    """Async counterpart of build_snapshot()."""
+    rows = [row async for row in _snapshot_queryset(user.pk)]
+    return _snapshot_from_rows(user.pk, version, rows)
+
+
+# ======================================================
+# AUTHORIZATION CACHE
+# ======================================================
+
+DEFAULT_AUTHORIZATION_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 60,
+    'SHARED_CACHE_ALIAS': None,
+    'SHARED_TTL': 300,
+    'KEY_PREFIX': 'authz',
+}
+
+
+class AuthorizationCache:
+    """
+    Two-level cache of user id -> AuthorizationSnapshot.
+
+    Snapshots carry the version they were built under. With a shared cache
+    alias the version is a (global, per-user) pair of counters kept in that
+    cache: invalidating a user bumps their counter, invalidating everyone
+    (a group's permissions changed) bumps the global one, and every worker
+    sees the bump on its next lookup at the cost of one cache read. Without
+    one, invalidation is per process and the local TTL bounds how long
+    another process can serve an outdated snapshot, as with TokenCache.
+    """
+
+    def __init__(self, max_entries, ttl, shared_cache_alias=None,
+                 shared_ttl=None, key_prefix='authz'):
+        self.local = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.shared_cache_alias = shared_cache_alias
+        self.shared_ttl = shared_ttl
+        self.key_prefix = key_prefix
+        self._generation = 0
+
+    @classmethod
+    def from_settings(cls):
+        options = {
+            **DEFAULT_AUTHORIZATION_CACHE,
+            **getattr(settings, 'AUTHORIZATION_CACHE', {}),
+        }
+        return cls(
+            max_entries=options['MAX_ENTRIES'],
+            ttl=options['TTL'],
+            shared_cache_alias=options['SHARED_CACHE_ALIAS'],
+            shared_ttl=options['SHARED_TTL'],
+            key_prefix=options['KEY_PREFIX'],
+        )
+
+    @property
+    def shared(self):
+        if self.shared_cache_alias is None:
+            return None
+        return caches[self.shared_cache_alias]
+
+    def _version_keys(self, user_id):
+        return f'{self.key_prefix}:version', f'{self.key_prefix}:version:{user_id}'
+
+    def _snapshot_key(self, user_id, version):
+        return f'{self.key_prefix}:{user_id}:' + '.'.join(map(str, version))
+
+    def _version_from(self, values, keys):
+        return tuple(values.get(key, 0) for key in keys)
+
+    def version(self, user_id):
+        if self.shared is None:
+            return (self._generation,)
+        keys = self._version_keys(user_id)
+        return self._version_from(self.shared.get_many(keys), keys)
+
+    async def aversion(self, user_id):
+        if self.shared is None:
+            return (self._generation,)
+        keys = self._version_keys(user_id)
+        return self._version_from(await self.shared.aget_many(keys), keys)
+
+    def get(self, user):
+        version = self.version(user.pk)
+        snapshot = self.local.get(user.pk)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        if self.shared is not None:
+            snapshot = self.shared.get(self._snapshot_key(user.pk, version))
+        if snapshot is None or snapshot.version != version:
+            snapshot = build_snapshot(user, version)
+            if self.shared is not None:
+                self.shared.set(self._snapshot_key(user.pk, version), snapshot, self.shared_ttl)
+        self.local.set(user.pk, snapshot)
+        return snapshot
+
+    async def aget(self, user):
+        version = await self.aversion(user.pk)
+        snapshot = self.local.get(user.pk)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        if self.shared is not None:
+            snapshot = await self.shared.aget(self._snapshot_key(user.pk, version))
+        if snapshot is None or snapshot.version != version:
+            snapshot = await abuild_snapshot(user, version)
+            if self.shared is not None:
+                await self.shared.aset(self._snapshot_key(user.pk, version), snapshot, self.shared_ttl)
+        self.local.set(user.pk, snapshot)
+        return snapshot
+
+    def invalidate_user(self, *user_ids):
+        for user_id in user_ids:
+            self.local.delete(user_id)
+            if self.shared is not None:
+                self._bump(self._version_keys(user_id)[1])
+
+    def invalidate_all(self):
+        self.local.clear()
+        if self.shared is not None:
+            self._bump(self._version_keys(None)[0])
+        else:
+            self._generation += 1
+
+    def _bump(self, key):
+        # add() is a no-op if the counter exists; incr() is atomic on
+        # backends that support it.
+        self.shared.add(key, 0, timeout=None)
+        try:
+            self.shared.incr(key)
+        except ValueError:
+            self.shared.set(key, 1, timeout=None)
+
+    def clear(self):
+        self.local.clear()
+
+
+_authorization_cache = None
+
+
+def get_authorization_cache():
+    global _authorization_cache
+    if _authorization_cache is None:
+        _authorization_cache = AuthorizationCache.from_settings()
+    return _authorization_cache
+
+
+@receiver(setting_changed)
+def reset_authorization_cache(sender, setting, **kwargs):
+    global _authorization_cache
+    if setting in ('AUTHORIZATION_CACHE', 'CACHES'):
+        _authorization_cache = None
+
+
+# ======================================================
+# LOOKUP
+# ======================================================
+# The snapshot is also memoized on the user instance. Authenticated
+# requests get their own copy of the user (see CachedTokenAuthentication),
+# so every check within one request shares one lookup.
+
+def get_authorization(user):
+    """Return the AuthorizationSnapshot for ``user`` (anonymous included)."""
+    if user is None or not user.is_authenticated or user.pk is None:
+        return ANONYMOUS
+    snapshot = user.__dict__.get('_authorization')
+    if snapshot is None:
+        snapshot = user.__dict__['_authorization'] = get_authorization_cache().get(user)
+    return snapshot
+
+
+async def aget_authorization(user):
+    """Async counterpart of get_authorization()."""
+    if user is None or not user.is_authenticated or user.pk is None:
+        return ANONYMOUS
+    snapshot = user.__dict__.get('_authorization')
+    if snapshot is None:
+        snapshot = user.__dict__['_authorization'] = await get_authorization_cache().aget(user)
+    return snapshot
+
+
+def forget_authorization(user):
+    """Drop the snapshot memoized on this instance."""
+    user.__dict__.pop('_authorization', None)
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .authorization import aget_authorization, get_authorization
+from .hashing import amake_password
+from .phone import normalize_phone_number
+
+
+UserModel = get_user_model()
+
+
+class PhoneNumberBackend(ModelBackend):
+    """
+    Authenticates by phone number typed in any common Tanzanian format.
+
+    The number is canonicalized before the lookup, which is a single query
+    on the unique phone_number index that loads only AUTH_FIELDS. Anything
+    else on the user is loaded lazily if a caller actually needs it.
+    """
+
+    # Columns read by authentication, LoginSerializer and update_last_login.
+    AUTH_FIELDS = (
+        'id',
+        'password',
+        'phone_number',
+        'role',
+        'is_active',
+        'is_verified',
+        'kyc_status',
+        'last_login',
+    )
+
+    def _lookup(self, phone_number, password):
+        if phone_number is None or password is None:
+            return None
+        try:
+            return normalize_phone_number(phone_number)
+        except ValueError:
+            return None
+
+    def _queryset(self):
+        return UserModel._default_manager.only(*self.AUTH_FIELDS)
+
+    def authenticate(self, request, phone_number=None, password=None, username=None, **kwargs):
+        # The admin login form passes the phone number as `username`.
+        phone_number = self._lookup(phone_number or username, password)
+        try:
+            if phone_number is None:
+                raise UserModel.DoesNotExist
+            user = self._queryset().get(phone_number=phone_number)
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user (#20760).
+            if password is not None:
+                UserModel().set_password(password)
+        else:
+            if user.check_password(password) and self.user_can_authenticate(user):
+                return user
+
+    async def aauthenticate(self, request, phone_number=None, password=None, username=None, **kwargs):
+        phone_number = self._lookup(phone_number or username, password)
+        try:
+            if phone_number is None:
+                raise UserModel.DoesNotExist
+            user = await self._queryset().aget(phone_number=phone_number)
+        except UserModel.DoesNotExist:
+            if password is not None:
+                await amake_password(password)
+        else:
+            if await user.acheck_password(password) and self.user_can_authenticate(user):
+                return user
+
+    # Permission checks (user.has_perm(), the admin) read the cached
+    # AuthorizationSnapshot instead of querying user and group permissions.
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        return set(get_authorization(user_obj).permissions)
+
+    async def aget_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        return set((await aget_authorization(user_obj)).permissions)
@@ -0,0 +1,269 @@
+import asyncio
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+# ======================================================
+# CONFIGURATION
+# ======================================================
+
+DEFAULT_PASSWORD_HASHING = {
+    # 'thread' or 'process'. PBKDF2 and scrypt release the GIL inside
+    # hashlib, so threads are usually enough; processes isolate CPU fully.
+    'EXECUTOR': 'thread',
+    'MAX_WORKERS': os.cpu_count() or 2,
+    # Hashes allowed to wait for a worker before new ones are rejected.
+    'MAX_QUEUE': 64,
+    # Seconds suggested to clients in Retry-After when the pool is full.
+    'RETRY_AFTER': 1,
+    # Algorithm (e.g. 'scrypt', 'argon2') that new hashes use and that
+    # existing hashes are upgraded to on the next successful login. It must
+    # be listed in PASSWORD_HASHERS. None keeps Django's default hasher.
+    'PREFERRED_HASHER': None,
+}
+
+
+def get_hashing_options():
+    return {
+        **DEFAULT_PASSWORD_HASHING,
+        **getattr(settings, 'PASSWORD_HASHING', {}),
+    }
+
+
+class HashingUnavailable(APIException):
+    """Raised instead of queueing a hash when the worker pool is saturated."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The server is busy. Please try again shortly.'
+    default_code = 'hashing_unavailable'
+
+    def __init__(self, wait=None, detail=None, code=None):
+        super().__init__(detail, code)
+        # DRF's exception handler turns `wait` into a Retry-After header.
+        self.wait = wait
+
+
+# ======================================================
+# METRICS
+# ======================================================
+
+class HashingMetrics:
+    """Running totals for queue wait and hash time, in seconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.completed = 0
+            self.rejected = 0
+            self.queue_wait_total = 0.0
+            self.queue_wait_max = 0.0
+            self.hash_time_total = 0.0
+            self.hash_time_max = 0.0
+
+    def record(self, queue_wait, hash_time):
+        with self._lock:
+            self.completed += 1
+            self.queue_wait_total += queue_wait
+            self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+            self.hash_time_total += hash_time
+            self.hash_time_max = max(self.hash_time_max, hash_time)
+
+    def record_rejection(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'queue_wait_avg': self.queue_wait_total / completed,
+                'queue_wait_max': self.queue_wait_max,
+                'hash_time_avg': self.hash_time_total / completed,
+                'hash_time_max': self.hash_time_max,
+            }
+
+
+# ======================================================
+# WORKER FUNCTIONS
+# ======================================================
+# Module-level so they can be pickled into a process pool. Each returns the
+# wall-clock start time and duration alongside its result so queue wait can
+# be measured across process boundaries.
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _timed(fn, *args):
+    started_at = time.time()
+    start = time.perf_counter()
+    result = fn(*args)
+    return started_at, time.perf_counter() - start, result
+
+
+def _make_password(password, hasher):
+    return hashers.make_password(password, hasher=hasher)
+
+
+def _verify_password(password, encoded, preferred):
+    return hashers.verify_password(password, encoded, preferred)
+
+
+# ======================================================
+# EXECUTOR
+# ======================================================
+
+class HashingExecutor:
+    """
+    Bounded pool that runs password hashing off the request thread.
+
+    At most ``max_workers + max_queue`` hashes may be in flight; beyond that
+    ``submit`` fails fast with HashingUnavailable instead of letting requests
+    pile up behind the CPU.
+    """
+
+    def __init__(self, executor='thread', max_workers=2, max_queue=64,
+                 retry_after=1, preferred_hasher=None):
+        if executor == 'process':
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', ''),),
+            )
+        elif executor == 'thread':
+            self._pool = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix='password-hashing',
+            )
+        else:
+            raise ValueError(f"Unknown hashing executor {executor!r}")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self.retry_after = retry_after
+        self.preferred_hasher = preferred_hasher or 'default'
+        self.metrics = HashingMetrics()
+
+    @classmethod
+    def from_settings(cls):
+        options = get_hashing_options()
+        return cls(
+            executor=options['EXECUTOR'],
+            max_workers=options['MAX_WORKERS'],
+            max_queue=options['MAX_QUEUE'],
+            retry_after=options['RETRY_AFTER'],
+            preferred_hasher=options['PREFERRED_HASHER'],
+        )
+
+    def submit(self, fn, *args):
+        """Schedule ``fn(*args)``; returns a future of (started_at, duration, result)."""
+        if not self._slots.acquire(blocking=False):
+            self.metrics.record_rejection()
+            raise HashingUnavailable(wait=self.retry_after)
+        enqueued_at = time.time()
+        try:
+            future = self._pool.submit(_timed, fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        future.enqueued_at = enqueued_at
+        return future
+
+    def _unwrap(self, future, timed):
+        started_at, duration, result = timed
+        self.metrics.record(max(0.0, started_at - future.enqueued_at), duration)
+        return result
+
+    def run(self, fn, *args):
+        future = self.submit(fn, *args)
+        return self._unwrap(future, future.result())
+
+    async def arun(self, fn, *args):
+        future = self.submit(fn, *args)
+        return self._unwrap(future, await asyncio.wrap_future(future))
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = HashingExecutor.from_settings()
+    return _executor
+
+
+@receiver(setting_changed)
+def reset_hashing_executor(sender, setting, **kwargs):
+    global _executor
+    if setting == 'PASSWORD_HASHING' and _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+@atexit.register
+def _shutdown_hashing_executor():
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+
+
+# ======================================================
+# PUBLIC API
+# ======================================================
+# Drop-in counterparts of django.contrib.auth.hashers.make_password and
+# check_password. The setter, which saves an upgraded hash, runs on the
+# caller's side; only the hashing itself goes through the pool.
+
+def make_password(password):
+    if password is None:
+        return hashers.make_password(None)
+    executor = get_hashing_executor()
+    return executor.run(_make_password, password, executor.preferred_hasher)
+
+
+async def amake_password(password):
+    if password is None:
+        return hashers.make_password(None)
+    executor = get_hashing_executor()
+    return await executor.arun(_make_password, password, executor.preferred_hasher)
+
+
+def check_password(password, encoded, setter=None):
+    executor = get_hashing_executor()
+    is_correct, must_update = executor.run(
+        _verify_password, password, encoded, executor.preferred_hasher,
+    )
+    if setter and is_correct and must_update:
+        setter(password)
+    return is_correct
+
+
+async def acheck_password(password, encoded, setter=None):
+    executor = get_hashing_executor()
+    is_correct, must_update = await executor.arun(
+        _verify_password, password, encoded, executor.preferred_hasher,
+    )
+    if setter and is_correct and must_update:
+        await setter(password)
+    return is_correct
@@ -0,0 +1,116 @@
+import itertools
+
+from django.db import connection, transaction
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .authentication import get_token_cache
+from .authorization import get_authorization_cache
+from .models import KYCReview, User
+
+
+# Statuses a reviewer can move a queued user to.
+DECISIONS = (
+    User.KYCStatus.APPROVED,
+    User.KYCStatus.REJECTED,
+    User.KYCStatus.RESUBMISSION_REQUIRED,
+)
+
+# Users per UPDATE; keeps the IN (...) list under SQLite's variable limit.
+REVIEW_BATCH_SIZE = 500
+
+
+def in_review_queue():
+    """
+    The users_kyc_queue_idx condition as a filter expression.
+
+    The statuses are inlined as literals: SQLite only uses a partial index
+    when the query repeats the index condition verbatim, and with
+    kyc_status__in (bound parameters) it falls back to a full table scan.
+    """
+    column = '%s.%s' % (
+        connection.ops.quote_name(User._meta.db_table),
+        connection.ops.quote_name(User._meta.get_field('kyc_status').column),
+    )
+    statuses = ', '.join("'%s'" % status for status in User.KYC_QUEUE_STATUSES)
+    return RawSQL(f'{column} IN ({statuses})', [], output_field=BooleanField())
+
+
+def review_queue(status=None):
+    """
+    Users waiting for KYC review, oldest submission first.
+
+    The filter and ordering match the users_kyc_queue_idx partial index,
+    so the queue is read off that index instead of scanning users.
+    """
+    queryset = User.objects.filter(in_review_queue())
+    if status is not None:
+        queryset = queryset.filter(kyc_status=status)
+    return queryset.order_by('kyc_submitted_at', 'id')
+
+
+def submit_kyc(user, when=None):
+    """Put ``user`` at the back of the review queue."""
+    user.kyc_status = User.KYCStatus.PENDING
+    user.is_verified = False
+    user.kyc_submitted_at = when or timezone.now()
+    user.save(update_fields=['kyc_status', 'is_verified', 'kyc_submitted_at', 'updated_at'])
+
+
+def review_kyc(user_ids, decision, reviewer=None, note=''):
+    """
+    Apply ``decision`` to every queued user in ``user_ids``.
+
+    Each batch is one SELECT ... FOR UPDATE of the queued rows, one UPDATE
+    that sets kyc_status and is_verified together, and one bulk INSERT
+    into the audit log. Users that are not in the queue (already reviewed
+    by someone else, or never submitted) are skipped. Returns the number
+    of users updated.
+    """
+    if decision not in DECISIONS:
+        raise ValueError(f'Unknown KYC decision {decision!r}')
+
+    updated = 0
+    user_ids = iter(user_ids)
+    while True:
+        batch = list(itertools.islice(user_ids, REVIEW_BATCH_SIZE))
+        if not batch:
+            break
+        updated += _review_batch(batch, decision, reviewer, note)
+    return updated
+
+
+def _review_batch(user_ids, decision, reviewer, note):
+    now = timezone.now()
+    with transaction.atomic():
+        previous = dict(
+            review_queue()
+            .filter(pk__in=user_ids)
+            .select_for_update()
+            .values_list('pk', 'kyc_status')
+        )
+        if not previous:
+            return 0
+        # QuerySet.update() sends no post_save, so the caches are
+        # invalidated explicitly below.
+        User.objects.filter(pk__in=list(previous)).update(
+            kyc_status=decision,
+            is_verified=decision == User.KYCStatus.APPROVED,
+            kyc_reviewed_at=now,
+            updated_at=now,
+        )
+        KYCReview.objects.bulk_create(
+            KYCReview(
+                user_id=pk,
+                reviewer=reviewer,
+                previous_status=status,
+                status=decision,
+                note=note,
+            )
+            for pk, status in previous.items()
+        )
+
+    get_token_cache().invalidate_user(*previous)
+    get_authorization_cache().invalidate_user(*previous)
+    return len(previous)
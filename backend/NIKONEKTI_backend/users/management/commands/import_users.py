@@ -0,0 +1,261 @@
+import csv
+import functools
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from rest_framework.authtoken.models import Token
+
+from users.hashing import get_hashing_options
+from users.models import User
+
+
+REPORT_FIELDS = ('line', 'phone_number', 'error')
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _hash_password(password, hasher):
+    return make_password(password, hasher=hasher)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import users from a CSV or JSONL file. Columns: phone_number "
+        "(any Tanzanian format; stored as +255XXXXXXXXX), "
+        "full_name, role, password (optional), email (optional). Rows are "
+        "validated, hashed across a process pool and inserted with their "
+        "auth tokens in chunks; rejected rows go to a CSV error report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or '-' for stdin.")
+        parser.add_argument(
+            '--format', choices=('csv', 'jsonl'),
+            help="Input format. Defaults to the file extension, else csv.",
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Hashing processes. 0 hashes in this process.",
+        )
+        parser.add_argument(
+            '--unusable-passwords', action='store_true',
+            help="Ignore the password column; imported users must reset it.",
+        )
+        parser.add_argument(
+            '--report', help="Write the per-row error report here (default: stderr).",
+        )
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('jsonl' if options['path'].endswith('.jsonl') else 'csv')
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        source = self._open(options['path'])
+        report_file = open(options['report'], 'w', newline='') if options['report'] else sys.stderr
+        report = csv.writer(report_file)
+        report.writerow(REPORT_FIELDS)
+
+        pool = None
+        if options['workers'] > 0 and not options['unusable_passwords']:
+            pool = ProcessPoolExecutor(
+                max_workers=options['workers'],
+                initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', ''),),
+            )
+
+        created = rejected = 0
+        started = time.perf_counter()
+        try:
+            rows = self._read_rows(source, fmt)
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+                valid, errors = self._validate_chunk(chunk)
+                for error in errors:
+                    report.writerow(error)
+                rejected += len(errors)
+                imported = self._import_chunk(valid, pool, options['unusable_passwords'], report)
+                rejected += len(valid) - imported
+                created += imported
+                self.stdout.write(f'{created} imported, {rejected} rejected', ending='\r')
+                self.stdout.flush()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            if source is not sys.stdin:
+                source.close()
+            if report_file is not sys.stderr:
+                report_file.close()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} users imported, {rejected} rejected in {elapsed:.1f}s'
+        ))
+
+    # ------------------------------------------------------------------
+    # Input
+    # ------------------------------------------------------------------
+
+    def _open(self, path):
+        if path == '-':
+            return sys.stdin
+        if not Path(path).is_file():
+            raise CommandError(f'No such file: {path}')
+        return open(path, newline='', encoding='utf-8')
+
+    def _read_rows(self, source, fmt):
+        """Yield (line number, row dict) without reading the whole file."""
+        if fmt == 'csv':
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+            return
+
+        for line_num, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                row = {'__error__': f'Invalid JSON: {exc}'}
+            if not isinstance(row, dict):
+                row = {'__error__': 'Expected a JSON object'}
+            yield line_num, row
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _text(row, field):
+        """A field's value, '' if missing; JSONL may hold any JSON type."""
+        value = row.get(field)
+        if value is None:
+            return ''
+        if not isinstance(value, str):
+            raise ValidationError(f'{field} must be a string')
+        return value
+
+    def _clean_row(self, row):
+        if '__error__' in row:
+            raise ValidationError(row['__error__'])
+
+        phone_number = User.normalize_username(self._text(row, 'phone_number').strip())
+        User.phone_regex(phone_number)
+
+        full_name = self._text(row, 'full_name').strip()
+        if not full_name:
+            raise ValidationError('full_name is required')
+        if len(full_name) > User._meta.get_field('full_name').max_length:
+            raise ValidationError('full_name is too long')
+
+        role = (self._text(row, 'role').strip() or User.Role.TENANT).upper()
+        if role not in User.Role.values:
+            raise ValidationError(f'Unknown role {role!r}')
+
+        return {
+            'phone_number': phone_number,
+            'full_name': full_name,
+            'role': role,
+            'email': self._text(row, 'email').strip() or None,
+            'password': self._text(row, 'password') or None,
+        }
+
+    def _validate_chunk(self, chunk):
+        """Split a chunk into clean rows and error-report rows."""
+        valid = {}
+        errors = []
+        for line_num, row in chunk:
+            try:
+                cleaned = self._clean_row(row)
+            except ValidationError as exc:
+                errors.append((line_num, row.get('phone_number', ''), '; '.join(exc.messages)))
+                continue
+            if cleaned['phone_number'] in valid:
+                errors.append((line_num, cleaned['phone_number'], 'Duplicate phone number in input'))
+                continue
+            valid[cleaned['phone_number']] = (line_num, cleaned)
+
+        # One query per chunk catches phones already in the database,
+        # including duplicates imported by an earlier chunk of this file.
+        existing = User.objects.filter(
+            phone_number__in=list(valid)
+        ).values_list('phone_number', flat=True)
+        for phone_number in existing:
+            line_num, _ = valid.pop(phone_number)
+            errors.append((line_num, phone_number, 'Phone number already registered'))
+
+        return [{**cleaned, 'line': line_num} for line_num, cleaned in valid.values()], errors
+
+    # ------------------------------------------------------------------
+    # Insert
+    # ------------------------------------------------------------------
+
+    def _hash_passwords(self, rows, pool, unusable):
+        passwords = [None if unusable else row['password'] for row in rows]
+        to_hash = [p for p in passwords if p is not None]
+        hash_fn = functools.partial(
+            _hash_password,
+            hasher=get_hashing_options()['PREFERRED_HASHER'] or 'default',
+        )
+        if pool is not None:
+            hashed = iter(pool.map(hash_fn, to_hash, chunksize=max(1, len(to_hash) // 64)))
+        else:
+            hashed = iter(map(hash_fn, to_hash))
+        return [make_password(None) if p is None else next(hashed) for p in passwords]
+
+    def _import_chunk(self, rows, pool, unusable, report):
+        if not rows:
+            return 0
+        encoded = self._hash_passwords(rows, pool, unusable)
+        users = [
+            User(
+                phone_number=row['phone_number'],
+                full_name=row['full_name'],
+                role=row['role'],
+                email=row['email'],
+                password=password,
+            )
+            for row, password in zip(rows, encoded)
+        ]
+        try:
+            self._insert(users)
+            return len(users)
+        except IntegrityError:
+            pass
+
+        # Someone registered one of these numbers after the chunk was
+        # validated. Fall back to row-by-row inserts so only the
+        # conflicting rows are rejected.
+        created = 0
+        for row, user in zip(rows, users):
+            user.pk = None
+            try:
+                self._insert([user])
+                created += 1
+            except IntegrityError:
+                report.writerow((row['line'], row['phone_number'], 'Phone number already registered'))
+        return created
+
+    def _insert(self, users):
+        with transaction.atomic():
+            users = User.objects.bulk_create(users)
+            Token.objects.bulk_create(
+                Token(key=Token.generate_key(), user=user) for user in users
+            )
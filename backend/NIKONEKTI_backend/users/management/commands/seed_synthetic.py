@@ -0,0 +1,134 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from NIKONEKTI_backend.synthetic import DEFAULT_EPOCH, build_chunk, get_generators, insert_chunk
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _build_ahead(pool, workers, chunks):
+    """
+    Chunks built in ``pool``, in order, with at most two per worker
+    waiting, so built rows never pile up faster than they are inserted.
+    """
+    pending = deque()
+    for args in chunks:
+        pending.append(pool.submit(build_chunk, *args))
+        if len(pending) >= 2 * workers:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def epoch(value):
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{value!r} is not an ISO 8601 date or time')
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with realistic synthetic data for performance "
+        "work. Output is determined by --seed and the counts; rows are "
+        "built in chunks across a process pool and bulk-inserted by this "
+        "process. Running again with the same seed adds nothing."
+    )
+
+    def add_arguments(self, parser):
+        for name, generator in get_generators().items():
+            parser.add_argument(
+                f'--{name}', type=int, default=generator.default_count,
+                help=f"Number of {name} to generate (default {generator.default_count:,}).",
+            )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help=(
+                "Processes building rows; this one inserts them. 0 builds in "
+                "this process. Default: one on SQLite, which takes a single "
+                "writer, so inserting sets the pace; otherwise one per CPU."
+            ),
+        )
+        parser.add_argument(
+            '--epoch', type=epoch, default=DEFAULT_EPOCH,
+            help=f"Generated histories end at this time (ISO 8601, default {DEFAULT_EPOCH:%Y-%m-%d}).",
+        )
+        parser.add_argument(
+            '--password',
+            help="Password for every generated user. Default: unusable passwords.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        workers = options['workers']
+        if workers is None:
+            workers = 1 if connection.vendor == 'sqlite' else os.cpu_count() or 1
+        pool = None
+        if workers > 0:
+            # Children must open their own connections.
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', ''),),
+            )
+
+        try:
+            for name, generator in get_generators().items():
+                count = options[name]
+                if count < 1:
+                    continue
+                self._run(name, generator, count, chunk_size, options, pool, workers)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def _run(self, name, generator, count, chunk_size, options, pool, workers):
+        seed = options['seed']
+        try:
+            context = generator.context(count, seed, options)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        before = generator.model.objects.count()
+        chunks = (
+            (name, seed, start, min(start + chunk_size, count), context)
+            for start in range(0, count, chunk_size)
+        )
+
+        started = time.perf_counter()
+        if pool is not None:
+            connections.close_all()
+            results = _build_ahead(pool, workers, chunks)
+        else:
+            results = (build_chunk(*args) for args in chunks)
+
+        built = 0
+        for objects in results:
+            insert_chunk(name, objects)
+            built += len(objects)
+            self.stdout.write(f'{name}: {built:,}/{count:,}', ending='\r')
+            self.stdout.flush()
+
+        created = generator.model.objects.count() - before
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{created:,} {name} created ({built - created:,} already present) '
+            f'in {elapsed:.1f}s, {built / elapsed:,.0f} rows/s'
+        ))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from NIKONEKTI_backend.replicas import sync_sqlite_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database over each local SQLite replica "
+        "(DATABASE_REPLICAS), once or every --interval seconds. The "
+        "interval is the replication lag the replicas simulate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=2.0,
+            help="Seconds between copies (the simulated lag).",
+        )
+        parser.add_argument('--once', action='store_true', help="Copy once and exit.")
+
+    def handle(self, *args, **options):
+        if options['interval'] <= 0:
+            raise CommandError('--interval must be positive')
+        while True:
+            synced = sync_sqlite_replicas()
+            if not synced:
+                raise CommandError('No SQLite replicas configured; set DATABASE_REPLICAS.')
+            self.stdout.write(f'Synced {", ".join(synced)}')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
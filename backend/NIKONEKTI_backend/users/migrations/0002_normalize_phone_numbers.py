@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:54
+
+from django.db import migrations
+
+from users.phone import normalize_phone_number
+
+
+BATCH_SIZE = 1000
+
+
+def normalize_existing_phone_numbers(apps, schema_editor):
+    """
+    Rewrite stored phone numbers to +255XXXXXXXXX, BATCH_SIZE rows at a time.
+
+    Rows that cannot be parsed, or whose canonical form already belongs to
+    another user, are left untouched rather than failing the migration.
+    """
+    User = apps.get_model('users', 'User')
+    db_alias = schema_editor.connection.alias
+    users = User.objects.using(db_alias).order_by('pk')
+
+    last_pk = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_pk).only('pk', 'phone_number')[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        changed = {}
+        for user in batch:
+            try:
+                canonical = normalize_phone_number(user.phone_number)
+            except ValueError:
+                continue
+            if canonical != user.phone_number and canonical not in changed:
+                changed[canonical] = user
+
+        taken = set(
+            User.objects.using(db_alias)
+            .filter(phone_number__in=list(changed))
+            .values_list('phone_number', flat=True)
+        )
+        updates = []
+        for canonical, user in changed.items():
+            if canonical not in taken:
+                user.phone_number = canonical
+                updates.append(user)
+        User.objects.using(db_alias).bulk_update(updates, ['phone_number'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            normalize_existing_phone_numbers,
+            migrations.RunPython.noop,
+        ),
+        # phone_number is unique, so it already has an index; this one
+        # duplicated it and doubled the index maintenance on every write.
+        migrations.RemoveIndex(
+            model_name='user',
+            name='users_phone_n_a3b1c5_idx',
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_kyc_submitted_at(apps, schema_editor):
+    """
+    Queue users already waiting for review in the order they last changed;
+    updated_at is the closest thing to a submission time they have.
+    """
+    User = apps.get_model('users', 'User')
+    User.objects.using(schema_editor.connection.alias).filter(
+        kyc_status__in=['PENDING', 'RESUBMISSION_REQUIRED'],
+        kyc_submitted_at__isnull=True,
+    ).update(kyc_submitted_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_normalize_phone_numbers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KYCReview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('previous_status', models.CharField(choices=[('NOT_SUBMITTED', 'Not Submitted'), ('PENDING', 'Pending Review'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected'), ('RESUBMISSION_REQUIRED', 'Resubmission Required')], max_length=25)),
+                ('status', models.CharField(choices=[('NOT_SUBMITTED', 'Not Submitted'), ('PENDING', 'Pending Review'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected'), ('RESUBMISSION_REQUIRED', 'Resubmission Required')], max_length=25)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'KYC review',
+                'verbose_name_plural': 'KYC reviews',
+                'db_table': 'users_kyc_review',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='users_kyc_sta_4052e1_idx',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='kyc_reviewed_at',
+            field=models.DateTimeField(blank=True, help_text='When the KYC documents were last reviewed', null=True, verbose_name='KYC reviewed at'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='kyc_submitted_at',
+            field=models.DateTimeField(blank=True, help_text='When the documents now awaiting review were submitted', null=True, verbose_name='KYC submitted at'),
+        ),
+        migrations.RunPython(
+            backfill_kyc_submitted_at,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('kyc_status__in', ['PENDING', 'RESUBMISSION_REQUIRED'])), fields=['kyc_submitted_at', 'id'], name='users_kyc_queue_idx'),
+        ),
+        migrations.AddField(
+            model_name='kycreview',
+            name='reviewer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='kycreview',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='kyc_reviews', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
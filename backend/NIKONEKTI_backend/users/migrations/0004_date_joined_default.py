@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_kyc_review_queue'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='date_joined',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='date joined'),
+        ),
+    ]
@@ -6,8 +6,12 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.core.validators import RegexValidator
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from . import hashing
+from .phone import normalize_phone_number
+
 """
 EXPLANATION - IMPORTS:
 - models: Django's ORM for database operations
@@ -16,6 +20,8 @@ EXPLANATION - IMPORTS:
 - BaseUserManager: Base class for creating custom user manager
 - RegexValidator: Validates fields using regular expressions
 - gettext_lazy: Enables internationalization (translation support)
+- hashing: Bounded worker pool that password hashing runs in
+- normalize_phone_number: Canonicalizes 0712.../255712.../+255 712... input
 """
 
 
@@ -35,6 +41,41 @@ class UserManager(BaseUserManager):
     which is more suitable for Tanzania where phone numbers are unique.
     """
     
+    def _build_user(self, phone_number, full_name, **extra_fields):
+        """Validate required fields and build an unsaved user (no password yet)."""
+        if not phone_number:
+            raise ValueError(_('The phone number must be set'))
+        if not full_name:
+            raise ValueError(_('The full name must be set'))
+        
+        return self.model(
+            phone_number=self.model.normalize_username(phone_number),
+            full_name=full_name,
+            **extra_fields
+        )
+    
+    def make_user(self, phone_number, full_name, password=None, **extra_fields):
+        """
+        Build an unsaved user with its password already hashed.
+        
+        EXPLANATION:
+        Hashing is slow (hundreds of milliseconds). Callers that save inside
+        a transaction, like users.services.register_user, build the user
+        first so the write lock is not held while the password is hashed.
+        """
+        user = self._build_user(phone_number, full_name, **extra_fields)
+        user.set_password(password)  # Automatically hashes the password
+        return user
+    
+    async def amake_user(self, phone_number, full_name, password=None, **extra_fields):
+        """
+        Async counterpart of make_user(): awaits the hashing pool instead
+        of blocking the event loop while the password is hashed.
+        """
+        user = self._build_user(phone_number, full_name, **extra_fields)
+        await user.aset_password(password)
+        return user
+    
     def create_user(self, phone_number, full_name, password=None, **extra_fields):
         """
         Create and save a regular user with the given phone number and password.
@@ -51,20 +92,16 @@ class UserManager(BaseUserManager):
         3. Hash the password using set_password()
         4. Save to database
         """
-        if not phone_number:
-            raise ValueError(_('The phone number must be set'))
-        if not full_name:
-            raise ValueError(_('The full name must be set'))
-        
-        user = self.model(
-            phone_number=phone_number,
-            full_name=full_name,
-            **extra_fields
-        )
-        user.set_password(password)  # Automatically hashes the password
+        user = self.make_user(phone_number, full_name, password, **extra_fields)
         user.save(using=self._db)
         return user
     
+    async def acreate_user(self, phone_number, full_name, password=None, **extra_fields):
+        """Async counterpart of create_user()."""
+        user = await self.amake_user(phone_number, full_name, password, **extra_fields)
+        await user.asave(using=self._db)
+        return user
+    
     def create_superuser(self, phone_number, full_name, password=None, **extra_fields):
         """
         Create and save a superuser with admin privileges.
@@ -90,6 +127,18 @@ class UserManager(BaseUserManager):
             raise ValueError(_('Superuser must have is_superuser=True.'))
         
         return self.create_user(phone_number, full_name, password, **extra_fields)
+    
+    def get_by_natural_key(self, username):
+        """
+        Look up a user by phone number in any accepted format.
+        
+        EXAMPLE: '0712 345 678' finds the user stored as '+255712345678'.
+        """
+        return self.get(phone_number=self.model.normalize_username(username))
+    
+    async def aget_by_natural_key(self, username):
+        """See get_by_natural_key()."""
+        return await self.aget(phone_number=self.model.normalize_username(username))
 
 
 # ============================================================================
@@ -147,6 +196,12 @@ class User(AbstractBaseUser, PermissionsMixin):
         REJECTED = 'REJECTED', _('Rejected')
         RESUBMISSION_REQUIRED = 'RESUBMISSION_REQUIRED', _('Resubmission Required')
     
+    KYC_QUEUE_STATUSES = (KYCStatus.PENDING, KYCStatus.RESUBMISSION_REQUIRED)
+    """
+    REVIEW QUEUE: Statuses that appear in the KYC review queue (users/kyc.py).
+    Covered by the partial index in Meta.indexes.
+    """
+    
     # ========================================================================
     # SECTION 3B: PHONE NUMBER VALIDATOR
     # ========================================================================
@@ -248,6 +303,24 @@ class User(AbstractBaseUser, PermissionsMixin):
                            → REJECTED → RESUBMISSION_REQUIRED
     """
     
+    kyc_submitted_at = models.DateTimeField(
+        _('KYC submitted at'),
+        blank=True,
+        null=True,
+        help_text=_('When the documents now awaiting review were submitted')
+    )
+    """
+    QUEUE ORDER: Reviewers work through the queue oldest submission first.
+    Set by users.kyc.submit_kyc().
+    """
+    
+    kyc_reviewed_at = models.DateTimeField(
+        _('KYC reviewed at'),
+        blank=True,
+        null=True,
+        help_text=_('When the KYC documents were last reviewed')
+    )
+    
     # ========================================================================
     # SECTION 3E: ADDITIONAL FIELDS (OPTIONAL DATA)
     # ========================================================================
@@ -310,10 +383,12 @@ class User(AbstractBaseUser, PermissionsMixin):
     # SECTION 3G: TIMESTAMP FIELDS (AUDIT TRAIL)
     # ========================================================================
     
-    date_joined = models.DateTimeField(_('date joined'), auto_now_add=True)
+    date_joined = models.DateTimeField(_('date joined'), default=timezone.now, editable=False)
     """
     REGISTRATION DATE: Set once when user is created.
-    - auto_now_add=True: Automatically set on creation
+    - default=timezone.now: Set on creation unless given, as with
+      Django's AbstractUser (auto_now_add would overwrite the dates of
+      imported or generated users)
     - Never changes after initial creation
     """
     
@@ -386,17 +461,27 @@ class User(AbstractBaseUser, PermissionsMixin):
         """
         
         indexes = [
-            models.Index(fields=['phone_number']),
             models.Index(fields=['role']),
-            models.Index(fields=['kyc_status']),
+            models.Index(
+                fields=['kyc_submitted_at', 'id'],
+                name='users_kyc_queue_idx',
+                condition=models.Q(kyc_status__in=['PENDING', 'RESUBMISSION_REQUIRED']),
+            ),
         ]
         """
         DATABASE INDEXES: Speed up queries on these fields.
         
         WHY THESE FIELDS:
-        - phone_number: Used in login (frequent lookups)
         - role: Filtering by user type (landlords, tenants)
-        - kyc_status: Admin filtering verified users
+        - users_kyc_queue_idx: PARTIAL index holding only the rows in the
+          KYC review queue, in submission order. With millions of users
+          and a few thousand pending it stays tiny, and the queue is read
+          straight off it. The condition must match the one in
+          users.kyc.review_queue() for the database to use it.
+        
+        phone_number is NOT listed: unique=True already creates an index
+        that login lookups use. A second index on it would only double the
+        cost of every write.
         
         BENEFIT: Faster queries, especially with large datasets.
         """
@@ -427,6 +512,19 @@ class User(AbstractBaseUser, PermissionsMixin):
         """
         return self.full_name
     
+    @classmethod
+    def normalize_username(cls, username):
+        """
+        NORMALIZE PHONE NUMBER: Called by Django's clean() and by UserManager.
+        
+        RETURNS: '+255XXXXXXXXX' for any accepted Tanzanian format.
+        Unrecognized input is returned unchanged so phone_regex can report it.
+        """
+        try:
+            return normalize_phone_number(username)
+        except ValueError:
+            return super().normalize_username(username)
+    
     def get_short_name(self):
         """
         SHORT NAME METHOD: Required by Django auth system.
@@ -501,8 +599,108 @@ class User(AbstractBaseUser, PermissionsMixin):
             # Show "Complete KYC" message
         
         PREVENTS: Unverified users from posting fake properties
+        
+        CACHING: Saved users answer from their AuthorizationSnapshot (see
+        users/authorization.py), the same one the permission classes use.
+        """
+        if self.pk is None:
+            return (self.is_landlord or self.is_agent) and self.kyc_approved
+        return self.get_authorization().can_post_properties
+    
+    def get_authorization(self):
+        """
+        AUTHORIZATION SNAPSHOT: Role, KYC approval and flattened permissions.
+        
+        Cached per user and invalidated when any of them change, so
+        repeated checks cost at most one query.
+        """
+        from .authorization import get_authorization
+        return get_authorization(self)
+
+    # ========================================================================
+    # SECTION 3L: PASSWORD HASHING (WORKER POOL)
+    # ========================================================================
+
+    def set_password(self, raw_password):
+        """
+        HASH PASSWORD: Same as Django's, but hashed in the worker pool.
+
+        See users/hashing.py. Raises HashingUnavailable (HTTP 503) when
+        the pool is saturated instead of blocking the request thread.
+        """
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    async def aset_password(self, raw_password):
+        """ASYNC HASH: Awaits the worker pool instead of blocking the event loop."""
+        self.password = await hashing.amake_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
         """
-        return (self.is_landlord or self.is_agent) and self.kyc_approved
+        VERIFY PASSWORD: Same as Django's, but verified in the worker pool.
+
+        On success, hashes made with an outdated hasher (or one other than
+        PASSWORD_HASHING['PREFERRED_HASHER']) are transparently upgraded.
+        """
+        def setter(raw_password):
+            self.set_password(raw_password)
+            # Password hash upgrades shouldn't be considered password changes.
+            self._password = None
+            self.save(update_fields=['password'])
+
+        return hashing.check_password(raw_password, self.password, setter)
+
+    async def acheck_password(self, raw_password):
+        """ASYNC VERIFY: Awaits the worker pool instead of blocking the event loop."""
+        async def setter(raw_password):
+            await self.aset_password(raw_password)
+            self._password = None
+            await self.asave(update_fields=['password'])
+
+        return await hashing.acheck_password(raw_password, self.password, setter)
+
+
+# ============================================================================
+# SECTION 4: KYC AUDIT LOG
+# ============================================================================
+# Purpose: Record every KYC decision made through users.kyc.review_kyc()
+
+class KYCReview(models.Model):
+    """
+    One KYC decision about one user.
+    
+    EXPLANATION:
+    Batch reviews write these with a single bulk INSERT. Rows stay small:
+    two ids, two short statuses, a timestamp and an optional note shared
+    by the whole batch.
+    """
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='kyc_reviews',
+    )
+    reviewer = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    previous_status = models.CharField(max_length=25, choices=User.KYCStatus.choices)
+    status = models.CharField(max_length=25, choices=User.KYCStatus.choices)
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'users_kyc_review'
+        ordering = ['-created_at']
+        verbose_name = _('KYC review')
+        verbose_name_plural = _('KYC reviews')
+    
+    def __str__(self):
+        return f"{self.user_id}: {self.previous_status} → {self.status}"
 
 
 # ============================================================================
@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KYCQueuePagination(CursorPagination):
+    """
+    Keyset pagination over the KYC review queue.
+
+    Each page continues from the last (kyc_submitted_at, id) seen, so a
+    page deep in a long queue costs the same as the first one, and
+    approvals made between pages never shift rows into or out of view.
+    """
+    ordering = ('kyc_submitted_at', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -1,37 +1,111 @@
+from rest_framework import permissions
 from rest_framework.permissions import BasePermission
 
+from .authorization import aget_authorization, get_authorization
+from .models import User
 
-class IsTenant(BasePermission):
+
+class AsyncPermissionMixin:
     """
-    Allows access only to TENANT users.
+    Adds ahas_permission() for the ASGI views in users/async_views.py.
+
+    Checks that only read request.user (already loaded by authentication)
+    do no I/O, so the async variant simply reuses has_permission().
     """
 
-    def has_permission(self, request, view):
-        return (
-            request.user.is_authenticated
-            and request.user.role == 'TENANT'
-        )
+    async def ahas_permission(self, request, view):
+        return self.has_permission(request, view)
 
 
-class IsLandlord(BasePermission):
+class IsAuthenticated(AsyncPermissionMixin, permissions.IsAuthenticated):
     """
-    Allows access only to LANDLORD users.
+    DRF's IsAuthenticated, usable without a thread hop from async views.
+    """
+
+
+class AllowAny(AsyncPermissionMixin, permissions.AllowAny):
+    """
+    DRF's AllowAny, usable without a thread hop from async views.
+    """
+
+
+class SnapshotPermission(BasePermission):
     """
+    Base for checks that read the user's AuthorizationSnapshot.
+
+    The snapshot is memoized on request.user, so however many of these a
+    view stacks, a request costs at most one authorization query (and none
+    once the snapshot is cached). Subclasses implement check().
+    """
+
+    def check(self, authz, request, view):
+        raise NotImplementedError
 
     def has_permission(self, request, view):
-        return (
-            request.user.is_authenticated
-            and request.user.role == 'LANDLORD'
-        )
+        authz = get_authorization(request.user)
+        return authz.is_authenticated and self.check(authz, request, view)
+
+    async def ahas_permission(self, request, view):
+        authz = await aget_authorization(request.user)
+        return authz.is_authenticated and self.check(authz, request, view)
+
+
+class RolePermission(SnapshotPermission):
+    """
+    Allows access only to users whose role is ``role``.
+    """
+    role = None
+
+    def check(self, authz, request, view):
+        return authz.role == self.role
+
+
+class IsTenant(RolePermission):
+    """
+    Allows access only to TENANT users.
+    """
+    role = User.Role.TENANT
+
+
+class IsLandlord(RolePermission):
+    """
+    Allows access only to LANDLORD users.
+    """
+    role = User.Role.LANDLORD
 
 
-class IsAgent(BasePermission):
+class IsAgent(RolePermission):
     """
     Allows access only to AGENT users.
     """
+    role = User.Role.AGENT
 
-    def has_permission(self, request, view):
-        return (
-            request.user.is_authenticated
-            and request.user.role == 'AGENT'
-        )
+
+class CanPostProperties(SnapshotPermission):
+    """
+    Allows access only to KYC-approved landlords and agents.
+    """
+    message = "Complete KYC verification to post properties."
+
+    def check(self, authz, request, view):
+        return authz.can_post_properties
+
+
+class HasModelPermissions(SnapshotPermission):
+    """
+    Allows access only to users holding every permission in ``perms``
+    ('app_label.codename'), directly or through a group.
+    """
+    perms = ()
+
+    def check(self, authz, request, view):
+        return authz.has_perms(self.perms)
+
+
+class IsKYCReviewer(SnapshotPermission):
+    """
+    Allows access only to staff who may change users.
+    """
+
+    def check(self, authz, request, view):
+        return authz.is_staff and authz.has_perm('users.change_user')
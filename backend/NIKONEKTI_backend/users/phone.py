@@ -0,0 +1,73 @@
+import re
+
+
+CANONICAL_PREFIX = '+255'
+
+# Separators people type between digit groups: "+255 712-345.678", "(0712) 345 678".
+_SEPARATORS = re.compile(r'[\s\-.()/]')
+_SUBSCRIBER = re.compile(r'[67]\d{8}')
+
+
+def normalize_phone_number(value):
+    """
+    Return ``value`` as a canonical Tanzanian mobile number, +255XXXXXXXXX.
+
+    Accepts the formats users actually type: 0712345678, 712345678,
+    255712345678, +255712345678, 00255712345678, with any spaces, dashes,
+    dots or brackets between digits. Raises ValueError for anything that is
+    not a Tanzanian mobile number (subscriber part 6XXXXXXXX or 7XXXXXXXX).
+    """
+    if value is None:
+        raise ValueError('Phone number is required')
+
+    digits = _SEPARATORS.sub('', str(value))
+    if digits.startswith('+255'):
+        subscriber = digits[4:]
+    elif digits.startswith('00255'):
+        subscriber = digits[5:]
+    elif digits.startswith('255') and len(digits) == 12:
+        subscriber = digits[3:]
+    elif digits.startswith('0') and len(digits) == 10:
+        subscriber = digits[1:]
+    else:
+        subscriber = digits
+
+    if not _SUBSCRIBER.fullmatch(subscriber):
+        raise ValueError(f'{value!r} is not a Tanzanian mobile number')
+    return CANONICAL_PREFIX + subscriber
+
+
+_PARTIAL_SUBSCRIBER = re.compile(r'[67]\d{0,8}')
+
+
+def phone_number_prefix(value):
+    """
+    Return the canonical prefix of a partly typed number, or None.
+
+    "0712 34" -> "+25571234", "+25571" -> "+25571", "7123" -> "+2557123".
+    Used for prefix search, which can walk the phone_number index where a
+    '%term%' match cannot. Returns None for anything that could not be the
+    start of a Tanzanian mobile number.
+    """
+    digits = _SEPARATORS.sub('', str(value))
+    if digits.startswith('+'):
+        rest = digits[1:]
+        if not rest.isdigit() or not '255'.startswith(rest[:3]):
+            return None
+        if len(rest) <= 3:
+            return '+' + rest
+        subscriber = rest[3:]
+    elif not digits.isdigit():
+        return None
+    elif digits.startswith('00255'):
+        subscriber = digits[5:]
+    elif digits.startswith('255'):
+        subscriber = digits[3:]
+    elif digits.startswith('0'):
+        subscriber = digits[1:]
+    else:
+        subscriber = digits
+
+    if subscriber and not _PARTIAL_SUBSCRIBER.fullmatch(subscriber):
+        return None
+    return CANONICAL_PREFIX + subscriber
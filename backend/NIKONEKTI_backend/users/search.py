@@ -0,0 +1,188 @@
+import logging
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .phone import phone_number_prefix
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_USER_SEARCH = {
+    # Dotted path of the NameSearch to use, or None to pick one by
+    # database vendor from NAME_SEARCH_BACKENDS.
+    'NAME_BACKEND': None,
+}
+
+NAME_SEARCH_BACKENDS = {
+    'sqlite': 'users.search.SQLiteFTS5NameSearch',
+    'postgresql': 'users.search.PostgresTrigramNameSearch',
+}
+
+
+def get_search_options():
+    return {
+        **DEFAULT_USER_SEARCH,
+        **getattr(settings, 'USER_SEARCH', {}),
+    }
+
+
+# ======================================================
+# PHONE NUMBER PREFIX SEARCH
+# ======================================================
+
+def filter_phone_prefix(queryset, term):
+    """
+    Users whose phone number starts with ``term``, or None if ``term`` is
+    not the start of a phone number.
+
+    Written as a range (prefix <= phone_number < next prefix) rather than
+    LIKE 'prefix%' so every database can walk the unique phone_number
+    index; SQLite only does that for LIKE on NOCASE columns.
+    """
+    prefix = phone_number_prefix(term)
+    if prefix is None:
+        return None
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return queryset.filter(phone_number__gte=prefix, phone_number__lt=upper)
+
+
+# ======================================================
+# NAME SEARCH BACKENDS
+# ======================================================
+
+class NameSearch:
+    """
+    Indexed full_name search. ``install()`` creates whatever the backend
+    needs and runs after every migrate, so it must be idempotent.
+    """
+
+    def install(self, connection):
+        pass
+
+    def filter(self, queryset, term):
+        raise NotImplementedError
+
+
+class ContainsNameSearch(NameSearch):
+    """Unindexed '%term%' matching; the fallback for other databases."""
+
+    def filter(self, queryset, term):
+        return queryset.filter(full_name__icontains=term)
+
+
+class SQLiteFTS5NameSearch(NameSearch):
+    """
+    Token-prefix search over an FTS5 index of users.full_name.
+
+    "ash mus" matches "Asha Mussa": every word typed must start a word of
+    the name. users_fts is an external-content table, so it stores only
+    the index; triggers keep it in step with the users table.
+    """
+    table = 'users_fts'
+
+    def install(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [self.table],
+            )
+            created = cursor.fetchone() is None
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                f"full_name, content='users', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            # Django rebuilds a table to alter it on SQLite, which drops its
+            # triggers; recreating them here after each migrate repairs that.
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                [f'{self.table}_%'],
+            )
+            missing_triggers = cursor.fetchone()[0] < 3
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {self.table}_ai AFTER INSERT ON users BEGIN "
+                f"INSERT INTO {self.table}(rowid, full_name) VALUES (new.id, new.full_name); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {self.table}_ad AFTER DELETE ON users BEGIN "
+                f"INSERT INTO {self.table}({self.table}, rowid, full_name) "
+                f"VALUES ('delete', old.id, old.full_name); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {self.table}_au AFTER UPDATE OF full_name ON users BEGIN "
+                f"INSERT INTO {self.table}({self.table}, rowid, full_name) "
+                f"VALUES ('delete', old.id, old.full_name); "
+                f"INSERT INTO {self.table}(rowid, full_name) VALUES (new.id, new.full_name); END"
+            )
+            if created or missing_triggers:
+                cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+
+    @staticmethod
+    def match_expression(term):
+        words = re.findall(r'\w+', term)
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def filter(self, queryset, term):
+        match = self.match_expression(term)
+        if not match:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match],
+        ))
+
+
+class PostgresTrigramNameSearch(NameSearch):
+    """
+    '%term%' matching served by a pg_trgm GIN index on full_name.
+    """
+    index = 'users_full_name_trgm'
+
+    def install(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.index} '
+                f'ON users USING gin (full_name gin_trgm_ops)'
+            )
+
+    def filter(self, queryset, term):
+        return queryset.filter(full_name__icontains=term)
+
+
+def get_name_search(using='default'):
+    path = get_search_options()['NAME_BACKEND']
+    if path is None:
+        vendor = connections[using].vendor
+        path = NAME_SEARCH_BACKENDS.get(vendor, 'users.search.ContainsNameSearch')
+    return import_string(path)()
+
+
+def install_name_search(using='default', **kwargs):
+    """post_migrate hook: create or repair the name search index."""
+    try:
+        get_name_search(using).install(connections[using])
+    except Exception:
+        logger.exception('Could not install the user name search index on %r', using)
+
+
+# ======================================================
+# COMBINED SEARCH
+# ======================================================
+
+def search_users(queryset, term):
+    """
+    Phone number prefix search if ``term`` looks like the start of a
+    number, otherwise an indexed name search.
+    """
+    term = term.strip()
+    if not term:
+        return queryset
+    results = filter_phone_prefix(queryset, term)
+    if results is None:
+        results = get_name_search(queryset.db).filter(queryset, term)
+    return results
@@ -1,8 +1,32 @@
-from django.contrib.auth import authenticate
+from django.contrib.auth import aauthenticate, authenticate
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
+from .activity import get_login_recorder
+from .kyc import DECISIONS, REVIEW_BATCH_SIZE
 from .models import User
+from .phone import normalize_phone_number
+from .services import PhoneNumberTaken, aregister_user, register_user
+
+
+# ======================================================
+# FIELDS
+# ======================================================
+
+class PhoneNumberField(serializers.CharField):
+    """
+    Accepts 0712..., 255712..., +255 712 ... and returns +255XXXXXXXXX.
+    """
+    default_error_messages = {
+        'invalid_phone': "Phone number must be a Tanzanian mobile number, e.g. +255712345678.",
+    }
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        try:
+            return normalize_phone_number(value)
+        except ValueError:
+            self.fail('invalid_phone')
 
 
 # ======================================================
@@ -13,28 +37,50 @@ class LoginSerializer(serializers.Serializer):
     phone_number = serializers.CharField()
     password = serializers.CharField(write_only=True)
 
-    def validate(self, data):
-        phone_number = data.get('phone_number')
-        password = data.get('password')
+    default_error_messages = {
+        'invalid_credentials': "Invalid phone number or password",
+        'inactive': "User account is disabled",
+    }
 
+    def validate(self, data):
         user = authenticate(
             request=self.context.get('request'),
-            phone_number=phone_number,
-            password=password
+            phone_number=data.get('phone_number'),
+            password=data.get('password')
         )
+        self.check_user(user)
 
-        if not user:
-            raise serializers.ValidationError(
-                "Invalid phone number or password"
-            )
-
-        if not user.is_active:
-            raise serializers.ValidationError(
-                "User account is disabled"
-            )
+        # Buffered; written in a batched UPDATE by LoginActivityRecorder.
+        get_login_recorder().record(user)
 
         token, _ = Token.objects.get_or_create(user=user)
+        return self.login_payload(user, token)
+
+    async def avalidate(self, data):
+        """
+        Async counterpart of validate(), used by the ASGI login view.
+        Call it with the output of to_internal_value().
+        """
+        user = await aauthenticate(
+            request=self.context.get('request'),
+            phone_number=data.get('phone_number'),
+            password=data.get('password')
+        )
+        self.check_user(user)
+
+        await get_login_recorder().arecord(user)
+
+        token, _ = await Token.objects.aget_or_create(user=user)
+        return self.login_payload(user, token)
+
+    def check_user(self, user):
+        if not user:
+            self.fail('invalid_credentials')
+        if not user.is_active:
+            self.fail('inactive')
 
+    @staticmethod
+    def login_payload(user, token):
         return {
             'token': token.key,
             'user_id': user.id,
@@ -53,6 +99,10 @@ class RegisterSerializer(serializers.ModelSerializer):
         validators=[validate_password]
     )
     password2 = serializers.CharField(write_only=True)
+    # Uniqueness is enforced by the database constraint inside
+    # register_user(); declaring the field drops the default
+    # UniqueValidator, which would add a racy exists() query.
+    phone_number = PhoneNumberField(max_length=13, validators=[User.phone_regex])
 
     class Meta:
         model = User
@@ -64,13 +114,6 @@ class RegisterSerializer(serializers.ModelSerializer):
             'role',
         )
 
-    def validate_phone_number(self, value):
-        if User.objects.filter(phone_number=value).exists():
-            raise serializers.ValidationError(
-                "A user with this phone number already exists."
-            )
-        return value
-
     def validate(self, data):
         if data['password'] != data['password2']:
             raise serializers.ValidationError(
@@ -79,14 +122,56 @@ class RegisterSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        validated_data.pop('password2')
+        try:
+            return register_user(
+                phone_number=validated_data['phone_number'],
+                full_name=validated_data['full_name'],
+                password=validated_data['password'],
+                role=validated_data.get('role', User.Role.TENANT),
+            )
+        except PhoneNumberTaken:
+            raise serializers.ValidationError(
+                {"phone_number": ["A user with this phone number already exists."]}
+            )
+
+    async def acreate(self, validated_data):
+        """Async counterpart of create(), used by the ASGI register view."""
+        try:
+            return await aregister_user(
+                phone_number=validated_data['phone_number'],
+                full_name=validated_data['full_name'],
+                password=validated_data['password'],
+                role=validated_data.get('role', User.Role.TENANT),
+            )
+        except PhoneNumberTaken:
+            raise serializers.ValidationError(
+                {"phone_number": ["A user with this phone number already exists."]}
+            )
+
 
-        user = User.objects.create_user(
-            phone_number=validated_data['phone_number'],
-            full_name=validated_data['full_name'],
-            password=validated_data['password'],
-            role=validated_data.get('role', User.Role.TENANT),
+# ======================================================
+# KYC REVIEW SERIALIZERS
+# ======================================================
+
+class KYCQueueSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = (
+            'id',
+            'phone_number',
+            'full_name',
+            'role',
+            'kyc_status',
+            'kyc_submitted_at',
         )
+        read_only_fields = fields
 
-        Token.objects.create(user=user)
-        return user
+
+class KYCReviewSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=REVIEW_BATCH_SIZE * 10,
+    )
+    decision = serializers.ChoiceField(choices=DECISIONS)
+    note = serializers.CharField(max_length=255, allow_blank=True, default='')
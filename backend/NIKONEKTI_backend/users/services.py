@@ -0,0 +1,58 @@
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from rest_framework.authtoken.models import Token
+
+from .models import User
+
+
+class PhoneNumberTaken(Exception):
+    """Raised when registering a phone number that already has an account."""
+
+
+def register_user(phone_number, full_name, password, role=User.Role.TENANT):
+    """
+    Create a user and its auth token in a single transaction.
+
+    The password is hashed before the transaction opens so the write lock is
+    held only for the two INSERTs. Duplicate phone numbers are detected by
+    the unique constraint rather than a racy exists() pre-check.
+
+    Returns the saved user; its token is available as ``user.auth_token``
+    without another query.
+    """
+    user = User.objects.make_user(
+        phone_number=phone_number,
+        full_name=full_name,
+        password=password,
+        role=role,
+    )
+    return _save_with_token(user)
+
+
+async def aregister_user(phone_number, full_name, password, role=User.Role.TENANT):
+    """
+    Async counterpart of register_user().
+
+    The password is hashed while awaiting the hashing pool. Django's async
+    ORM has no transactions yet, so the two INSERTs run together in one
+    sync_to_async call that holds the transaction.
+    """
+    user = await User.objects.amake_user(
+        phone_number=phone_number,
+        full_name=full_name,
+        password=password,
+        role=role,
+    )
+    return await sync_to_async(_save_with_token)(user)
+
+
+def _save_with_token(user):
+    try:
+        with transaction.atomic():
+            user.save()
+            Token.objects.create(user=user)
+    except IntegrityError as exc:
+        if User.objects.filter(phone_number=user.phone_number).exists():
+            raise PhoneNumberTaken(user.phone_number) from exc
+        raise
+    return user
@@ -0,0 +1,113 @@
+from django.contrib.auth.models import Group, Permission
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .activity import get_login_recorder
+from .authentication import get_token_cache
+from .authorization import forget_authorization, get_authorization_cache
+from .models import User
+
+
+# Fields that change what an authenticated request is allowed to do. A save
+# restricted to other fields (e.g. update_fields=['last_login']) leaves
+# cached tokens untouched.
+TOKEN_CACHE_FIELDS = frozenset({
+    'password',
+    'phone_number',
+    'role',
+    'is_active',
+    'is_verified',
+    'kyc_status',
+    'is_staff',
+    'is_superuser',
+})
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    get_token_cache().invalidate(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and TOKEN_CACHE_FIELDS.isdisjoint(update_fields):
+        return
+    get_token_cache().invalidate_user(instance.pk)
+
+
+# Fields compiled into the AuthorizationSnapshot.
+AUTHORIZATION_FIELDS = frozenset({
+    'role',
+    'is_active',
+    'is_verified',
+    'kyc_status',
+    'is_staff',
+    'is_superuser',
+})
+
+
+@receiver(post_save, sender=User)
+def invalidate_authorization_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and AUTHORIZATION_FIELDS.isdisjoint(update_fields):
+        return
+    forget_authorization(instance)
+    get_authorization_cache().invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_authorization_on_delete(sender, instance, **kwargs):
+    get_authorization_cache().invalidate_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_authorization_on_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        forget_authorization(instance)
+        get_authorization_cache().invalidate_user(instance.pk)
+    elif pk_set:
+        # group.user_set.add(...) / permission.user_set.remove(...)
+        get_authorization_cache().invalidate_user(*pk_set)
+    else:
+        # A reverse clear() does not say which users it touched.
+        get_authorization_cache().invalidate_all()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_authorization_on_group_permissions(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        get_authorization_cache().invalidate_all()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_authorization_on_auth_delete(sender, **kwargs):
+    get_authorization_cache().invalidate_all()
+
+
+@receiver(pre_save, sender=User)
+def stamp_kyc_submission(sender, instance, update_fields=None, **kwargs):
+    # Users moved into the review queue by a plain save (e.g. in the admin)
+    # still need a submission time to be ordered by.
+    if (
+        instance.kyc_status in User.KYC_QUEUE_STATUSES
+        and instance.kyc_submitted_at is None
+        and update_fields is None
+    ):
+        instance.kyc_submitted_at = timezone.now()
+
+
+@receiver(user_logged_in)
+def record_login(sender, user, **kwargs):
+    # Replaces django.contrib.auth.models.update_last_login, which is
+    # disconnected in UsersConfig.ready().
+    get_login_recorder().record(user)
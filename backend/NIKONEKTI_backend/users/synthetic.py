@@ -0,0 +1,120 @@
+"""
+Synthetic users for ``manage.py seed_synthetic``.
+"""
+
+import math
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+
+from NIKONEKTI_backend.synthetic import DEFAULT_EPOCH, Generator, chunk_random, register
+
+from .models import User
+
+
+FIRST_NAMES = (
+    'Asha', 'Juma', 'Neema', 'Baraka', 'Rehema', 'Hamisi', 'Zawadi', 'Salim',
+    'Mwanaidi', 'Emmanuel', 'Upendo', 'Khamis', 'Fatuma', 'Daudi', 'Imani',
+)
+LAST_NAMES = (
+    'Mussa', 'Mwakyusa', 'Kassim', 'Njau', 'Mrema', 'Lyimo', 'Shayo',
+    'Massawe', 'Mollel', 'Kimaro', 'Mushi', 'Swai', 'Temba', 'Minja',
+)
+
+# Subscriber numbers after +255: a leading 6 or 7 and eight digits.
+PHONE_SPACE = 2 * 10**8
+
+ROLES = {
+    User.Role.TENANT: 0.82,
+    User.Role.LANDLORD: 0.13,
+    User.Role.AGENT: 0.05,
+}
+
+# Most tenants never submit documents; landlords and agents need
+# approval to list, so most of them have it.
+KYC_STATUSES = {
+    User.Role.TENANT: {
+        User.KYCStatus.NOT_SUBMITTED: 0.70,
+        User.KYCStatus.PENDING: 0.08,
+        User.KYCStatus.APPROVED: 0.18,
+        User.KYCStatus.REJECTED: 0.02,
+        User.KYCStatus.RESUBMISSION_REQUIRED: 0.02,
+    },
+    User.Role.LANDLORD: {
+        User.KYCStatus.NOT_SUBMITTED: 0.10,
+        User.KYCStatus.PENDING: 0.15,
+        User.KYCStatus.APPROVED: 0.65,
+        User.KYCStatus.REJECTED: 0.05,
+        User.KYCStatus.RESUBMISSION_REQUIRED: 0.05,
+    },
+}
+KYC_STATUSES[User.Role.AGENT] = KYC_STATUSES[User.Role.LANDLORD]
+
+# Signups are spread over this many days before --epoch, and each KYC
+# submission falls between its user's signup and --epoch.
+HISTORY_DAYS = 730
+
+
+def phone_number(index, multiplier, offset):
+    """
+    The ``index``-th number of a seeded permutation of all valid numbers;
+    distinct indexes never collide, so chunks need no coordination.
+    """
+    value = (index * multiplier + offset) % PHONE_SPACE
+    return f'+255{6 + value // 10**8}{value % 10**8:08d}'
+
+
+@register
+class UserGenerator(Generator):
+    name = 'users'
+    model = User
+    default_count = 10000
+
+    def context(self, count, seed, options):
+        if count > PHONE_SPACE:
+            raise ValueError(f'At most {PHONE_SPACE:,} users have distinct phone numbers')
+        rng = chunk_random(seed, self.name, 'phones')
+        multiplier = rng.randrange(1, PHONE_SPACE)
+        while math.gcd(multiplier, PHONE_SPACE) != 1:
+            multiplier = rng.randrange(1, PHONE_SPACE)
+        password = options.get('password')
+        return {
+            'multiplier': multiplier,
+            'offset': rng.randrange(PHONE_SPACE),
+            # One hash for everyone: hashing millions of passwords would
+            # dominate the run.
+            'password': make_password(password) if password else make_password(None),
+            # Fixed by --epoch, not the time of the run: the same seed
+            # always gives the same data.
+            'now': options.get('epoch') or DEFAULT_EPOCH,
+        }
+
+    def rows(self, rng, start, stop, context):
+        roles = list(ROLES)
+        role_weights = list(ROLES.values())
+        statuses = {role: (list(mix), list(mix.values())) for role, mix in KYC_STATUSES.items()}
+        now = context['now']
+        users = []
+        for index in range(start, stop):
+            role = rng.choices(roles, role_weights)[0]
+            kyc_status = rng.choices(*statuses[role])[0]
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            date_joined = now - timedelta(seconds=rng.uniform(0, HISTORY_DAYS * 86400))
+            submitted_at = reviewed_at = None
+            if kyc_status != User.KYCStatus.NOT_SUBMITTED:
+                submitted_at = date_joined + rng.uniform(0, 1) * (now - date_joined)
+            if kyc_status not in (User.KYCStatus.NOT_SUBMITTED, User.KYCStatus.PENDING):
+                reviewed_at = min(now, submitted_at + timedelta(seconds=rng.uniform(600, 3 * 86400)))
+            users.append(User(
+                phone_number=phone_number(index, context['multiplier'], context['offset']),
+                full_name=f'{first} {last}',
+                email=f'{first}.{last}{index}@example.com'.lower() if rng.random() < 0.3 else None,
+                role=role,
+                kyc_status=kyc_status,
+                is_verified=kyc_status == User.KYCStatus.APPROVED,
+                kyc_submitted_at=submitted_at,
+                kyc_reviewed_at=reviewed_at,
+                password=context['password'],
+                date_joined=date_joined,
+            ))
+        return users
@@ -1,3 +1,1040 @@
-from django.test import TestCase
+import csv
+import gzip
+import importlib
+import io
+import json
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import AnonymousUser, Group, Permission
+from django.core.exceptions import PermissionDenied as DjangoPermissionDenied
+from django.core.management import call_command
+from django.db import connection
+from django.http import Http404
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from NIKONEKTI_backend.cache import get_tiered_cache
+from NIKONEKTI_backend.replicas import PrimaryReplicaRouter, ReplicaRoutingMiddleware, get_sticky_clients
+from NIKONEKTI_backend.testing import QueryBudgetMixin
+
+from . import hashing
+from .async_views import AsyncAPIView, AsyncLoginAPIView, AsyncLogoutAPIView, AsyncRegisterAPIView
+from .activity import LoginActivityRecorder
+from .authentication import CachedTokenAuthentication, get_token_cache
+from .authorization import forget_authorization, get_authorization, get_authorization_cache
+from .backends import PhoneNumberBackend
+from .hashing import HashingExecutor, HashingUnavailable
+from .kyc import review_kyc, review_queue, submit_kyc
+from .models import KYCReview, User
+from .permission import CanPostProperties, IsLandlord, IsTenant
+from .phone import normalize_phone_number, phone_number_prefix
+from .search import search_users
+from .services import PhoneNumberTaken, register_user
+from .throttling import (
+    LocalWindowStore,
+    SharedWindowStore,
+    SlidingWindowLimiter,
+    reset_throttle_stores,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'},
+})
+class UsersTestCase(QueryBudgetMixin, TestCase):
+    """Starts every test with empty process-wide token, cache and throttle state."""
+
+    def setUp(self):
+        super().setUp()
+        get_tiered_cache().clear()
+        get_token_cache().clear()
+        get_authorization_cache().clear()
+        reset_throttle_stores(sender=None, setting='THROTTLING')
+
+
+class CachedTokenAuthenticationTests(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            phone_number='+255712345678',
+            full_name='Asha Mussa',
+            password='s3cure-Passw0rd',
+            role=User.Role.LANDLORD,
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_second_lookup_skips_database(self):
+        with self.assertNumQueries(1):
+            self.auth.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_cached_user_is_copied_per_request(self):
+        first, _ = self.auth.authenticate_credentials(self.token.key)
+        first.role = User.Role.TENANT
+        second, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(second.role, User.Role.LANDLORD)
+
+    def test_unknown_token_is_not_cached(self):
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials('0' * 40)
+        self.assertEqual(len(get_token_cache().local), 0)
+
+    def test_role_change_invalidates_cache(self):
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.role = User.Role.AGENT
+        self.user.save()
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user.role, User.Role.AGENT)
+
+    def test_deactivation_invalidates_cache(self):
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_unrelated_update_keeps_cache(self):
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_logout_invalidates_cache(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = client.post(reverse('users:logout'))
+        self.assertEqual(response.status_code, 200)
+        response = client.post(reverse('users:logout'))
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        TOKEN_AUTH_CACHE={'SHARED_CACHE_ALIAS': 'default'},
+    )
+    def test_shared_tier_fills_local_tier(self):
+        cache = get_token_cache()
+        self.auth.authenticate_credentials(self.token.key)
+        cache.local.clear()
+        with self.assertNumQueries(0):
+            self.auth.authenticate_credentials(self.token.key)
+        self.assertIn(self.token.key, cache.local)
+        self.token.delete()
+        self.assertIsNone(cache.get(self.token.key))
+
+
+class HashingExecutorTests(UsersTestCase):
+    def test_rejects_when_saturated(self):
+        executor = HashingExecutor(max_workers=1, max_queue=0, retry_after=3)
+        release = threading.Event()
+        try:
+            future = executor.submit(release.wait)
+            with self.assertRaises(HashingUnavailable) as ctx:
+                executor.submit(release.wait)
+            self.assertEqual(ctx.exception.wait, 3)
+            self.assertEqual(executor.metrics.snapshot()['rejected'], 1)
+        finally:
+            release.set()
+            future.result()
+            executor.shutdown()
+
+    def test_records_metrics(self):
+        executor = HashingExecutor(max_workers=1, max_queue=1)
+        try:
+            self.assertEqual(executor.run(sum, [1, 2]), 3)
+        finally:
+            executor.shutdown()
+        snapshot = executor.metrics.snapshot()
+        self.assertEqual(snapshot['completed'], 1)
+        self.assertGreaterEqual(snapshot['hash_time_avg'], 0)
+
+    def test_async_entry_points(self):
+        encoded = async_to_sync(hashing.amake_password)('s3cure-Passw0rd')
+        self.assertTrue(async_to_sync(hashing.acheck_password)('s3cure-Passw0rd', encoded))
+        self.assertFalse(async_to_sync(hashing.acheck_password)('wrong', encoded))
+
+    @override_settings(PASSWORD_HASHING={'MAX_WORKERS': 1, 'MAX_QUEUE': 0})
+    def test_login_returns_503_when_saturated(self):
+        User.objects.create_user(
+            phone_number='+255712345678',
+            full_name='Asha Mussa',
+            password='s3cure-Passw0rd',
+        )
+        release = threading.Event()
+        executor = hashing.get_hashing_executor()
+        future = executor.submit(release.wait)
+        try:
+            response = APIClient().post(reverse('users:login'), {
+                'phone_number': '+255712345678',
+                'password': 's3cure-Passw0rd',
+            })
+        finally:
+            release.set()
+            future.result()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    @override_settings(
+        PASSWORD_HASHERS=[
+            'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+            'django.contrib.auth.hashers.MD5PasswordHasher',
+        ],
+    )
+    def test_rehashes_to_preferred_hasher_on_login(self):
+        user = User.objects.create_user(
+            phone_number='+255712345678',
+            full_name='Asha Mussa',
+            password='s3cure-Passw0rd',
+        )
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+        with self.settings(PASSWORD_HASHING={'PREFERRED_HASHER': 'md5'}):
+            self.assertTrue(user.check_password('s3cure-Passw0rd'))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('md5$'))
+
+
+class RegistrationTests(UsersTestCase):
+    payload = {
+        'phone_number': '+255712345678',
+        'full_name': 'Asha Mussa',
+        'password': 's3cure-Passw0rd',
+        'password2': 's3cure-Passw0rd',
+        'role': 'LANDLORD',
+    }
+
+    def test_register_writes_user_and_token_without_reads(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = APIClient().post(reverse('users:register'), self.payload)
+        self.assertEqual(response.status_code, 201)
+        statements = [q['sql'].split()[0].upper() for q in ctx.captured_queries]
+        self.assertEqual(statements.count('INSERT'), 2)
+        self.assertNotIn('SELECT', statements)
+
+        user = User.objects.get(phone_number=self.payload['phone_number'])
+        self.assertEqual(response.data['token'], user.auth_token.key)
+        self.assertEqual(response.data['role'], User.Role.LANDLORD)
+
+    def test_duplicate_phone_number_is_rejected(self):
+        client = APIClient()
+        client.post(reverse('users:register'), self.payload)
+        response = client.post(reverse('users:register'), self.payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('phone_number', response.data)
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(Token.objects.count(), 1)
+
+    def test_register_user_service_is_atomic(self):
+        register_user('+255712345678', 'Asha Mussa', 's3cure-Passw0rd')
+        with self.assertRaises(PhoneNumberTaken):
+            register_user('+255712345678', 'Juma Ali', 'an0ther-Passw0rd')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportUsersCommandTests(UsersTestCase):
+    def run_import(self, content, suffix, *args):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / f'users{suffix}'
+            source.write_text(content)
+            report = Path(tmp) / 'errors.csv'
+            call_command(
+                'import_users', str(source), '--workers', '0', '--chunk-size', '2',
+                '--report', str(report), *args, stdout=io.StringIO(),
+            )
+            return list(csv.DictReader(report.open()))
+
+    def test_imports_csv_with_tokens_and_reports_bad_rows(self):
+        User.objects.create_user('+255700000003', 'Existing', 'pw')
+        errors = self.run_import(
+            'phone_number,full_name,role,password\n'
+            '+255700000001,Asha Mussa,landlord,s3cure-Passw0rd\n'
+            '0700 000 002,Juma Ali,AGENT,\n'
+            '+255700000001,Duplicate,TENANT,x\n'
+            '+255700000003,Already There,TENANT,x\n'
+            '0812345678,Bad Phone,TENANT,x\n'
+            '+255700000004,Bad Role,OWNER,x\n',
+            '.csv',
+        )
+        self.assertEqual(
+            [(e['line'], e['phone_number']) for e in errors],
+            [('4', '+255700000001'), ('5', '+255700000003'), ('6', '0812345678'), ('7', '+255700000004')],
+        )
+        asha = User.objects.get(phone_number='+255700000001')
+        self.assertEqual(asha.role, User.Role.LANDLORD)
+        self.assertTrue(asha.check_password('s3cure-Passw0rd'))
+        juma = User.objects.get(phone_number='+255700000002')
+        self.assertFalse(juma.has_usable_password())
+        self.assertEqual(Token.objects.filter(user__in=[asha, juma]).count(), 2)
+
+    def test_imports_jsonl(self):
+        errors = self.run_import(
+            '{"phone_number": "+255600000001", "full_name": "Neema", "password": "pw"}\n'
+            'not json\n'
+            '{"phone_number": 712345678, "full_name": "Numeric Phone"}\n'
+            '{"phone_number": "+255600000002", "full_name": "Listed Role", "role": ["TENANT"]}\n'
+            '{"phone_number": "+255600000003", "full_name": "Baraka"}\n',
+            '.jsonl',
+            '--unusable-passwords',
+        )
+        self.assertEqual([e['line'] for e in errors], ['2', '3', '4'])
+        self.assertEqual(errors[1]['error'], 'phone_number must be a string')
+        self.assertTrue(User.objects.filter(phone_number='+255600000003').exists())
+        self.assertFalse(User.objects.get(phone_number='+255600000001').has_usable_password())
+
+
+@override_settings(LOGIN_ACTIVITY={'FLUSH_INTERVAL': 0})
+class ExportUsersTests(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.asha = User.objects.create_user('+255712345678', 'Asha, "Mama" Mussa', 'pw', role=User.Role.LANDLORD)
+        self.juma = User.objects.create_user('+255754000111', 'Juma Hamisi', 'pw')
+        User.objects.filter(pk=self.juma.pk).update(kyc_status=User.KYCStatus.APPROVED)
+
+    def run_export(self, name, *args):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / name
+            call_command(
+                'export_users', '--output', str(output), '--chunk-size', '1', *args,
+                stdout=io.StringIO(),
+            )
+            data = output.read_bytes()
+        return gzip.decompress(data) if name.endswith('.gz') else data
+
+    def test_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.run_export('users.csv').decode())))
+        self.assertEqual([row['phone_number'] for row in rows], ['+255712345678', '+255754000111'])
+        self.assertEqual(rows[0]['full_name'], 'Asha, "Mama" Mussa')
+        self.assertEqual(rows[0]['last_login'], '')
+        self.assertNotIn('password', rows[0])
+
+    def test_gzipped_jsonl_with_filters(self):
+        lines = self.run_export('users.jsonl.gz', '--kyc-status', 'APPROVED').splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [self.juma.pk])
+        self.assertEqual(self.run_export('users.jsonl', '--role', 'AGENT'), b'')
+
+    def test_admin_action_streams_gzip(self):
+        admin_user = User.objects.create_superuser('+255700000001', 'Admin', 's3cure-Passw0rd')
+        self.client.force_login(admin_user)
+        response = self.client.post(reverse('admin:users_user_changelist'), {
+            'action': 'export_csv_gz',
+            '_selected_action': [self.asha.pk, self.juma.pk],
+        })
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.csv.gz"', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(gzip.decompress(response.getvalue()).decode())))
+        self.assertEqual([row[1] for row in rows[1:]], ['+255712345678', '+255754000111'])
+
+
+class SeedSyntheticTests(UsersTestCase):
+    def seed(self, chunk_size=70, **options):
+        call_command('seed_synthetic', workers=0, chunk_size=chunk_size, stdout=io.StringIO(), **options)
+        return list(User.objects.order_by('phone_number').values_list(
+            'phone_number', 'full_name', 'role', 'kyc_status', 'is_verified',
+        ))
+
+    def test_deterministic_valid_users(self):
+        users = self.seed(users=300, seed=7)
+        self.assertEqual(len(users), 300)
+        for phone_number, *_ in users:
+            User.phone_regex(phone_number)
+        self.assertEqual({role for _, _, role, _, _ in users}, set(User.Role.values))
+        self.assertTrue(all(
+            verified == (kyc_status == User.KYCStatus.APPROVED)
+            for *_, kyc_status, verified in users
+        ))
+        self.assertEqual(
+            User.objects.filter(kyc_status=User.KYCStatus.PENDING, kyc_submitted_at__isnull=True).count(), 0,
+        )
+
+        # Same seed, different chunking: the same rows, nothing added.
+        self.assertEqual(self.seed(users=300, seed=7, chunk_size=300), users)
+
+        User.objects.all().delete()
+        self.assertNotEqual(self.seed(users=300, seed=8), users)
+
+    def test_timestamps_depend_on_epoch_not_run_time(self):
+        def history(**options):
+            User.objects.all().delete()
+            self.seed(users=100, seed=7, listings=0, **options)
+            return list(User.objects.order_by('phone_number').values_list(
+                'date_joined', 'kyc_submitted_at', 'kyc_reviewed_at',
+            ))
+
+        first = history()
+        self.assertTrue(any(submitted for _, submitted, _ in first))
+        self.assertEqual(history(), first)
+        epoch = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        shifted = history(epoch=epoch)
+        self.assertNotEqual(shifted, first)
+        for joined, submitted, reviewed in shifted:
+            # A user submits KYC after signing up, and is reviewed after.
+            self.assertLessEqual(joined, submitted or joined)
+            self.assertLessEqual(submitted or joined, reviewed or epoch)
+            self.assertLessEqual(reviewed or joined, epoch)
+
+
+class PhoneNumberNormalizationTests(UsersTestCase):
+    def test_accepts_common_formats(self):
+        for raw in (
+            '+255712345678',
+            '255712345678',
+            '0712345678',
+            '712345678',
+            '00255712345678',
+            '+255 712 345 678',
+            '0712-345-678',
+            '(0712) 345.678',
+        ):
+            with self.subTest(raw=raw):
+                self.assertEqual(normalize_phone_number(raw), '+255712345678')
+
+    def test_rejects_non_tanzanian_mobile_numbers(self):
+        for raw in ('', '0812345678', '+254712345678', '07123456', 'phone', None):
+            with self.subTest(raw=raw):
+                with self.assertRaises(ValueError):
+                    normalize_phone_number(raw)
+
+    def test_manager_stores_canonical_form(self):
+        user = User.objects.create_user('0712 345 678', 'Asha Mussa', 'pw')
+        self.assertEqual(user.phone_number, '+255712345678')
+        self.assertEqual(User.objects.get_by_natural_key('255712345678'), user)
+
+    def test_migration_normalizes_rows_and_skips_collisions(self):
+        User.objects.bulk_create([
+            User(phone_number='0712345678', full_name='A'),
+            User(phone_number='+255 622 334 455', full_name='B'),
+            User(phone_number='+255622334455', full_name='C'),
+            User(phone_number='garbage', full_name='D'),
+        ])
+        migration = importlib.import_module('users.migrations.0002_normalize_phone_numbers')
+        migration.normalize_existing_phone_numbers(
+            django_apps, SimpleNamespace(connection=connection),
+        )
+        self.assertEqual(
+            dict(User.objects.values_list('full_name', 'phone_number')),
+            {
+                'A': '+255712345678',
+                'B': '+255 622 334 455',
+                'C': '+255622334455',
+                'D': 'garbage',
+            },
+        )
+
+
+@override_settings(LOGIN_ACTIVITY={'FLUSH_INTERVAL': 0})
+class PhoneNumberBackendTests(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            '+255712345678', 'Asha Mussa', 's3cure-Passw0rd',
+        )
+
+    def test_login_with_local_format(self):
+        response = APIClient().post(reverse('users:login'), {
+            'phone_number': '0712 345 678',
+            'password': 's3cure-Passw0rd',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user_id'], self.user.pk)
+
+    def test_single_lean_lookup(self):
+        with CaptureQueriesContext(connection) as ctx:
+            user = PhoneNumberBackend().authenticate(
+                None, phone_number='255712345678', password='s3cure-Passw0rd',
+            )
+        self.assertEqual(user, self.user)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        sql = ctx.captured_queries[0]['sql']
+        self.assertNotIn('full_name', sql)
+        self.assertNotIn('profile_picture', sql)
+
+    def test_rejects_bad_password_and_unknown_numbers(self):
+        backend = PhoneNumberBackend()
+        self.assertIsNone(backend.authenticate(None, phone_number='0712345678', password='nope'))
+        self.assertIsNone(backend.authenticate(None, phone_number='0612345678', password='s3cure-Passw0rd'))
+        self.assertIsNone(backend.authenticate(None, phone_number='not a phone', password='s3cure-Passw0rd'))
+
+    def test_admin_style_username_kwarg(self):
+        user = authenticate(username='0712345678', password='s3cure-Passw0rd')
+        self.assertEqual(user, self.user)
+
+    def test_register_normalizes_phone_number(self):
+        response = APIClient().post(reverse('users:register'), {
+            'phone_number': '0622 334 455',
+            'full_name': 'Juma Ali',
+            'password': 's3cure-Passw0rd',
+            'password2': 's3cure-Passw0rd',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.filter(phone_number='+255622334455').exists())
+
+
+class LoginActivityRecorderTests(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('+255712345678', 'Asha Mussa', 's3cure-Passw0rd')
+        self.recorder = LoginActivityRecorder(threshold=300, flush_interval=3600)
+
+    def tearDown(self):
+        self.recorder._stop.set()
+
+    def test_buffers_until_flush_and_leaves_updated_at(self):
+        updated_at = self.user.updated_at
+        when = timezone.now()
+        self.assertTrue(self.recorder.record(self.user, when))
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.recorder.flush(), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, when)
+        self.assertEqual(self.user.updated_at, updated_at)
+
+    def test_skips_recent_logins(self):
+        when = timezone.now()
+        self.user.last_login = when - timedelta(seconds=60)
+        self.assertFalse(self.recorder.record(self.user, when))
+        self.user.last_login = when - timedelta(seconds=600)
+        self.assertTrue(self.recorder.record(self.user, when))
+
+    def test_batches_many_users_into_few_updates(self):
+        users = User.objects.bulk_create(
+            User(phone_number=f'+25562000{i:04d}', full_name=f'User {i}') for i in range(12)
+        )
+        recorder = LoginActivityRecorder(flush_interval=3600, batch_size=5)
+        for user in users:
+            recorder.record(user)
+        with self.assertNumQueries(3):
+            self.assertEqual(recorder.flush(), 12)
+        self.assertFalse(User.objects.filter(pk__in=[u.pk for u in users], last_login=None).exists())
+
+    @override_settings(LOGIN_ACTIVITY={'FLUSH_INTERVAL': 0})
+    def test_login_endpoint_records_last_login(self):
+        response = APIClient().post(reverse('users:login'), {
+            'phone_number': '+255712345678',
+            'password': 's3cure-Passw0rd',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+
+class SlidingWindowLimiterTests(UsersTestCase):
+    def test_limits_and_slides(self):
+        clock = FakeClock()
+        limiter = SlidingWindowLimiter(3, 60, LocalWindowStore(), clock=clock)
+        self.assertEqual([limiter.hit('k')[0] for _ in range(4)], [True, True, True, False])
+
+        # Halfway through the next window half of the old hits still count.
+        clock.now = 90
+        self.assertTrue(limiter.hit('k')[0])
+        self.assertTrue(limiter.hit('k')[0])
+        allowed, wait = limiter.hit('k')
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 10)
+        clock.now = 100.5
+        self.assertTrue(limiter.hit('k')[0])
+
+    def test_keys_are_independent(self):
+        limiter = SlidingWindowLimiter(1, 60, LocalWindowStore(), clock=FakeClock())
+        self.assertTrue(limiter.hit('a')[0])
+        self.assertTrue(limiter.hit('b')[0])
+        self.assertFalse(limiter.hit('a')[0])
+
+    def test_store_evicts_idle_and_excess_keys(self):
+        clock = FakeClock()
+        store = LocalWindowStore(max_keys=2)
+        limiter = SlidingWindowLimiter(5, 60, store, clock=clock)
+        for key in 'abc':
+            limiter.hit(key)
+        self.assertEqual(len(store), 2)
+        clock.now = 200
+        limiter.hit('d')
+        self.assertEqual(len(store), 1)
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    )
+    def test_shared_store(self):
+        limiter = SlidingWindowLimiter(2, 60, SharedWindowStore('default', 60), clock=FakeClock())
+        self.assertEqual([limiter.hit('k')[0] for _ in range(3)], [True, True, False])
+
+    def assert_concurrent_hits_capped(self, store):
+        limiter = SlidingWindowLimiter(5, 60, store, clock=FakeClock())
+        barrier = threading.Barrier(20)
+        results = []
+
+        def attempt():
+            barrier.wait()
+            results.append(limiter.hit('concurrent')[0])
+
+        threads = [threading.Thread(target=attempt) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 5)
+
+    def test_concurrent_hits_never_exceed_limit(self):
+        self.assert_concurrent_hits_capped(LocalWindowStore())
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    )
+    def test_concurrent_shared_hits_never_exceed_limit(self):
+        self.assert_concurrent_hits_capped(SharedWindowStore('default', 60))
+
+
+@override_settings(
+    LOGIN_ACTIVITY={'FLUSH_INTERVAL': 0},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class LoginThrottleTests(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        User.objects.create_user('+255712345678', 'Asha Mussa', 's3cure-Passw0rd')
+
+    def login(self, phone_number, password='wrong', ip='10.0.0.1', **headers):
+        return APIClient().post(
+            reverse('users:login'),
+            {'phone_number': phone_number, 'password': password},
+            REMOTE_ADDR=ip,
+            **headers,
+        )
+
+    def test_phone_throttle_rejects_before_hashing(self):
+        for ip in range(5):
+            self.login('+255712345678', ip=f'10.0.0.{ip}')
+        completed = hashing.get_hashing_executor().metrics.snapshot()['completed']
+        # Any spelling of the same number shares one bucket.
+        response = self.login('0712 345 678', password='s3cure-Passw0rd', ip='10.0.1.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(hashing.get_hashing_executor().metrics.snapshot()['completed'], completed)
+
+    def test_ip_throttle(self):
+        for i in range(30):
+            self.login(f'+2557000{i:05d}')
+        self.assertEqual(self.login('+255712345678').status_code, 429)
+        self.assertEqual(self.login('+255712345678', ip='10.0.0.2').status_code, 400)
+
+    def test_ip_throttle_ignores_forged_forwarded_for(self):
+        for i in range(30):
+            self.login(f'+2557000{i:05d}', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}')
+        response = self.login('+255712345678', HTTP_X_FORWARDED_FOR='198.51.100.7')
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+    def test_ip_throttle_behind_proxy(self):
+        # The proxy appends the address it saw; whatever the client put
+        # before it does not change the bucket.
+        for i in range(30):
+            self.login(f'+2557000{i:05d}', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}, 198.51.100.7')
+        response = self.login('+255712345678', HTTP_X_FORWARDED_FOR='198.51.100.7')
+        self.assertEqual(response.status_code, 429)
+        response = self.login('+255712345678', HTTP_X_FORWARDED_FOR='198.51.100.8')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(
+    LOGIN_ACTIVITY={'FLUSH_INTERVAL': 0},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class AsyncViewTests(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+        self.user = User.objects.create_user('+255712345678', 'Asha Mussa', 's3cure-Passw0rd')
+
+    async def post(self, view, data=None, **extra):
+        request = self.factory.post('/', data or {}, content_type='application/json', **extra)
+        response = await view.as_view()(request)
+        return response, json.loads(response.content)
+
+    async def test_login(self):
+        response, data = await self.post(
+            AsyncLoginAPIView, {'phone_number': '0712 345 678', 'password': 's3cure-Passw0rd'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['user_id'], self.user.pk)
+        self.assertTrue(await Token.objects.filter(key=data['token'], user=self.user).aexists())
+
+    async def test_login_rejects_bad_password(self):
+        response, data = await self.post(
+            AsyncLoginAPIView, {'phone_number': '+255712345678', 'password': 'wrong'},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', data)
+
+    async def test_login_requires_fields(self):
+        response, data = await self.post(AsyncLoginAPIView, {'phone_number': '+255712345678'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', data)
+
+    async def test_register(self):
+        payload = {
+            'phone_number': '0754 000 111',
+            'full_name': 'Neema Joseph',
+            'password': 's3cure-Passw0rd',
+            'password2': 's3cure-Passw0rd',
+        }
+        response, data = await self.post(AsyncRegisterAPIView, payload)
+        self.assertEqual(response.status_code, 201)
+        user = await User.objects.aget(phone_number='+255754000111')
+        self.assertEqual(data['token'], (await Token.objects.aget(user=user)).key)
+
+        response, data = await self.post(AsyncRegisterAPIView, payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('phone_number', data)
+
+    async def test_logout(self):
+        token = await Token.objects.acreate(user=self.user)
+        response, _ = await self.post(AsyncLogoutAPIView, headers={'Authorization': f'Token {token.key}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(await Token.objects.filter(key=token.key).aexists())
+
+        response, data = await self.post(AsyncLogoutAPIView, headers={'Authorization': f'Token {token.key}'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+
+    async def test_logout_requires_credentials(self):
+        response, _ = await self.post(AsyncLogoutAPIView)
+        self.assertEqual(response.status_code, 401)
+
+    async def test_django_exceptions_are_rendered_as_api_errors(self):
+        class View(AsyncAPIView):
+            error = None
+
+            async def get(self, request):
+                raise self.error
+
+        for error, status_code in ((Http404(), 404), (DjangoPermissionDenied(), 403)):
+            with self.subTest(error=error):
+                response = await View.as_view(error=error)(self.factory.get('/'))
+                self.assertEqual(response.status_code, status_code)
+                self.assertIn('detail', json.loads(response.content))
+
+    async def test_login_throttle(self):
+        for _ in range(5):
+            await self.post(AsyncLoginAPIView, {'phone_number': '+255712345678', 'password': 'wrong'})
+        response, _ = await self.post(
+            AsyncLoginAPIView, {'phone_number': '+255712345678', 'password': 's3cure-Passw0rd'},
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+@override_settings(
+    LOGIN_ACTIVITY={'FLUSH_INTERVAL': 0},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class LoginReplicaRoutingTests(UsersTestCase):
+    """A login after logout hands out a new token the replicas do not have yet."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('+255712345678', 'Asha Mussa', 's3cure-Passw0rd')
+        token = Token.objects.create(user=self.user)
+        response = APIClient().post(reverse('users:logout'), HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 200)
+        self.credentials = {'phone_number': '+255712345678', 'password': 's3cure-Passw0rd'}
+
+    def assertPinned(self, token_key):
+        self.assertTrue(get_sticky_clients().is_pinned([f'token:{token_key}']))
+
+    def test_login_pins_new_token_to_primary(self):
+        with self.settings(REPLICA_ROUTING={'REPLICAS': ['replica']}):
+            response = APIClient().post(reverse('users:login'), self.credentials)
+            self.assertEqual(response.status_code, 200)
+            self.assertPinned(response.data['token'])
+
+    def test_async_login_pins_new_token_to_primary(self):
+        view = AsyncLoginAPIView.as_view()
+
+        async def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return await view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        request = AsyncRequestFactory().post('/', self.credentials, content_type='application/json')
+        with self.settings(REPLICA_ROUTING={'REPLICAS': ['replica']}):
+            response = async_to_sync(middleware)(request)
+            self.assertEqual(response.status_code, 200)
+            self.assertPinned(json.loads(response.content)['token'])
+
+
+class AuthorizationSnapshotTests(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            '+255712345678', 'Asha Mussa', 's3cure-Passw0rd', role=User.Role.LANDLORD,
+        )
+        self.group = Group.objects.create(name='Moderators')
+        self.perm = Permission.objects.get(codename='change_user')
+        self.group.permissions.add(self.perm)
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_one_query_per_request(self):
+        user = self.fresh_user()
+        request = SimpleNamespace(user=user)
+        with self.assertNumQueries(1):
+            for permission in (IsLandlord(), IsTenant(), CanPostProperties(), IsLandlord()):
+                permission.has_permission(request, None)
+            user.has_perm('users.change_user')
+            user.can_post_properties()
+        # The next request's copy of the user is served from the cache.
+        request = SimpleNamespace(user=self.fresh_user())
+        with self.assertNumQueries(0):
+            self.assertTrue(IsLandlord().has_permission(request, None))
+
+    def test_group_membership_invalidates(self):
+        self.assertFalse(self.fresh_user().has_perm('users.change_user'))
+        self.user.groups.add(self.group)
+        self.assertTrue(self.fresh_user().has_perm('users.change_user'))
+        self.group.user_set.remove(self.user)
+        self.assertFalse(self.fresh_user().has_perm('users.change_user'))
+
+    def test_group_permission_change_invalidates(self):
+        self.user.groups.add(self.group)
+        self.assertTrue(self.fresh_user().has_perm('users.change_user'))
+        self.group.permissions.clear()
+        self.assertFalse(self.fresh_user().has_perm('users.change_user'))
+
+    def test_direct_permission_invalidates(self):
+        self.assertFalse(self.fresh_user().has_perm('users.change_user'))
+        self.user.user_permissions.add(self.perm)
+        self.assertTrue(self.fresh_user().has_perm('users.change_user'))
+
+    def test_kyc_approval_invalidates(self):
+        self.assertFalse(self.fresh_user().can_post_properties())
+        self.user.kyc_status = User.KYCStatus.APPROVED
+        self.user.is_verified = True
+        self.user.save(update_fields=['kyc_status', 'is_verified'])
+        self.assertTrue(self.fresh_user().can_post_properties())
+
+    def test_role_change_invalidates(self):
+        request = SimpleNamespace(user=self.fresh_user())
+        self.assertTrue(IsLandlord().has_permission(request, None))
+        self.user.role = User.Role.TENANT
+        self.user.save()
+        request = SimpleNamespace(user=self.fresh_user())
+        self.assertFalse(IsLandlord().has_permission(request, None))
+        self.assertTrue(IsTenant().has_permission(request, None))
+
+    def test_anonymous_user(self):
+        request = SimpleNamespace(user=AnonymousUser())
+        with self.assertNumQueries(0):
+            self.assertFalse(IsTenant().has_permission(request, None))
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        AUTHORIZATION_CACHE={'SHARED_CACHE_ALIAS': 'default'},
+    )
+    def test_shared_versions(self):
+        cache = get_authorization_cache()
+        get_authorization(self.fresh_user())
+        cache.local.clear()
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertFalse(get_authorization(user).has_perm('users.change_user'))
+        # A bump made by another worker is seen through the shared counter.
+        cache.local.set(self.user.pk, get_authorization(self.fresh_user()))
+        self.user.groups.add(self.group)
+        self.assertTrue(get_authorization(self.fresh_user()).has_perm('users.change_user'))
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        AUTHORIZATION_CACHE={'SHARED_CACHE_ALIAS': 'default'},
+    )
+    def test_stale_instance_does_not_publish_revoked_role(self):
+        # Another worker's token cache still holds the user as a landlord.
+        stale = self.fresh_user()
+        User.objects.filter(pk=self.user.pk).update(role=User.Role.TENANT)
+        get_authorization_cache().invalidate_user(self.user.pk)
+        self.assertTrue(get_authorization(stale).is_tenant)
+        # What it published for everyone is the new role too.
+        get_authorization_cache().local.clear()
+        forget_authorization(stale)
+        with self.assertNumQueries(0):
+            self.assertTrue(get_authorization(stale).is_tenant)
+
+    def test_snapshot_is_read_from_primary(self):
+        # A replica may still have the old role. Tests only have the
+        # primary, so a query the router sent to one would fail.
+        User.objects.filter(pk=self.user.pk).update(role=User.Role.TENANT)
+        get_authorization_cache().invalidate_user(self.user.pk)
+        forget_authorization(self.user)
+        with mock.patch.object(PrimaryReplicaRouter, 'db_for_read', return_value='replica'):
+            self.assertTrue(get_authorization(self.user).is_tenant)
+
+    async def test_async_permission(self):
+        user = await User.objects.aget(pk=self.user.pk)
+        request = SimpleNamespace(user=user)
+        self.assertTrue(await IsLandlord().ahas_permission(request, None))
+        self.assertFalse(await CanPostProperties().ahas_permission(request, None))
+
+
+@override_settings(LOGIN_ACTIVITY={'FLUSH_INTERVAL': 0})
+class KYCReviewTests(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.reviewer = User.objects.create_superuser('+255700000001', 'Reviewer', 's3cure-Passw0rd')
+        self.users = [
+            User.objects.create_user(f'+2557120000{i:02d}', f'Landlord {i}', role=User.Role.LANDLORD)
+            for i in range(5)
+        ]
+        start = timezone.now() - timedelta(days=1)
+        for i, user in enumerate(self.users[:4]):
+            submit_kyc(user, when=start + timedelta(minutes=i))
+
+    def test_queue_uses_partial_index(self):
+        self.assertIn('users_kyc_queue_idx', review_queue(User.KYCStatus.PENDING).explain())
+        self.assertEqual(list(review_queue()), self.users[:4])
+
+    def test_batch_approval(self):
+        ids = [user.pk for user in self.users]
+        with self.assertNumQueries(6):
+            # SAVEPOINT, SELECT, UPDATE, audit INSERT, RELEASE, and the
+            # token lookup for the cache invalidation.
+            updated = review_kyc(ids, User.KYCStatus.APPROVED, reviewer=self.reviewer, note='ok')
+        self.assertEqual(updated, 4)
+        approved = User.objects.filter(kyc_status=User.KYCStatus.APPROVED, is_verified=True)
+        self.assertEqual(approved.count(), 4)
+        self.assertFalse(review_queue().exists())
+        review = KYCReview.objects.get(user=self.users[0])
+        self.assertEqual(
+            (review.previous_status, review.status, review.reviewer, review.note),
+            (User.KYCStatus.PENDING, User.KYCStatus.APPROVED, self.reviewer, 'ok'),
+        )
+        # Users outside the queue are skipped on a second pass.
+        self.assertEqual(review_kyc(ids, User.KYCStatus.REJECTED), 0)
+
+    def test_approval_invalidates_authorization(self):
+        user = User.objects.get(pk=self.users[0].pk)
+        self.assertFalse(user.can_post_properties())
+        review_kyc([user.pk], User.KYCStatus.APPROVED)
+        self.assertTrue(User.objects.get(pk=user.pk).can_post_properties())
+
+    def test_rejection_clears_verification(self):
+        User.objects.filter(pk=self.users[0].pk).update(is_verified=True)
+        review_kyc([self.users[0].pk], User.KYCStatus.REJECTED)
+        user = User.objects.get(pk=self.users[0].pk)
+        self.assertEqual((user.kyc_status, user.is_verified), (User.KYCStatus.REJECTED, False))
+
+    def test_queue_api(self):
+        client = APIClient()
+        client.force_authenticate(self.reviewer)
+        response = client.get(reverse('users:kyc-queue'), {'page_size': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [u.pk for u in self.users[:3]])
+        response = client.get(response.data['next'])
+        self.assertEqual([row['id'] for row in response.data['results']], [self.users[3].pk])
+
+        response = client.post(
+            reverse('users:kyc-review'),
+            {'user_ids': [self.users[0].pk], 'decision': 'APPROVED'},
+            format='json',
+        )
+        self.assertEqual(response.data, {'updated': 1})
+
+    def test_queue_api_requires_reviewer(self):
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        self.assertEqual(client.get(reverse('users:kyc-queue')).status_code, 403)
+
+    def test_admin_action(self):
+        self.client.force_login(self.reviewer)
+        response = self.client.post(reverse('admin:users_user_changelist'), {
+            'action': 'reject_kyc',
+            '_selected_action': [user.pk for user in self.users],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(KYCReview.objects.filter(status=User.KYCStatus.REJECTED).count(), 4)
+
+
+@override_settings(LOGIN_ACTIVITY={'FLUSH_INTERVAL': 0})
+class UserSearchTests(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.asha = User.objects.create_user('+255712345678', 'Asha Mussa', role=User.Role.LANDLORD)
+        self.juma = User.objects.create_user('+255754000111', 'Juma Hamisi')
+        self.neema = User.objects.create_user('+255655123456', 'Neema Mussa-Juma')
+
+    def search(self, term):
+        return set(search_users(User.objects.all(), term))
+
+    def test_phone_number_prefix(self):
+        for value, expected in [
+            ('0712 34', '+25571234'),
+            ('+25571', '+25571'),
+            ('255 65', '+25565'),
+            ('7123', '+2557123'),
+            ('+2', '+2'),
+            ('0812', None),
+            ('+1202', None),
+            ('Asha', None),
+        ]:
+            with self.subTest(value=value):
+                self.assertEqual(phone_number_prefix(value), expected)
+
+    def test_phone_prefix_search(self):
+        self.assertEqual(self.search('0712'), {self.asha})
+        self.assertEqual(self.search('+2557'), {self.asha, self.juma})
+        plan = search_users(User.objects.all(), '0712 345').explain()
+        self.assertIn('USING INDEX', plan)
+
+    def test_name_search(self):
+        self.assertEqual(self.search('mus'), {self.asha, self.neema})
+        self.assertEqual(self.search('ash mus'), {self.asha})
+        self.assertEqual(self.search('juma'), {self.juma, self.neema})
+        self.assertEqual(self.search('ssa'), set())
+
+    def test_name_index_follows_writes(self):
+        self.juma.full_name = 'Juma Kassim'
+        self.juma.save()
+        self.asha.delete()
+        self.assertEqual(self.search('kassim'), {self.juma})
+        self.assertEqual(self.search('hamisi'), set())
+        self.assertEqual(self.search('asha'), set())
+
+    def test_admin_changelist(self):
+        admin_user = User.objects.create_superuser('+255700000001', 'Admin', 's3cure-Passw0rd')
+        self.client.force_login(admin_user)
+        url = reverse('admin:users_user_changelist')
+        response = self.client.get(url, {'q': 'mussa'})
+        self.assertContains(response, 'Asha Mussa')
+        self.assertNotContains(response, 'Juma Hamisi')
+        self.assertContains(response, 'Landlord (1)')
+        # Filter counts are cached across page loads.
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse([q for q in queries if 'GROUP BY' in q['sql']])
@@ -0,0 +1,263 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.throttling import SimpleRateThrottle
+
+from .phone import normalize_phone_number
+
+
+DEFAULT_THROTTLING = {
+    # Most keys tracked per scope by the in-process store; the least
+    # recently seen key is dropped beyond this.
+    'MAX_KEYS': 100000,
+    # CACHES alias shared by all workers. None keeps counts per process.
+    'SHARED_CACHE_ALIAS': None,
+    'KEY_PREFIX': 'throttle',
+}
+
+
+def get_throttling_options():
+    return {
+        **DEFAULT_THROTTLING,
+        **getattr(settings, 'THROTTLING', {}),
+    }
+
+
+# ======================================================
+# SLIDING WINDOW STORES
+# ======================================================
+# Both stores keep two counters per key: hits in the current fixed window
+# and hits in the previous one. The sliding-window estimate weights the
+# previous window by how much of it still overlaps the last `duration`
+# seconds, which gives constant memory per key instead of one timestamp
+# per request.
+
+class LocalWindowStore:
+    """In-process counters; idle keys are evicted as new keys arrive."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit_if_allowed(self, key, window, limit, overlap):
+        """
+        Count a hit unless the sliding estimate is already at ``limit``.
+
+        Returns (allowed, previous, current) with the counts seen before the
+        hit. The check and the increment share one lock acquisition so
+        concurrent requests for a key cannot all pass on the same count.
+        """
+        with self._lock:
+            entry = self._windows.get(key)
+            previous, current = (0, 0) if entry is None else self._shift(entry, window)
+            if previous * overlap + current >= limit:
+                return False, previous, current
+            self._windows[key] = (window, previous, current + 1)
+            self._windows.move_to_end(key)
+            self._evict(window)
+            return True, previous, current
+
+    @staticmethod
+    def _shift(entry, window):
+        entry_window, previous, current = entry
+        if entry_window == window:
+            return previous, current
+        if entry_window == window - 1:
+            return current, 0
+        return 0, 0
+
+    def _evict(self, window):
+        # Keys are ordered by last hit, so idle keys (no hits in the current
+        # or previous window) collect at the front.
+        while self._windows:
+            key, (entry_window, _, _) = next(iter(self._windows.items()))
+            if entry_window >= window - 1 and len(self._windows) <= self.max_keys:
+                break
+            del self._windows[key]
+
+    def __len__(self):
+        return len(self._windows)
+
+
+class SharedWindowStore:
+    """Counters in a Django cache, shared by every worker process."""
+
+    def __init__(self, cache_alias, duration, key_prefix='throttle'):
+        self.cache_alias = cache_alias
+        self.duration = duration
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _key(self, key, window):
+        return f'{self.key_prefix}:{key}:{window}'
+
+    def hit_if_allowed(self, key, window, limit, overlap):
+        """
+        Count a hit unless the sliding estimate is already at ``limit``.
+
+        The counter is incremented first and the decision made on the value
+        incr() returned, so workers racing on a key each see a distinct
+        count. A rejected hit is taken back out again.
+        """
+        cache_key = self._key(key, window)
+        # add() is a no-op if the counter exists, so racing workers both
+        # end up incrementing the same counter.
+        self.cache.add(cache_key, 0, timeout=self.duration * 2)
+        try:
+            current = self.cache.incr(cache_key) - 1
+        except ValueError:
+            self.cache.set(cache_key, 1, timeout=self.duration * 2)
+            current = 0
+        previous = self.cache.get(self._key(key, window - 1), 0)
+        if previous * overlap + current >= limit:
+            try:
+                self.cache.decr(cache_key)
+            except ValueError:
+                pass
+            return False, previous, current
+        return True, previous, current
+
+
+class SlidingWindowLimiter:
+    """Allows ``num_requests`` per ``duration`` seconds per key."""
+
+    def __init__(self, num_requests, duration, store, clock=time.time):
+        self.num_requests = num_requests
+        self.duration = duration
+        self.store = store
+        self._clock = clock
+
+    def hit(self, key):
+        """Count a request for ``key``; returns (allowed, seconds to wait)."""
+        now = self._clock()
+        window, offset = divmod(now, self.duration)
+        window = int(window)
+        overlap = 1 - offset / self.duration
+        allowed, previous, current = self.store.hit_if_allowed(
+            key, window, self.num_requests, overlap,
+        )
+        if not allowed:
+            return False, self._wait(previous, current, offset)
+        return True, 0
+
+    def _wait(self, previous, current, offset):
+        d, n = self.duration, self.num_requests
+        if current < n:
+            # Blocked only by the previous window; wait for its weight to decay.
+            return max(0.0, d * (1 - (n - current) / previous) - offset)
+        # Wait for the current window to roll over and decay in turn.
+        return (d - offset) + d * (1 - n / current)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_limiter(scope, num_requests, duration):
+    options = get_throttling_options()
+    if options['SHARED_CACHE_ALIAS'] is not None:
+        store = SharedWindowStore(
+            options['SHARED_CACHE_ALIAS'],
+            duration,
+            key_prefix=f"{options['KEY_PREFIX']}:{scope}",
+        )
+    else:
+        with _stores_lock:
+            store = _stores.get(scope)
+            if store is None:
+                store = _stores[scope] = LocalWindowStore(options['MAX_KEYS'])
+    return SlidingWindowLimiter(num_requests, duration, store)
+
+
+@receiver(setting_changed)
+def reset_throttle_stores(sender, setting, **kwargs):
+    if setting in ('THROTTLING', 'REST_FRAMEWORK'):
+        with _stores_lock:
+            _stores.clear()
+
+
+# ======================================================
+# DRF THROTTLE CLASSES
+# ======================================================
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle with a constant-memory sliding window.
+
+    Rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'][scope] as
+    usual ('5/min'). Throttles run in APIView.initial(), before the view
+    or its serializer, so a throttled login never reaches authenticate()
+    and never costs a password hash.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        limiter = get_limiter(self.scope, self.num_requests, self.duration)
+        allowed, self._wait = limiter.hit(self.key)
+        return allowed
+
+    async def aallow_request(self, request, view):
+        """Async counterpart of allow_request(), used by the ASGI views."""
+        if get_throttling_options()['SHARED_CACHE_ALIAS'] is None:
+            # In-process counters: no I/O, safe to run on the event loop.
+            return self.allow_request(request, view)
+        return await sync_to_async(self.allow_request, thread_sensitive=False)(request, view)
+
+    def wait(self):
+        return math.ceil(self._wait) if self._wait else None
+
+
+class PhoneNumberRateThrottle(SlidingWindowRateThrottle):
+    """Keyed by the phone number in the request body, normalized."""
+    phone_field = 'phone_number'
+
+    def get_cache_key(self, request, view):
+        raw = request.data.get(self.phone_field) if hasattr(request.data, 'get') else None
+        if not raw:
+            return None
+        try:
+            phone_number = normalize_phone_number(raw)
+        except ValueError:
+            phone_number = str(raw).strip().lower()
+        return self.cache_format % {'scope': self.scope, 'ident': phone_number}
+
+
+class ClientIPRateThrottle(SlidingWindowRateThrottle):
+    """
+    Keyed by client IP: REMOTE_ADDR, or the address the outermost of
+    REST_FRAMEWORK['NUM_PROXIES'] proxies saw in X-Forwarded-For.
+    """
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginPhoneRateThrottle(PhoneNumberRateThrottle):
+    scope = 'login_phone'
+
+
+class LoginIPRateThrottle(ClientIPRateThrottle):
+    scope = 'login_ip'
+
+
+class RegisterPhoneRateThrottle(PhoneNumberRateThrottle):
+    scope = 'register_phone'
+
+
+class RegisterIPRateThrottle(ClientIPRateThrottle):
+    scope = 'register_ip'
@@ -1,10 +1,27 @@
+from django.conf import settings
 from django.urls import path
-from .views import LoginAPIView, RegisterAPIView, LogoutAPIView
+from .views import (
+    KYCQueueAPIView,
+    KYCReviewAPIView,
+    LoginAPIView,
+    LogoutAPIView,
+    RegisterAPIView,
+)
+from .async_views import AsyncLoginAPIView, AsyncRegisterAPIView, AsyncLogoutAPIView
 
 app_name = "users"
 
+# Under ASGI (asgi.py) the async views run on the event loop instead of a
+# thread per request; under WSGI the DRF views avoid an event loop per request.
+if getattr(settings, 'USERS_ASYNC_VIEWS', False):
+    LoginView, RegisterView, LogoutView = AsyncLoginAPIView, AsyncRegisterAPIView, AsyncLogoutAPIView
+else:
+    LoginView, RegisterView, LogoutView = LoginAPIView, RegisterAPIView, LogoutAPIView
+
 urlpatterns = [
-    path("login/", LoginAPIView.as_view(), name="login"),
-    path("register/", RegisterAPIView.as_view(), name="register"),
-    path("logout/", LogoutAPIView.as_view(), name="logout"),
+    path("login/", LoginView.as_view(), name="login"),
+    path("register/", RegisterView.as_view(), name="register"),
+    path("logout/", LogoutView.as_view(), name="logout"),
+    path("kyc/queue/", KYCQueueAPIView.as_view(), name="kyc-queue"),
+    path("kyc/review/", KYCReviewAPIView.as_view(), name="kyc-review"),
 ]
@@ -1,15 +1,41 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import ListAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 
-from .serializers import LoginSerializer, RegisterSerializer
-from .permissions import IsLandlord, IsTenant, IsAgent
+from NIKONEKTI_backend.replicas import stick_to_primary
+
+from .kyc import review_kyc, review_queue
+from .models import User
+from .pagination import KYCQueuePagination
+from .serializers import (
+    KYCQueueSerializer,
+    KYCReviewSerializer,
+    LoginSerializer,
+    RegisterSerializer,
+)
+from .permission import IsLandlord, IsTenant, IsAgent, IsKYCReviewer
+from .throttling import (
+    LoginIPRateThrottle,
+    LoginPhoneRateThrottle,
+    RegisterIPRateThrottle,
+    RegisterPhoneRateThrottle,
+)
 
 
 class LoginAPIView(APIView):
     permission_classes = [AllowAny]
+    # User lookup, token get_or_create, and the last_login UPDATE when
+    # LoginActivityRecorder is not buffering.
+    query_budget = 4
+    # Checked before the serializer runs, so throttled attempts never
+    # reach authenticate() or the password hasher.
+    throttle_classes = [LoginPhoneRateThrottle, LoginIPRateThrottle]
+    # A replica may not have the account or password change yet.
+    read_from_primary = True
 
     def post(self, request):
         serializer = LoginSerializer(
@@ -17,6 +43,9 @@ class LoginAPIView(APIView):
             context={'request': request}
         )
         serializer.is_valid(raise_exception=True)
+        # A login after logout creates a new token on the primary; keep
+        # the client there until the replicas have it.
+        stick_to_primary(serializer.validated_data['token'])
 
         return Response(
             serializer.validated_data,
@@ -28,18 +57,24 @@ class RegisterAPIView(APIView):
     API endpoint for user registration.
     """
     permission_classes = [AllowAny]
+    query_budget = 2
+    throttle_classes = [RegisterPhoneRateThrottle, RegisterIPRateThrottle]
 
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        # register_user() creates the token in the same transaction and
+        # caches it on the user, so reading it back costs no query.
         user = serializer.save()
-        token = Token.objects.get(user=user)
+        # The client's next request comes with the new token; keep it on
+        # the primary until the replicas have the account.
+        stick_to_primary(user.auth_token.key)
 
         return Response(
             {
                 "message": "User registered successfully",
-                "token": token.key,
+                "token": user.auth_token.key,
                 "user_id": user.id,
                 "role": user.role,
                 "is_verified": user.is_verified,
@@ -54,11 +89,63 @@ class LogoutAPIView(APIView):
     Deletes the user's authentication token.
     """
     permission_classes = [IsAuthenticated]
+    query_budget = 2
 
     def post(self, request):
-        request.user.auth_token.delete()
+        # request.auth is the Token that authenticated this request; deleting
+        # it fires post_delete, which evicts it from the token cache.
+        token = request.auth if isinstance(request.auth, Token) else request.user.auth_token
+        token.delete()
 
         return Response(
             {"message": "Successfully logged out"},
             status=status.HTTP_200_OK
         )
+
+
+class KYCQueueAPIView(ListAPIView):
+    """
+    API endpoint listing users awaiting KYC review, oldest first.
+
+    ?status=RESUBMISSION_REQUIRED lists users asked to resubmit instead
+    of those pending review.
+    """
+    permission_classes = [IsKYCReviewer]
+    # The reviewer's permissions and one page.
+    query_budget = 2
+    serializer_class = KYCQueueSerializer
+    pagination_class = KYCQueuePagination
+
+    def get_queryset(self):
+        status_ = self.request.query_params.get('status', User.KYCStatus.PENDING)
+        if status_ not in User.KYC_QUEUE_STATUSES:
+            raise ValidationError(
+                {"status": [f"Must be one of: {', '.join(User.KYC_QUEUE_STATUSES)}."]}
+            )
+        return review_queue(status_).only(*KYCQueueSerializer.Meta.fields)
+
+
+class KYCReviewAPIView(APIView):
+    """
+    API endpoint applying one KYC decision to a batch of queued users.
+    """
+    permission_classes = [IsKYCReviewer]
+    # Four queries per batch of REVIEW_BATCH_SIZE users (at most ten
+    # batches), plus the reviewer's permissions.
+    query_budget = 41
+
+    def post(self, request):
+        serializer = KYCReviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        updated = review_kyc(
+            serializer.validated_data['user_ids'],
+            serializer.validated_data['decision'],
+            reviewer=request.user,
+            note=serializer.validated_data['note'],
+        )
+
+        return Response(
+            {"updated": updated},
+            status=status.HTTP_200_OK
+        )